@@ -0,0 +1,111 @@
+import os
+
+from ai.batching import get_batching_queue
+from ai.model import get_engine
+from ai.preprocess import decode_images, preprocess
+from ai.result_cache import get_result_cache
+from core.core import core
+
+
+def combine_results(results):
+    """Study-level result from per-image results: the most suspicious image decides"""
+    ok = [r for r in results if r.get("status") == "ok"]
+    if not ok:
+        return {"status": "unavailable", "message": "No image could be analysed.", "images": results}
+    worst = max(ok, key=lambda r: r["score"])
+    return {
+        "status": "ok",
+        "score": worst["score"],
+        "label": worst["label"],
+        "model_version": worst.get("model_version"),
+        "images": results,
+    }
+
+
+def current_engine():
+    """The shared inference server when one is configured, else the local
+    process pool or the in-process engine, as set by inference_executor"""
+    arch = core()
+    if arch["inference_server"]:
+        from ai.server import get_remote_engine
+        return get_remote_engine(arch["inference_server"])
+    if arch["inference_executor"] == "process":
+        from ai.executor import get_process_executor
+        executor = get_process_executor()
+        # A pool whose workers keep dying has given up; run in-process instead
+        if executor.failed is None:
+            return executor
+    return get_engine()
+
+
+def analyze_image(progress, is_cancelled, image_paths, modality):
+    """Run the AI analysis stages for all images of a study.
+
+    Images are decoded concurrently and classified through the shared
+    batching queue (see ai.batching). Meant to be executed off the GUI thread (see ui.workers.Worker).
+    Returns a study-level result dict with per-image results under "images",
+    or None when the run was cancelled.
+    """
+    if isinstance(image_paths, str):
+        image_paths = [image_paths]
+    engine = current_engine()
+    if not engine.is_available():
+        return {
+            "status": "unavailable",
+            "modality": modality,
+            "message": engine.unavailable_message,
+        }
+
+    progress(5, "Loading model...")
+    engine.load()
+    if is_cancelled():
+        return None
+
+    progress(20, f"Loading {len(image_paths)} image(s)...")
+    missing = [path for path in image_paths if not path or not os.path.exists(path)]
+    if missing or not image_paths:
+        raise FileNotFoundError(f"Image not found: {missing[0] if missing else None}")
+
+    # Images already scored with this model and preprocessing are not run again
+    cache = get_result_cache()
+    keys = [cache.key(path, modality, engine.version) for path in image_paths]
+    results = [cache.get(key) for key in keys]
+    todo = [i for i, result in enumerate(results) if result is None]
+
+    if todo:
+        images = decode_images([image_paths[i] for i in todo], engine.input_size)
+        if is_cancelled():
+            return None
+
+        progress(35, "Preprocessing...")
+        model_input = preprocess(images, modality, engine.input_size)
+        if is_cancelled():
+            return None
+
+        progress(50, "Running model...")
+        # Through a batching queue (here or in the server), so concurrent
+        # analyses share forward passes
+        classify = engine.classify if engine is not get_engine() else get_batching_queue().classify
+        for i, result in zip(todo, classify(model_input)):
+            cache.put(keys[i], result)
+            results[i] = result
+        if is_cancelled():
+            return None
+
+    progress(100, "Done")
+    for path, result in zip(image_paths, results):
+        result["path"] = path
+    result = combine_results(results)
+    result["modality"] = modality
+    result["latency_ms"] = engine.last_latency * 1000 if todo else 0.0
+    result["cached"] = len(image_paths) - len(todo)
+    return result
+
+
+def warm_up_model(progress, is_cancelled):
+    """Background warm-up so the first analysis doesn't pay the cold start"""
+    engine = current_engine()
+    if not engine.is_available():
+        return None
+    engine.warm_up()
+    return {"load_time": engine.load_time, "warmup_time": engine.warmup_time}
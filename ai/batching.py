@@ -0,0 +1,162 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+from ai.model import get_engine
+from core.core import core
+
+
+class BatchingQueue:
+    """Gathers single-image inference requests into batched forward passes.
+
+    submit() queues one preprocessed (H, W) image and returns a Future
+    resolved with its classify() result dict. A background thread takes the
+    first waiting request, keeps collecting until max_batch_size requests
+    are waiting or max_wait seconds have passed since that first one, then
+    runs one engine.classify() over the stacked batch. submit() after
+    close() raises RuntimeError.
+
+    Metrics (for this queue's lifetime):
+        batches        number of forward passes run
+        items          number of images classified
+        fill_ratio     items / (batches * max_batch_size)
+        avg_queue_ms   mean time a request waited before its batch started
+        max_queue_ms   longest such wait
+    """
+
+    _STOP = object()
+
+    def __init__(self, engine=None, max_batch_size=None, max_wait=None):
+        arch = core()
+        self.engine = engine or get_engine()
+        self.max_batch_size = max_batch_size or arch["inference_max_batch"]
+        self.max_wait = max_wait if max_wait is not None else arch["inference_max_wait_ms"] / 1000
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._closed = False
+
+        self.batches = 0
+        self.items = 0
+        self.queue_time = 0.0
+        self.max_queue_time = 0.0
+
+        self._thread = threading.Thread(target=self._run, name="BatchingQueue", daemon=True)
+        self._thread.start()
+
+    def submit(self, image):
+        image = np.asarray(image, dtype=np.float32)
+        future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("BatchingQueue is closed")
+            self._queue.put((image, future, time.perf_counter()))
+        return future
+
+    def classify(self, batch, timeout=None):
+        """Submit every image of an (N, H, W) batch and wait for all results"""
+        futures = [self.submit(image) for image in batch]
+        return [future.result(timeout) for future in futures]
+
+    def close(self, timeout=None):
+        """Finish the requests queued so far and stop the batching thread"""
+        with self._lock:
+            if not self._closed:
+                self._closed = True
+                self._queue.put(self._STOP)
+        self._thread.join(timeout)
+
+    @property
+    def fill_ratio(self):
+        return self.items / (self.batches * self.max_batch_size) if self.batches else None
+
+    @property
+    def avg_queue_ms(self):
+        return self.queue_time / self.items * 1000 if self.items else None
+
+    @property
+    def max_queue_ms(self):
+        return self.max_queue_time * 1000
+
+    def stats(self):
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "fill_ratio": self.fill_ratio,
+            "avg_queue_ms": self.avg_queue_ms,
+            "max_queue_ms": self.max_queue_ms,
+        }
+
+    def _run(self):
+        try:
+            self._serve()
+        finally:
+            # Whatever is still queued when the thread ends would wait forever
+            with self._lock:
+                self._closed = True
+            while True:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is not self._STOP and item[1].set_running_or_notify_cancel():
+                    item[1].set_exception(RuntimeError("BatchingQueue is closed"))
+
+    def _serve(self):
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is self._STOP:
+                break
+            batch = [item]
+            deadline = time.perf_counter() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                try:
+                    item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is self._STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._run_batch(batch)
+
+    def _run_batch(self, batch):
+        started = time.perf_counter()
+        waits = [started - submitted for _, _, submitted in batch]
+        with self._lock:
+            self.batches += 1
+            self.items += len(batch)
+            self.queue_time += sum(waits)
+            self.max_queue_time = max(self.max_queue_time, max(waits))
+
+        # Futures can be cancelled by callers that gave up
+        batch = [entry for entry in batch if entry[1].set_running_or_notify_cancel()]
+        if not batch:
+            return
+        try:
+            results = self.engine.classify(np.stack([image for image, _, _ in batch]))
+        except BaseException as e:
+            for _, future, _ in batch:
+                future.set_exception(e)
+            if not isinstance(e, Exception):
+                raise
+        else:
+            for (_, future, _), result in zip(batch, results):
+                future.set_result(result)
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_batching_queue():
+    """Process-wide queue in front of get_engine()"""
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = BatchingQueue()
+    return _queue
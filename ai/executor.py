@@ -0,0 +1,319 @@
+import math
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from multiprocessing import connection, shared_memory
+
+import numpy as np
+
+from ai.model import InferenceEngine
+from core.core import core
+
+# Worker deaths are counted over this many seconds against max_restarts
+RESTART_WINDOW = 60.0
+
+
+class InferenceWorkerCrashed(RuntimeError):
+    """The worker process running a batch died before returning its results"""
+
+
+def _attach(name):
+    """Open an existing shared memory block; the creating process owns and unlinks it"""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13 registers the block on attach; spawned workers share
+        # the parent's resource tracker, where it is already registered
+        return shared_memory.SharedMemory(name=name)
+
+
+def _worker_main(index, model_dir, tasks, results):
+    """Worker process loop: classify batches read straight out of shared memory.
+
+    results is this worker's own pipe to the dispatcher. A queue shared by all
+    workers would not survive one of them being killed while holding its lock.
+    """
+    engine = InferenceEngine(model_dir)
+    if engine.is_available():
+        engine.warm_up()
+    while True:
+        task = tasks.get()
+        if task is None:
+            return
+        task_id, shm_name, shape = task
+        try:
+            shm = _attach(shm_name)
+            try:
+                batch = np.ndarray(shape, dtype=np.float32, buffer=shm.buf)
+                outcome = engine.classify(batch)
+                del batch
+            finally:
+                shm.close()
+        except Exception as e:
+            results.send((index, task_id, None, f"{type(e).__name__}: {e}"))
+        else:
+            results.send((index, task_id, outcome, None))
+
+
+class ProcessInferenceExecutor:
+    """Runs the model in worker processes instead of the calling process.
+
+    Preprocessed batches are copied once into a multiprocessing.shared_memory
+    block and the workers classify a NumPy view over that block, so image
+    data is never pickled. Weights are memory-mapped by every worker, so
+    their pages are shared too.
+
+    A dispatcher thread hands tasks to idle workers and collects results. If
+    a worker process dies (segfault, OOM kill), its task fails with
+    InferenceWorkerCrashed and a fresh worker is started in its place. Once
+    more than max_restarts workers have died within RESTART_WINDOW seconds
+    (bad weights, a worker that cannot even start), the executor gives up:
+    outstanding tasks fail, failed holds the reason and is_available()
+    turns False, so ai.analysis falls back to the in-process engine.
+
+    Offers the parts of the InferenceEngine interface that ai.analysis uses;
+    classify() splits a batch across the idle workers.
+    """
+
+    unavailable_message = InferenceEngine.unavailable_message
+
+    def __init__(self, processes=None, model_dir=None, max_restarts=None):
+        arch = core()
+        self.processes = processes or arch["inference_processes"] or os.cpu_count() or 1
+        self.model_dir = model_dir or arch["model_dir"]
+        self.max_restarts = max_restarts if max_restarts is not None else arch["inference_worker_restarts"]
+        # Metadata only; the forward pass always runs in the workers
+        self.engine = InferenceEngine(self.model_dir)
+        self._context = multiprocessing.get_context("spawn")
+        # Reentrant: futures are resolved with the lock held and their
+        # callbacks may submit more work
+        self._lock = threading.RLock()
+        self._workers = []
+        self._task_queues = []
+        self._results = []
+        self._idle = deque()
+        self._busy = {}
+        self._pending = deque()
+        self._tasks = {}
+        self._next_id = 0
+        self._dispatcher = None
+        self._closed = False
+        self._deaths = deque()
+
+        self.load_time = None
+        self.warmup_time = None
+        self.last_latency = None
+        self.restarts = 0
+        self.failed = None
+
+    # InferenceEngine interface
+
+    def is_available(self):
+        return self.failed is None and self.engine.is_available()
+
+    def load(self):
+        self.engine.load()
+
+    @property
+    def version(self):
+        return self.engine.version
+
+    @property
+    def input_size(self):
+        return self.engine.input_size
+
+    @property
+    def threshold(self):
+        return self.engine.threshold
+
+    def warm_up(self):
+        """Start the worker processes; each one warms up its own engine"""
+        start = time.perf_counter()
+        self.engine.load()
+        self._start()
+        self.load_time = self.warmup_time = time.perf_counter() - start
+        return self.warmup_time
+
+    def classify(self, batch):
+        start = time.perf_counter()
+        batch = np.asarray(batch, dtype=np.float32)
+        if batch.ndim == 2:
+            batch = batch[np.newaxis]
+        chunk = max(1, math.ceil(len(batch) / self.processes))
+        futures = [self.submit(batch[i:i + chunk]) for i in range(0, len(batch), chunk)]
+        results = [result for future in futures for result in future.result()]
+        self.last_latency = time.perf_counter() - start
+        return results
+
+    # Pool
+
+    def submit(self, batch):
+        """Queue one (N, H, W) batch; returns a Future with its result dicts"""
+        batch = np.ascontiguousarray(batch, dtype=np.float32)
+        self._start()
+        shm = shared_memory.SharedMemory(create=True, size=max(batch.nbytes, 1))
+        np.ndarray(batch.shape, dtype=np.float32, buffer=shm.buf)[...] = batch
+        future = Future()
+        with self._lock:
+            if self._closed:
+                shm.close()
+                shm.unlink()
+                raise RuntimeError("Executor is closed")
+            task_id = self._next_id
+            self._next_id += 1
+            self._tasks[task_id] = (shm, batch.shape, future)
+            self._pending.append(task_id)
+            self._dispatch()
+        return future
+
+    def close(self):
+        """Stop the workers; queued tasks that were not started are cancelled"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            for task_id in list(self._pending):
+                self._finish(task_id, exception=RuntimeError("Executor closed"))
+            self._pending.clear()
+            for tasks in self._task_queues:
+                tasks.put(None)
+        if self._dispatcher is not None:
+            self._dispatcher.join(5)
+        for process in self._workers:
+            process.join(5)
+            if process.is_alive():
+                process.terminate()
+
+    def _start(self):
+        with self._lock:
+            if self._workers or self._closed:
+                return
+            for index in range(self.processes):
+                self._workers.append(None)
+                self._task_queues.append(None)
+                self._results.append(None)
+                self._spawn(index)
+            self._dispatcher = threading.Thread(target=self._run, name="InferenceDispatcher", daemon=True)
+            self._dispatcher.start()
+
+    def _spawn(self, index):
+        tasks = self._context.Queue()
+        results, sender = self._context.Pipe(duplex=False)
+        process = self._context.Process(
+            target=_worker_main, args=(index, self.model_dir, tasks, sender),
+            name=f"InferenceWorker-{index}", daemon=True,
+        )
+        process.start()
+        # Only the worker holds the sending end, so its death shows up as EOF
+        sender.close()
+        if self._results[index] is not None:
+            self._results[index].close()
+        self._workers[index] = process
+        self._task_queues[index] = tasks
+        self._results[index] = results
+        self._idle.append(index)
+
+    def _dispatch(self):
+        # Called with the lock held
+        while self._pending and self._idle:
+            task_id = self._pending.popleft()
+            index = self._idle.popleft()
+            shm, shape, _ = self._tasks[task_id]
+            self._busy[index] = task_id
+            self._task_queues[index].put((task_id, shm.name, shape))
+
+    def _finish(self, task_id, result=None, exception=None):
+        # Called with the lock held
+        shm, _, future = self._tasks.pop(task_id)
+        shm.close()
+        shm.unlink()
+        if exception is not None:
+            future.set_exception(exception)
+        else:
+            future.set_result(result)
+
+    def _run(self):
+        while True:
+            with self._lock:
+                readers = [results for results in self._results if results is not None]
+            # Returns after 0.5 s at most, so crashes are noticed on a busy pool too
+            for results in connection.wait(readers, timeout=0.5):
+                try:
+                    index, task_id, result, error = results.recv()
+                except (EOFError, OSError):
+                    # The worker is gone; _check_workers fails its task and replaces it
+                    with self._lock:
+                        if results in self._results:
+                            self._results[self._results.index(results)] = None
+                            results.close()
+                    continue
+                with self._lock:
+                    # Results of a task already failed as crashed are dropped
+                    if self._busy.get(index) == task_id:
+                        del self._busy[index]
+                        if not self._closed:
+                            self._idle.append(index)
+                    if task_id in self._tasks:
+                        self._finish(task_id, result, RuntimeError(error) if error else None)
+            with self._lock:
+                if self._closed and not self._busy:
+                    return
+                self._check_workers()
+
+    def _check_workers(self):
+        # Called with the lock held
+        for index, process in enumerate(self._workers):
+            # After close() workers exit on purpose, possibly with a result still
+            # in flight; after giving up nothing else will resolve their task
+            if process.is_alive() or (self._closed and self.failed is None):
+                continue
+            task_id = self._busy.pop(index, None)
+            if task_id is not None:
+                self._finish(task_id, exception=InferenceWorkerCrashed(
+                    f"Inference worker {index} exited with code {process.exitcode}"))
+            if self._closed:
+                continue
+            if index in self._idle:
+                self._idle.remove(index)
+            now = time.monotonic()
+            self._deaths.append(now)
+            while now - self._deaths[0] > RESTART_WINDOW:
+                self._deaths.popleft()
+            if len(self._deaths) > self.max_restarts:
+                self._give_up(f"{len(self._deaths)} inference workers exited within {RESTART_WINDOW:.0f} s; "
+                              f"the last with code {process.exitcode}")
+                return
+            self._spawn(index)
+            self.restarts += 1
+        self._dispatch()
+
+    def _give_up(self, reason):
+        # Called with the lock held. Workers still running finish their task and
+        # exit; tasks on dead ones and those not yet started fail now.
+        self.failed = reason
+        self._closed = True
+        for task_id in list(self._pending):
+            self._finish(task_id, exception=InferenceWorkerCrashed(reason))
+        self._pending.clear()
+        for index, process in enumerate(self._workers):
+            if not process.is_alive():
+                task_id = self._busy.pop(index, None)
+                if task_id is not None:
+                    self._finish(task_id, exception=InferenceWorkerCrashed(reason))
+            self._task_queues[index].put(None)
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_process_executor():
+    """Process-wide executor sized by the inference_processes setting"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessInferenceExecutor()
+    return _executor
@@ -0,0 +1,211 @@
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+from core.core import core
+
+MANIFEST_NAME = "manifest.json"
+
+
+class ModelNotAvailable(Exception):
+    """Raised when no weights are installed in the model directory"""
+
+
+class InferenceEngine:
+    """CPU-only breast image classifier.
+
+    Weights are stored as one .npy file per tensor next to a manifest.json and
+    opened with mmap_mode='r' the first time they are needed, so launching the
+    app costs nothing and several processes share the same weight pages.
+
+    The network average-pools the (N, H, W) input onto a fixed grid and runs a
+    small fully connected network over it:
+
+        x -> relu(x @ w1 + b1) -> sigmoid(h @ w2 + b2)
+
+    Timings are kept on the instance for monitoring:
+        load_time     seconds spent mapping the weights (None until loaded)
+        warmup_time   seconds spent in warm_up() (None until warmed up)
+        last_latency  seconds taken by the last predict() call
+        call_count    number of predict() calls
+        total_latency sum of predict() latencies
+    """
+
+    unavailable_message = "No AI model is installed."
+
+    def __init__(self, model_dir=None):
+        self.model_dir = model_dir or core()["model_dir"]
+        self.manifest = None
+        self.weights = None
+        self._lock = threading.Lock()
+        # Separate from _lock, which is held for the whole of a first load
+        self._stats_lock = threading.Lock()
+
+        self.load_time = None
+        self.warmup_time = None
+        self.last_latency = None
+        self.call_count = 0
+        self.total_latency = 0.0
+
+    @property
+    def version(self):
+        self.load()
+        return self.manifest["version"]
+
+    @property
+    def input_size(self):
+        self.load()
+        return tuple(self.manifest["input_size"])
+
+    @property
+    def threshold(self):
+        self.load()
+        return self.manifest.get("threshold", 0.5)
+
+    @property
+    def is_loaded(self):
+        return self.weights is not None
+
+    @property
+    def avg_latency(self):
+        with self._stats_lock:
+            return self.total_latency / self.call_count if self.call_count else None
+
+    def is_available(self):
+        return os.path.exists(os.path.join(self.model_dir, MANIFEST_NAME))
+
+    def load(self):
+        """Map the weight files into memory (only the first call does any work)"""
+        if self.weights is not None:
+            return
+        with self._lock:
+            if self.weights is not None:
+                return
+            start = time.perf_counter()
+            manifest_path = os.path.join(self.model_dir, MANIFEST_NAME)
+            if not os.path.exists(manifest_path):
+                raise ModelNotAvailable(f"No model installed in {self.model_dir}")
+            with open(manifest_path) as f:
+                manifest = json.load(f)
+            weights = {
+                name: np.load(os.path.join(self.model_dir, filename), mmap_mode="r")
+                for name, filename in manifest["tensors"].items()
+            }
+            self.manifest = manifest
+            self.weights = weights
+            self.load_time = time.perf_counter() - start
+
+    def warm_up(self):
+        """Fault in the weight pages and initialise BLAS with a dummy batch"""
+        start = time.perf_counter()
+        self.load()
+        self._forward(np.zeros((1,) + self.input_size, dtype=np.float32))
+        self.warmup_time = time.perf_counter() - start
+        return self.warmup_time
+
+    def predict(self, batch):
+        """Return the suspicion score for each image of an (N, H, W) batch"""
+        start = time.perf_counter()
+        self.load()
+        batch = np.asarray(batch, dtype=np.float32)
+        if batch.ndim == 2:
+            batch = batch[np.newaxis]
+        scores = self._forward(batch)
+
+        latency = time.perf_counter() - start
+        # predict() runs concurrently from the batching queue, executors and server threads
+        with self._stats_lock:
+            self.last_latency = latency
+            self.call_count += 1
+            self.total_latency += latency
+        return scores
+
+    def classify(self, batch):
+        """Like predict() but returns one result dict per image"""
+        scores = self.predict(batch)
+        return [self.result_for(score) for score in scores]
+
+    def result_for(self, score):
+        score = float(score)
+        return {
+            "status": "ok",
+            "score": score,
+            "label": "Suspicious" if score >= self.threshold else "Not suspicious",
+            "model_version": self.version,
+        }
+
+    def _forward(self, batch):
+        w = self.weights
+        features = pool_to_grid(batch, self.manifest["grid"]).reshape(len(batch), -1)
+        hidden = np.maximum(features @ w["w1"] + w["b1"], 0.0)
+        logits = (hidden @ w["w2"] + w["b2"]).reshape(-1)
+        return 1.0 / (1.0 + np.exp(-logits))
+
+
+def pool_to_grid(batch, grid):
+    """Average-pool an (N, H, W) batch onto an (N, grid, grid) array"""
+    n, h, w = batch.shape
+    bh, bw = h // grid, w // grid
+    if bh == 0 or bw == 0:
+        raise ValueError(f"Input {h}x{w} is smaller than the {grid}x{grid} grid")
+    cropped = batch[:, :bh * grid, :bw * grid]
+    return cropped.reshape(n, grid, bh, grid, bw).mean(axis=(2, 4))
+
+
+def save_weights(model_dir, weights, version, input_size=(256, 256), grid=32, threshold=0.5):
+    """Write weights in the layout InferenceEngine expects"""
+    os.makedirs(model_dir, exist_ok=True)
+    tensors = {}
+    for name, array in weights.items():
+        filename = f"{name}.npy"
+        np.save(os.path.join(model_dir, filename), np.ascontiguousarray(array, dtype=np.float32))
+        tensors[name] = filename
+    manifest = {
+        "version": version,
+        "input_size": list(input_size),
+        "grid": grid,
+        "threshold": threshold,
+        "tensors": tensors,
+    }
+    with open(os.path.join(model_dir, MANIFEST_NAME), "w") as f:
+        json.dump(manifest, f, indent=2)
+
+
+def init_random_weights(model_dir, hidden=64, grid=32, seed=0):
+    """Write randomly initialised weights, for development and testing only"""
+    rng = np.random.default_rng(seed)
+    features = grid * grid
+    weights = {
+        "w1": rng.normal(0, 1 / np.sqrt(features), (features, hidden)),
+        "b1": np.zeros(hidden),
+        "w2": rng.normal(0, 1 / np.sqrt(hidden), (hidden, 1)),
+        "b2": np.zeros(1),
+    }
+    save_weights(model_dir, weights, version=f"random-{seed}", grid=grid)
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_engine():
+    """Process-wide engine shared by the GUI, workers and batch tools"""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = InferenceEngine()
+    return _engine
+
+
+if __name__ == "__main__":
+    import sys
+    target = sys.argv[1] if len(sys.argv) > 1 else core()["model_dir"]
+    init_random_weights(target)
+    engine = InferenceEngine(target)
+    engine.warm_up()
+    print(f"Wrote random weights to {target} "
+          f"(load {engine.load_time * 1000:.1f} ms, warm-up {engine.warmup_time * 1000:.1f} ms)")
@@ -0,0 +1,184 @@
+"""Image preprocessing for the AI model.
+
+Every step works on a whole (N, H, W) batch with NumPy array operations, so
+the cost per image is a handful of vectorised passes rather than Python loops
+over pixels. Images of different shapes are grouped by shape and each group
+is processed as one batch.
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from PIL import Image
+
+from imaging.formats import is_dicom
+
+# Bump whenever the output of preprocess() changes for the same input
+PREPROCESS_VERSION = "3"
+
+# Parameters per imaging modality, as chosen in the "Image Type" combo box
+MODALITY_PARAMS = {
+    "Ultrasound": {
+        "window_percentiles": (1.0, 99.0),
+        "gamma": 1.0,
+        "equalize": 0.5,
+    },
+    "Mammography": {
+        "window_percentiles": (0.5, 99.5),
+        "gamma": 0.8,
+        "equalize": 0.3,
+    },
+    "MRI": {
+        "window_percentiles": (1.0, 99.5),
+        "gamma": 1.0,
+        "equalize": 0.0,
+    },
+}
+
+LUMA_WEIGHTS = np.array([0.299, 0.587, 0.114], dtype=np.float32)
+
+
+def modality_params(modality):
+    return MODALITY_PARAMS.get(modality, MODALITY_PARAMS["Ultrasound"])
+
+
+def decode_image(path, min_size=None):
+    """Decode an image file into an (H, W) or (H, W, C) array, keeping bit depth.
+
+    With min_size=(h, w), JPEG files are decoded at the smallest reduced
+    scale that is still at least that big, which is much cheaper than a full
+    decode followed by a resize.
+
+    DICOM pixel data is returned in modality units; windowing happens later
+    in window_normalize like for every other input.
+    """
+    if is_dicom(path):
+        from imaging.dicom import load_pixels
+        return load_pixels(path)
+    with Image.open(path) as img:
+        if min_size is not None:
+            img.draft(img.mode, (min_size[1], min_size[0]))
+        if img.mode in ("P", "LA", "PA", "CMYK", "YCbCr", "1"):
+            img = img.convert("RGB")
+        return np.asarray(img)
+
+
+def to_grayscale(batch):
+    """(N, H, W, C) or (N, H, W) -> (N, H, W) float32"""
+    batch = np.asarray(batch)
+    if batch.ndim == 4:
+        batch = batch[..., :3].astype(np.float32) @ LUMA_WEIGHTS
+    return batch.astype(np.float32, copy=False)
+
+
+def window_normalize(batch, low_pct, high_pct):
+    """Clip each image to its own percentile window and scale it to [0, 1]"""
+    n = len(batch)
+    flat = batch.reshape(n, -1)
+    low, high = np.percentile(flat, [low_pct, high_pct], axis=1)
+    low = low[:, None, None]
+    span = np.maximum(high - low.ravel(), 1e-6)[:, None, None]
+    return np.clip((batch - low) / span, 0.0, 1.0)
+
+
+def fit_size(shape, size):
+    """Largest (h, w) that fits in size while keeping the aspect ratio of shape"""
+    h, w = shape
+    scale = min(size[0] / h, size[1] / w)
+    return max(1, int(round(h * scale))), max(1, int(round(w * scale)))
+
+
+def resize_bilinear(batch, out_h, out_w):
+    """Bilinear resize of an (N, H, W) or (N, H, W, C) batch using gathered index maps"""
+    n, h, w = batch.shape[:3]
+    ys = np.clip((np.arange(out_h) + 0.5) * (h / out_h) - 0.5, 0, h - 1)
+    xs = np.clip((np.arange(out_w) + 0.5) * (w / out_w) - 0.5, 0, w - 1)
+    y0 = np.floor(ys).astype(np.intp)
+    x0 = np.floor(xs).astype(np.intp)
+    y1 = np.minimum(y0 + 1, h - 1)
+    x1 = np.minimum(x0 + 1, w - 1)
+    channels = (1,) * (batch.ndim - 3)
+    wy = (ys - y0).astype(np.float32).reshape((1, out_h, 1) + channels)
+    wx = (xs - x0).astype(np.float32).reshape((1, 1, out_w) + channels)
+
+    rows = batch[:, y0]
+    top = rows[:, :, x0] * (1 - wx) + rows[:, :, x1] * wx
+    rows = batch[:, y1]
+    bottom = rows[:, :, x0] * (1 - wx) + rows[:, :, x1] * wx
+    return top * (1 - wy) + bottom * wy
+
+
+def equalize(batch, strength, bins=256):
+    """Blend each image with its histogram-equalised version"""
+    if strength <= 0:
+        return batch
+    n = len(batch)
+    q = np.minimum((batch * bins).astype(np.intp), bins - 1).reshape(n, -1)
+    offsets = (np.arange(n) * bins)[:, None]
+    hist = np.bincount((q + offsets).ravel(), minlength=n * bins).reshape(n, bins)
+    cdf = np.cumsum(hist, axis=1).astype(np.float32)
+    cdf_min = cdf[:, :1]
+    cdf = (cdf - cdf_min) / np.maximum(cdf[:, -1:] - cdf_min, 1.0)
+    equalized = np.take_along_axis(cdf, q, axis=1).reshape(batch.shape)
+    return (1 - strength) * batch + strength * equalized
+
+
+def pad_to(batch, size):
+    """Centre an (N, h, w) batch on a zero canvas of the target size"""
+    n, h, w = batch.shape
+    out = np.zeros((n,) + tuple(size), dtype=np.float32)
+    top = (size[0] - h) // 2
+    left = (size[1] - w) // 2
+    out[:, top:top + h, left:left + w] = batch
+    return out
+
+
+def preprocess_batch(batch, modality, size=(256, 256)):
+    """Preprocess a batch of same-shaped images into an (N, *size) float32 array"""
+    params = modality_params(modality)
+    # Resize the raw pixels first so every later pass runs on the model-size
+    # array; a full-field mammogram is over a hundred times larger
+    out_h, out_w = fit_size(np.shape(batch)[1:3], size)
+    batch = resize_bilinear(np.asarray(batch), out_h, out_w)
+    batch = to_grayscale(batch)
+    batch = window_normalize(batch, *params["window_percentiles"])
+    if params["gamma"] != 1.0:
+        batch = np.power(batch, params["gamma"])
+    batch = equalize(batch, params["equalize"])
+    return pad_to(batch.astype(np.float32, copy=False), size)
+
+
+def preprocess(images, modality, size=(256, 256)):
+    """Preprocess a list of decoded images of any shapes.
+
+    Images sharing a shape are stacked and processed together; the result
+    keeps the input order.
+    """
+    out = np.empty((len(images),) + tuple(size), dtype=np.float32)
+    groups = {}
+    for i, image in enumerate(images):
+        groups.setdefault(np.shape(image), []).append(i)
+    for indices in groups.values():
+        out[indices] = preprocess_batch(np.stack([images[i] for i in indices]), modality, size)
+    return out
+
+
+def decode_images(paths, min_size=None, workers=None):
+    """Decode several files concurrently; PIL and pydicom release the GIL while decoding"""
+    if len(paths) <= 1:
+        return [decode_image(path, min_size) for path in paths]
+    with ThreadPoolExecutor(max_workers=workers or min(len(paths), os.cpu_count() or 1)) as pool:
+        return list(pool.map(lambda path: decode_image(path, min_size), paths))
+
+
+def preprocess_files(paths, modality, size=(256, 256)):
+    """Decode and preprocess image files"""
+    return preprocess(decode_images(paths, size), modality, size)
+
+
+def preprocess_file(path, modality, size=(256, 256)):
+    """Decode and preprocess a single image file into an (*size) array.
+
+    Top-level so it can be sent to a process pool.
+    """
+    return preprocess([decode_image(path, size)], modality, size)[0]
@@ -0,0 +1,136 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from ai.preprocess import PREPROCESS_VERSION
+from core.core import core
+from helper.file_hash import file_digest
+
+
+class ResultCache:
+    """Persistent, content-addressed cache of per-image inference results.
+
+    Entries are keyed by the SHA-256 of the image file, the modality, the
+    model version and PREPROCESS_VERSION, so a new model or preprocessing
+    change never serves stale scores, and a renamed or copied file still
+    hits. Results live in a small SQLite database (WAL mode), which makes the
+    cache safe to share between the GUI and any number of worker processes.
+
+    The cache is bounded to max_entries; every 64th put checks the size and
+    the least recently used entries are evicted once it has grown past that
+    by more than a tenth, so eviction runs rarely and in one statement.
+
+    Counters for this process: hits, misses and lookup_time (seconds spent
+    in get()), exposed as hit_rate and avg_lookup_ms.
+    """
+
+    def __init__(self, db_path=None, max_entries=None):
+        arch = core()
+        self.db_path = db_path or os.path.join(arch["cache_dir"], "ai_results.db")
+        self.max_entries = max_entries or arch["ai_result_cache_entries"]
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.lookup_time = 0.0
+        self._puts = 0
+
+        with self._conn() as conn:
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS results (
+                       key TEXT PRIMARY KEY,
+                       result TEXT NOT NULL,
+                       last_used REAL NOT NULL
+                   )"""
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_results_last_used ON results(last_used)")
+
+    def _conn(self):
+        # One connection per thread; SQLite handles the cross-process locking
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=5.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def key(image_path, modality, model_version):
+        return f"{file_digest(image_path)}:{modality}:{model_version}:{PREPROCESS_VERSION}"
+
+    def get(self, key):
+        """Cached result dict for key, or None"""
+        start = time.perf_counter()
+        conn = self._conn()
+        row = conn.execute("SELECT result FROM results WHERE key = ?", (key,)).fetchone()
+        if row is not None:
+            with conn:
+                conn.execute("UPDATE results SET last_used = ? WHERE key = ?", (time.time(), key))
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self.lookup_time += elapsed
+            if row is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return json.loads(row[0]) if row is not None else None
+
+    def put(self, key, result):
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO results (key, result, last_used) VALUES (?, ?, ?)",
+                (key, json.dumps(result), time.time()),
+            )
+            with self._lock:
+                self._puts += 1
+                check = self._puts % 64 == 0
+            if not check:
+                return
+            count = conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+            if count > self.max_entries * 1.1:
+                conn.execute(
+                    """DELETE FROM results WHERE key IN (
+                           SELECT key FROM results ORDER BY last_used LIMIT ?)""",
+                    (count - self.max_entries,),
+                )
+
+    def clear(self):
+        with self._conn() as conn:
+            conn.execute("DELETE FROM results")
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else None
+
+    @property
+    def avg_lookup_ms(self):
+        lookups = self.hits + self.misses
+        return self.lookup_time / lookups * 1000 if lookups else None
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate,
+            "avg_lookup_ms": self.avg_lookup_ms,
+        }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_result_cache():
+    """Process-wide ResultCache"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResultCache()
+    return _cache
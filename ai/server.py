@@ -0,0 +1,260 @@
+"""Local inference server.
+
+Keeps one warm InferenceEngine per machine (or per LAN box) and serves it to
+every open copy of the app over plain HTTP:
+
+    GET  /info      model version, input size, threshold and batching stats
+    POST /classify  body: an (N, H, W) float32 batch in .npy format
+                    reply: {"results": [classify() dict, ...]}
+
+Clients preprocess locally and send model-ready arrays. Requests from all
+connections go through one BatchingQueue, so concurrent clients share forward
+passes. Connections are HTTP/1.1 keep-alive; RemoteEngine keeps one open per
+thread.
+
+    python -m ai.server --port 8765
+    python -m ai.server --random-weights   # stand-in model for testing
+
+Point the app at it with the inference_server setting (or the
+BCD_INFERENCE_SERVER environment variable), e.g. http://127.0.0.1:8765.
+"""
+import argparse
+import http.client
+import io
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+import numpy as np
+
+from ai.batching import BatchingQueue
+from ai.model import InferenceEngine, init_random_weights
+
+DEFAULT_PORT = 8765
+# Room for the .npy header in front of a batch's data
+NPY_HEADER_MAX = 4096
+
+
+class InferenceRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        if self.path != "/info":
+            return self._send_json(404, {"error": f"Unknown path {self.path}"})
+        engine = self.server.engine
+        self._send_json(200, {
+            "version": engine.version,
+            "input_size": list(engine.input_size),
+            "threshold": engine.threshold,
+            "max_batch": self.server.batching.max_batch_size,
+            "batching": self.server.batching.stats(),
+        })
+
+    def do_POST(self):
+        # The body is checked before it is read; a rejected one is left unread,
+        # so the connection is closed rather than reused
+        if self.path != "/classify":
+            return self._send_json(404, {"error": f"Unknown path {self.path}"}, close=True)
+        try:
+            length = int(self.headers["Content-Length"])
+            if length < 0:
+                raise ValueError(length)
+        except (TypeError, ValueError):
+            return self._send_json(400, {"error": "Missing or invalid Content-Length"}, close=True)
+        if length > self.server.max_body:
+            return self._send_json(413, {
+                "error": f"Body of {length} bytes is over the {self.server.max_body} byte limit"}, close=True)
+        try:
+            batch = np.load(io.BytesIO(self.rfile.read(length)), allow_pickle=False)
+            if batch.ndim == 2:
+                batch = batch[np.newaxis]
+            if batch.shape[1:] != self.server.engine.input_size:
+                raise ValueError(f"Expected images of {self.server.engine.input_size}, got {batch.shape[1:]}")
+        except (ValueError, OSError, EOFError) as e:
+            return self._send_json(400, {"error": str(e)})
+        try:
+            results = self.server.batching.classify(batch)
+        except Exception as e:
+            return self._send_json(500, {"error": str(e)})
+        self._send_json(200, {"results": results})
+
+    def _send_json(self, status, payload, close=False):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        if close:
+            self.send_header("Connection", "close")
+            self.close_connection = True
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class InferenceServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, engine=None):
+        super().__init__(address, InferenceRequestHandler)
+        self.engine = engine or InferenceEngine()
+        self.engine.warm_up()
+        self.batching = BatchingQueue(self.engine)
+        # Largest /classify body: a full batch of float32 images
+        height, width = self.engine.input_size
+        self.max_body = self.batching.max_batch_size * height * width * 4 + NPY_HEADER_MAX
+
+    def server_close(self):
+        super().server_close()
+        self.batching.close()
+
+
+def start_server(host="127.0.0.1", port=0, engine=None):
+    """Serve in a background thread; returns the server (server_address has the real port)"""
+    server = InferenceServer((host, port), engine)
+    threading.Thread(target=server.serve_forever, name="InferenceServer", daemon=True).start()
+    return server
+
+
+class RemoteEngine:
+    """Client for the inference server with the parts of the InferenceEngine
+    interface that ai.analysis uses.
+
+    Each thread keeps its own keep-alive connection; a request that fails on
+    a connection the server has since closed is retried once on a new one.
+    """
+
+    unavailable_message = "The inference server is not reachable."
+
+    def __init__(self, url, timeout=30.0):
+        parts = urlsplit(url if "://" in url else f"http://{url}")
+        self.url = url
+        self.host = parts.hostname or "127.0.0.1"
+        self.port = parts.port or DEFAULT_PORT
+        self.timeout = timeout
+        self._local = threading.local()
+        self._info = None
+        self.load_time = None
+        self.warmup_time = None
+        self.last_latency = None
+
+    def _request(self, method, path, body=None, headers=None):
+        for attempt in range(2):
+            conn = getattr(self._local, "conn", None)
+            if conn is None:
+                conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+                self._local.conn = conn
+            try:
+                conn.request(method, path, body=body, headers=headers or {})
+                response = conn.getresponse()
+                payload = json.loads(response.read())
+            except (http.client.HTTPException, ConnectionError):
+                conn.close()
+                self._local.conn = None
+                # The server may have restarted with another model
+                self._info = None
+                if attempt:
+                    raise
+                continue
+            except OSError:
+                conn.close()
+                self._local.conn = None
+                raise
+            if response.status != 200:
+                raise RuntimeError(payload.get("error", f"HTTP {response.status}"))
+            return payload
+
+    def info(self):
+        if self._info is None:
+            self._info = self._request("GET", "/info")
+        return self._info
+
+    def is_available(self):
+        # Unreachable, an error reply, or something that isn't the inference server
+        try:
+            self.info()
+        except (OSError, http.client.HTTPException, RuntimeError, ValueError):
+            return False
+        return True
+
+    def load(self):
+        self.info()
+
+    def warm_up(self):
+        """Open the connection ahead of the first analysis"""
+        start = time.perf_counter()
+        self._info = None
+        self.info()
+        # Nothing is loaded locally; both timings are the round trip
+        self.load_time = self.warmup_time = time.perf_counter() - start
+        return self.warmup_time
+
+    @property
+    def version(self):
+        return self.info()["version"]
+
+    @property
+    def input_size(self):
+        return tuple(self.info()["input_size"])
+
+    @property
+    def threshold(self):
+        return self.info()["threshold"]
+
+    def classify(self, batch):
+        start = time.perf_counter()
+        batch = np.ascontiguousarray(batch, dtype=np.float32)
+        # The server turns away requests of more than one of its batches
+        size = self.info().get("max_batch") or max(len(batch), 1)
+        results = []
+        for first in range(0, len(batch), size):
+            buffer = io.BytesIO()
+            np.save(buffer, batch[first:first + size], allow_pickle=False)
+            payload = self._request("POST", "/classify", buffer.getvalue(),
+                                    {"Content-Type": "application/octet-stream"})
+            results.extend(payload["results"])
+        self.last_latency = time.perf_counter() - start
+        return results
+
+
+_remote = {}
+_remote_lock = threading.Lock()
+
+
+def get_remote_engine(url):
+    """Shared client per server URL"""
+    with _remote_lock:
+        if url not in _remote:
+            _remote[url] = RemoteEngine(url)
+        return _remote[url]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local inference server")
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on (0.0.0.0 for the LAN)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--model-dir", default=None, help="weights directory (default: model_dir setting)")
+    parser.add_argument("--random-weights", action="store_true",
+                        help="serve freshly written random weights (testing only)")
+    args = parser.parse_args(argv)
+
+    if args.random_weights:
+        import tempfile
+        args.model_dir = tempfile.mkdtemp(prefix="bcd-weights-")
+        init_random_weights(args.model_dir)
+
+    server = InferenceServer((args.host, args.port), InferenceEngine(args.model_dir))
+    print(f"Serving model {server.engine.version} on http://{args.host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+"""Headless batch screening.
+
+Reads a JSONL file of screening records shaped like
+BreastScreeningApp.collect_summary_data() output and runs each one through
+
+    image load + preprocessing -> AI inference -> PDF report
+
+Stages are connected by bounded queues so a huge intake file never piles up in
+memory. Preprocessing and PDF building run in a process pool. Inference runs
+batched in this process. One JSON result line per record is written to
+results.jsonl in the output directory.
+
+    python batch.py records.jsonl --out reports/ --workers 8
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import queue
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from ai.analysis import combine_results
+from ai.model import get_engine
+from ai.preprocess import preprocess_file
+from ai.result_cache import get_result_cache
+from imaging.formats import image_paths
+from report.pdf import build_report_timed
+
+DONE = object()
+
+
+def read_records(path):
+    """Yield (line_no, record, error) for each non-empty line of a JSONL file"""
+    with open(path, encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield line_no, None, f"invalid JSON: {e}"
+                continue
+            if isinstance(record, dict):
+                yield line_no, record, None
+            else:
+                yield line_no, None, "record is not a JSON object"
+
+
+def report_path_for(out_dir, line_no, record):
+    patient_id = (record.get("patient_info") or {}).get("Patient ID")
+    name = re.sub(r"[^A-Za-z0-9_.-]", "_", patient_id) if patient_id else f"line{line_no}"
+    return os.path.join(out_dir, f"Report_{name}.pdf")
+
+
+def intake_stage(records_path, pool, engine, out_q):
+    """Read records and queue image load + preprocessing in the process pool"""
+    use_model = engine.is_available()
+    size = engine.input_size if use_model else None
+    cache = get_result_cache()
+    try:
+        for line_no, record, error in read_records(records_path):
+            item = {"line": line_no, "record": record, "error": error, "futures": {}, "results": []}
+            if error is None and use_model:
+                imaging = record.get("imaging") or {}
+                modality = imaging.get("Image Type")
+                try:
+                    # Only images without a cached result are preprocessed
+                    for i, path in enumerate(image_paths(imaging)):
+                        key = cache.key(path, modality, engine.version)
+                        result = cache.get(key)
+                        item["results"].append(result)
+                        if result is None:
+                            item["futures"][i] = (key, pool.submit(preprocess_file, path, modality, size))
+                except OSError as e:
+                    item["error"] = f"image: {e}"
+            out_q.put(item)
+    finally:
+        out_q.put(DONE)
+
+
+def inference_stage(in_q, out_q, pool, engine, out_dir, batch_size):
+    """Gather preprocessed images into batches, classify them and queue the PDFs"""
+    cache = get_result_cache()
+    try:
+        finished = False
+        while not finished:
+            batch = [in_q.get()]
+            while len(batch) < batch_size and batch[-1] is not DONE:
+                try:
+                    batch.append(in_q.get_nowait())
+                except queue.Empty:
+                    break
+            if batch[-1] is DONE:
+                finished = True
+                batch.pop()
+
+            # Every uncached image of every record in the batch goes through one forward pass
+            arrays, owners = [], []
+            for item in batch:
+                futures = item.pop("futures")
+                if item["error"] is not None:
+                    continue
+                try:
+                    item_arrays = [(i, key, future.result()) for i, (key, future) in futures.items()]
+                except Exception as e:
+                    item["error"] = f"image: {e}"
+                    continue
+                for i, key, array in item_arrays:
+                    arrays.append(array)
+                    owners.append((item, i, key))
+
+            if arrays:
+                try:
+                    results = engine.classify(np.stack(arrays))
+                except Exception as e:
+                    for item, _, _ in owners:
+                        item["error"] = f"inference: {e}"
+                else:
+                    for (item, i, key), result in zip(owners, results):
+                        cache.put(key, result)
+                        item["results"][i] = result
+
+            for item in batch:
+                item_results = item.pop("results")
+                if item["error"] is None and item_results:
+                    paths = image_paths(item["record"].get("imaging") or {})
+                    for path, result in zip(paths, item_results):
+                        result["path"] = path
+                    item["record"]["ai_analysis"] = combine_results(item_results)
+
+            for item in batch:
+                if item["error"] is None:
+                    item["report"] = report_path_for(out_dir, item["line"], item["record"])
+                    item["future"] = pool.submit(build_report_timed, item["record"], item["report"])
+                out_q.put(item)
+    finally:
+        out_q.put(DONE)
+
+
+def run_batch(records_path, out_dir, workers=None, queue_size=64, batch_size=16, log=print):
+    """Run the whole pipeline and return (ok_count, error_count)"""
+    os.makedirs(out_dir, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+    engine = get_engine()
+    if not engine.is_available():
+        log("No AI model installed; reports will be built without AI results.")
+
+    preprocessed_q = queue.Queue(maxsize=queue_size)
+    report_q = queue.Queue(maxsize=queue_size)
+    ok = failed = 0
+    start = time.perf_counter()
+
+    # spawn rather than fork: this process runs threads while workers start
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool, \
+            open(os.path.join(out_dir, "results.jsonl"), "w", encoding="utf-8") as results:
+        threads = [
+            threading.Thread(target=intake_stage, args=(records_path, pool, engine, preprocessed_q), daemon=True),
+            threading.Thread(target=inference_stage,
+                             args=(preprocessed_q, report_q, pool, engine, out_dir, batch_size), daemon=True),
+        ]
+        for t in threads:
+            t.start()
+
+        while True:
+            item = report_q.get()
+            if item is DONE:
+                break
+            future = item.pop("future", None)
+            if future is not None:
+                try:
+                    built = future.result()
+                    item["report_seconds"] = built["seconds"]
+                    if built["error"]:
+                        item["error"] = f"report: {built['error']}"
+                except Exception as e:
+                    item["error"] = f"report: {e}"
+
+            record = item["record"] or {}
+            results.write(json.dumps({
+                "line": item["line"],
+                "patient_id": (record.get("patient_info") or {}).get("Patient ID"),
+                "status": "error" if item["error"] else "ok",
+                "error": item["error"],
+                "report": item.get("report") if not item["error"] else None,
+                "report_seconds": item.get("report_seconds"),
+                "ai_analysis": record.get("ai_analysis"),
+            }) + "\n")
+            if item["error"]:
+                failed += 1
+            else:
+                ok += 1
+            if (ok + failed) % 100 == 0:
+                elapsed = time.perf_counter() - start
+                log(f"{ok + failed} records ({(ok + failed) / elapsed:.1f}/s), {failed} failed")
+
+        for t in threads:
+            t.join()
+
+    elapsed = time.perf_counter() - start
+    log(f"Done: {ok} reports, {failed} failed in {elapsed:.1f}s")
+    cache = get_result_cache()
+    if cache.hit_rate is not None:
+        log(f"AI result cache: {cache.hits} hits, {cache.misses} misses "
+            f"({cache.hit_rate:.0%}), {cache.avg_lookup_ms:.2f} ms per lookup")
+    return ok, failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless batch breast screening")
+    parser.add_argument("records", help="JSONL file, one collect_summary_data() record per line")
+    parser.add_argument("--out", default="reports", help="output directory for PDFs and results.jsonl")
+    parser.add_argument("--workers", type=int, default=None, help="process pool size (default: all cores)")
+    parser.add_argument("--queue-size", type=int, default=64, help="bound of the queues between stages")
+    parser.add_argument("--batch-size", type=int, default=16, help="images per inference batch")
+    args = parser.parse_args(argv)
+
+    ok, failed = run_batch(args.records, args.out, args.workers, args.queue_size, args.batch_size)
+    return 1 if failed and not ok else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
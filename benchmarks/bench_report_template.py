@@ -0,0 +1,50 @@
+"""Micro-benchmark: per-report cost with and without the cached ReportTemplate.
+
+    python benchmarks/bench_report_template.py [reports]
+"""
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from report.pdf import ReportTemplate, build_report, get_template
+
+SUMMARY = {
+    "patient_info": {
+        "Patient ID": "BC-20250101-0001",
+        "Name/Code": "Bench Patient",
+        "Date of Birth": "1985-01-01",
+        "Age": "40",
+        "Sex": "Female",
+        "Menopausal Status": "Pre-menopause",
+        "Contact": "Not provided",
+    },
+    "visit_info": {"Study ID": "ST-1", "Study Date": "2025-01-01 09:00"},
+    "findings": {
+        "Right Breast Findings": "Duct ectasia, Skin thickening",
+        "Left Breast Findings": "None",
+    },
+    "indicators": ["Previous examination available"],
+    "imaging": {"Image Type": "Ultrasound", "path": None},
+}
+
+
+def bench(reports, fresh_template):
+    start = time.perf_counter()
+    for _ in range(reports):
+        template = ReportTemplate() if fresh_template else get_template()
+        build_report(SUMMARY, io.BytesIO(), template=template)
+    return (time.perf_counter() - start) / reports * 1000
+
+
+if __name__ == "__main__":
+    reports = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    bench(5, True)  # warm up imports and font caches
+    uncached = bench(reports, True)
+    cached = bench(reports, False)
+    print(f"rebuilt template per report: {uncached:.2f} ms/report")
+    print(f"cached template:             {cached:.2f} ms/report")
+    print(f"saving:                      {uncached - cached:.2f} ms/report "
+          f"({(uncached - cached) / uncached * 100:.0f}%)")
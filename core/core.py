@@ -1,9 +1,42 @@
+import os
+
+
 def core():
     return {
         "appname":"Breast Cancer Diagnosis",
         "version":"1.0.0",
         "icon":"./assets/Simbolo-Laco-Outubro-Rosa-PNG.png",
         "background_image":"./assets/a-woman-with-a-pink-ribbon-on-her-chest-is-a-symbol-of-the-fight-against-breast-cancer-cancer-prevention-concept-flat-illustration-vector.jpg",
+        "model_dir":"./ai/weights",
+        "data_dir":os.path.join(os.path.expanduser("~"), ".bcd"),
+        "cache_dir":os.path.join(os.path.expanduser("~"), ".bcd", "cache"),
+        "thumbnail_cache_mb":512,
+        "thumbnail_memory_mb":64,
+        # Tile pyramids of opened images, least recently viewed deleted first
+        "pyramid_cache_mb":2048,
+        # Single-image requests are gathered into batches of up to this size,
+        # waiting at most this long for the batch to fill
+        "inference_max_batch":16,
+        "inference_max_wait_ms":10,
+        # "thread" runs the model in the app process, "process" in a pool of
+        # inference_processes workers (0 = one per core)
+        "inference_executor":"thread",
+        "inference_processes":0,
+        # Worker restarts allowed per minute before the pool is given up and
+        # the model runs in-process instead
+        "inference_worker_restarts":5,
+        # URL of a shared inference server (python -m ai.server); empty runs the model in-process
+        "inference_server":os.environ.get("BCD_INFERENCE_SERVER", ""),
+        # Per-image AI results, keyed by image content + model/preprocessing version
+        "ai_result_cache_entries":100000,
+        "database":os.path.join(os.path.expanduser("~"), ".bcd", "screening.db"),
+        # Images embedded in PDF reports are resampled to this resolution
+        "report_image_dpi":150,
+        "report_image_encoding":{
+            "Ultrasound":{"format":"JPEG", "quality":85},
+            "Mammography":{"format":"PNG"},
+            "MRI":{"format":"JPEG", "quality":90},
+        },
         "description":"A core module for breast cancer diagnosis using machine learning.",
         "developed_by":"Jimma University Incubation Center Team",
         "Special Developers":[
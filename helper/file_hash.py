@@ -0,0 +1,38 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+_CHUNK_SIZE = 1024 * 1024
+# Recently hashed files; a long batch session would otherwise keep every one
+_MAX_DIGESTS = 4096
+_digests = OrderedDict()
+_lock = threading.Lock()
+
+
+def file_digest(path):
+    """SHA-256 hex digest of a file's content.
+
+    Results for the most recently used files are remembered per (path, size,
+    mtime) so re-hashing an unchanged 50 MB mammogram is free.
+    """
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    with _lock:
+        digest = _digests.get(key)
+        if digest is not None:
+            _digests.move_to_end(key)
+    if digest is not None:
+        return digest
+
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_CHUNK_SIZE), b""):
+            h.update(chunk)
+    digest = h.hexdigest()
+    with _lock:
+        _digests[key] = digest
+        _digests.move_to_end(key)
+        while len(_digests) > _MAX_DIGESTS:
+            _digests.popitem(last=False)
+    return digest
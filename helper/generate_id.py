@@ -1,8 +1,103 @@
-import random
+import os
 import string
+import threading
+from contextlib import contextmanager
 from datetime import datetime
 
+from core.core import core
+
+ALPHABET = string.digits + string.ascii_uppercase
+SUFFIX_LENGTH = 4
+MAX_PER_DAY = len(ALPHABET) ** SUFFIX_LENGTH   # 1,679,616 IDs per prefix per day
+
+if os.name == "nt":
+    import msvcrt
+
+    @contextmanager
+    def _locked(f):
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+else:
+    import fcntl
+
+    @contextmanager
+    def _locked(f):
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def encode_sequence(n):
+    """0 -> '0000', 35 -> '000Z', 36 -> '0010'"""
+    chars = []
+    for _ in range(SUFFIX_LENGTH):
+        n, rem = divmod(n, len(ALPHABET))
+        chars.append(ALPHABET[rem])
+    return "".join(reversed(chars))
+
+
+class PatientIdAllocator:
+    """Hands out unique BC-YYYYMMDD-XXXX IDs.
+
+    Uniqueness comes from a per-day counter persisted in a small file under
+    the data directory. A process reserves a block of block_size numbers at
+    a time while holding an OS file lock, then serves IDs from that block
+    from memory under a thread lock. So IDs are unique across threads and
+    processes on the machine, and most calls never touch the disk. IDs left
+    unused in a block when a process exits are simply skipped.
+    """
+
+    def __init__(self, prefix="BC", state_dir=None, block_size=64):
+        self.prefix = prefix
+        self.state_dir = state_dir or os.path.join(core()["data_dir"], "ids")
+        self.block_size = block_size
+        self._lock = threading.Lock()
+        self._day = None
+        self._next = 0
+        self._end = 0
+
+    def _reserve_block(self, day):
+        os.makedirs(self.state_dir, exist_ok=True)
+        path = os.path.join(self.state_dir, f"{self.prefix}-{day}.seq")
+        with open(path, "a+b") as f:
+            with _locked(f):
+                f.seek(0)
+                start = int(f.read() or 0)
+                if start >= MAX_PER_DAY:
+                    raise RuntimeError(f"Patient ID space for {self.prefix}-{day} is exhausted")
+                end = min(start + self.block_size, MAX_PER_DAY)
+                f.seek(0)
+                f.truncate()
+                f.write(str(end).encode())
+                f.flush()
+                os.fsync(f.fileno())
+        return start, end
+
+    def next_id(self):
+        day = datetime.now().strftime("%Y%m%d")
+        with self._lock:
+            if day != self._day or self._next >= self._end:
+                self._next, self._end = self._reserve_block(day)
+                self._day = day
+            n = self._next
+            self._next += 1
+        return f"{self.prefix}-{day}-{encode_sequence(n)}"
+
+
+_allocators = {}
+_allocators_lock = threading.Lock()
+
+
 def generate_patient_id(prefix="BC"):
-    date_part = datetime.now().strftime("%Y%m%d")
-    random_part = ''.join(random.choices(string.ascii_uppercase + string.digits, k=4))
-    return f"{prefix}-{date_part}-{random_part}"
+    with _allocators_lock:
+        allocator = _allocators.get(prefix)
+        if allocator is None:
+            allocator = _allocators[prefix] = PatientIdAllocator(prefix)
+    return allocator.next_id()
@@ -0,0 +1,52 @@
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+# Set BCD_STARTUP_TIMING=1 to print a table of startup phases to stderr
+ENABLED = bool(os.environ.get("BCD_STARTUP_TIMING"))
+
+_start = time.perf_counter()
+_phases = []
+_lock = threading.Lock()
+
+
+def _record(name, started, ended):
+    with _lock:
+        _phases.append((name, started - _start, ended - started, threading.current_thread().name))
+
+
+@contextmanager
+def phase(name):
+    """Time a block of startup work"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        _record(name, started, time.perf_counter())
+
+
+def mark(name):
+    """Record a point in time (a zero-length phase)"""
+    now = time.perf_counter()
+    _record(name, now, now)
+
+
+def timed_import(module_name):
+    """Import a module by name and record how long it took"""
+    import importlib
+    with phase(f"import {module_name}"):
+        return importlib.import_module(module_name)
+
+
+def report(stream=None):
+    """Print the phase table if BCD_STARTUP_TIMING is set"""
+    if not ENABLED:
+        return
+    stream = stream or sys.stderr
+    with _lock:
+        phases = sorted(_phases, key=lambda p: p[1])
+    print(f"{'phase':<36}{'start ms':>10}{'took ms':>10}  thread", file=stream)
+    for name, offset, duration, thread in phases:
+        print(f"{name:<36}{offset * 1000:>10.1f}{duration * 1000:>10.1f}  {thread}", file=stream)
@@ -0,0 +1,149 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pydicom
+from pydicom.errors import InvalidDicomError
+
+from imaging.formats import is_dicom
+
+# DICOM modality codes -> the names used in the "Imaging Modality"/"Image Type" combos
+MODALITIES = {"US": "Ultrasound", "MG": "Mammography", "MR": "MRI"}
+LATERALITIES = {"R": "Right", "L": "Left", "B": "Bilateral"}
+
+# Only these tags are parsed when reading headers
+HEADER_TAGS = [
+    "PatientID", "PatientName", "PatientBirthDate",
+    "StudyID", "AccessionNumber", "StudyInstanceUID", "StudyDate", "StudyTime",
+    "SeriesInstanceUID", "SOPInstanceUID", "InstanceNumber",
+    "Modality", "ImageLaterality", "Laterality", "ViewPosition",
+    "AcquisitionDate", "AcquisitionTime", "ContentDate", "ContentTime",
+    "WindowCenter", "WindowWidth", "Rows", "Columns",
+]
+
+
+def _first(value):
+    """Multi-valued window tags -> their first value"""
+    if isinstance(value, pydicom.multival.MultiValue):
+        return value[0] if len(value) else None
+    return value
+
+
+def _datetime(date, time):
+    """'20250131', '093015.000' -> '2025-01-31 09:30'"""
+    if not date or len(date) < 8:
+        return None
+    text = f"{date[:4]}-{date[4:6]}-{date[6:8]}"
+    if time and len(time) >= 4:
+        text += f" {time[:2]}:{time[2:4]}"
+    return text
+
+
+def read_header(path):
+    """Read the study metadata of a DICOM file without touching its pixel data"""
+    ds = pydicom.dcmread(path, stop_before_pixels=True, specific_tags=HEADER_TAGS)
+    get = lambda tag: ds.get(tag) or None
+    laterality = get("ImageLaterality") or get("Laterality")
+    image_date = (_datetime(get("AcquisitionDate"), get("AcquisitionTime"))
+                  or _datetime(get("ContentDate"), get("ContentTime"))
+                  or _datetime(get("StudyDate"), get("StudyTime")))
+    center = _first(get("WindowCenter"))
+    width = _first(get("WindowWidth"))
+    return {
+        "path": path,
+        "patient_id": get("PatientID"),
+        "patient_name": str(get("PatientName")) if get("PatientName") else None,
+        "study_id": get("StudyID") or get("AccessionNumber"),
+        "study_uid": get("StudyInstanceUID"),
+        "series_uid": get("SeriesInstanceUID"),
+        "instance_number": int(get("InstanceNumber")) if get("InstanceNumber") is not None else None,
+        "modality": MODALITIES.get(get("Modality"), get("Modality")),
+        "laterality": LATERALITIES.get(laterality, laterality),
+        "view": get("ViewPosition"),
+        "image_date": image_date,
+        "window_center": float(center) if center is not None else None,
+        "window_width": float(width) if width is not None else None,
+        "rows": get("Rows"),
+        "columns": get("Columns"),
+    }
+
+
+def _try_read_header(path):
+    try:
+        return read_header(path)
+    except (InvalidDicomError, OSError, ValueError):
+        return None
+
+
+def read_study_folder(folder, workers=8):
+    """Headers of every DICOM file under folder, ordered by series and instance.
+
+    Files are only opened far enough to parse HEADER_TAGS, on a thread pool,
+    so a folder of hundreds of images is indexed in well under a second.
+    """
+    paths = []
+    for root, _, files in os.walk(folder):
+        for name in files:
+            if name.lower().endswith(".dcm") or "." not in name:
+                paths.append(os.path.join(root, name))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        headers = [h for h in pool.map(_try_read_header, paths) if h is not None]
+    headers.sort(key=lambda h: (h["series_uid"] or "", h["instance_number"] or 0, h["path"]))
+    return headers
+
+
+def _pixels(ds):
+    pixels = ds.pixel_array
+    if int(ds.get("NumberOfFrames", 1) or 1) > 1:
+        pixels = pixels[0]
+    pixels = pixels.astype(np.float32)
+    slope = float(ds.get("RescaleSlope", 1) or 1)
+    intercept = float(ds.get("RescaleIntercept", 0) or 0)
+    if slope != 1 or intercept != 0:
+        pixels = pixels * slope + intercept
+    if ds.get("PhotometricInterpretation") == "MONOCHROME1":
+        pixels = pixels.max() - pixels + pixels.min()
+    return pixels
+
+
+def load_pixels(path):
+    """Decode the pixel data as float32 in modality units (rescale applied).
+
+    MONOCHROME1 images are inverted so that higher always means brighter.
+    Multi-frame files return their first frame.
+    """
+    return _pixels(pydicom.dcmread(path))
+
+
+def apply_window(pixels, center, width):
+    """Window/level as one array expression; works on a single image or a batch.
+
+    Returns float32 in [0, 1]. center/width may be scalars or per-image arrays
+    shaped to broadcast against pixels.
+    """
+    center = np.asarray(center, dtype=np.float32)
+    width = np.maximum(np.asarray(width, dtype=np.float32), 1.0)
+    low = center - width / 2
+    return np.clip((pixels - low) / width, 0.0, 1.0).astype(np.float32, copy=False)
+
+
+def load_display_array(path):
+    """uint8 image windowed with the file's own window, or its full range"""
+    ds = pydicom.dcmread(path)
+    pixels = _pixels(ds)
+    if pixels.ndim == 3:
+        # Colour ultrasound frames are already display-ready
+        return pixels.clip(0, 255).astype(np.uint8)
+    center = _first(ds.get("WindowCenter"))
+    width = _first(ds.get("WindowWidth"))
+    if center is None or width is None:
+        low, high = float(pixels.min()), float(pixels.max())
+        center, width = (low + high) / 2, high - low
+    return (apply_window(pixels, float(center), float(width)) * 255).astype(np.uint8)
+
+
+def load_headers(progress, is_cancelled, path):
+    """Worker entry point (see ui.workers.Worker): headers for a file or a study folder"""
+    if os.path.isdir(path):
+        return read_study_folder(path)
+    return [read_header(path)]
@@ -0,0 +1,21 @@
+# File dialog filters for everything the imaging page can open
+IMAGE_FILE_FILTER = "Images (*.png *.jpg *.jpeg *.bmp *.dcm);;DICOM Files (*.dcm);;All Files (*)"
+
+
+def is_dicom(path):
+    """True for files with the DICM preamble (or a .dcm extension)"""
+    if path.lower().endswith(".dcm"):
+        return True
+    try:
+        with open(path, "rb") as f:
+            f.seek(128)
+            return f.read(4) == b"DICM"
+    except OSError:
+        return False
+
+
+def image_paths(imaging):
+    """All image paths of a summary's imaging section; older records only carry 'path'"""
+    if imaging.get("paths"):
+        return list(imaging["paths"])
+    return [imaging["path"]] if imaging.get("path") else []
@@ -0,0 +1,225 @@
+import json
+import os
+import threading
+
+import numpy as np
+
+from core.core import core
+from helper.file_hash import file_digest
+from imaging.thumbnails import open_image, to_display_mode
+
+TILE_SIZE = 256
+PYRAMID_VERSION = 1
+
+
+class TilePyramid:
+    """Multi-resolution tile pyramid stored in one memory-mapped file.
+
+    Level 0 is full resolution and every following level halves both sides,
+    until the whole image fits in a single tile. Each level is stored as a
+    run of tile_size x tile_size x channels uint8 tiles in row-major tile
+    order. tile() returns a view into the mapping, so only the pages of the
+    tiles actually looked at are ever read from disk.
+    """
+
+    def __init__(self, index_path):
+        with open(index_path) as f:
+            self.index = json.load(f)
+        self.width = self.index["width"]
+        self.height = self.index["height"]
+        self.channels = self.index["channels"]
+        self.tile_size = self.index["tile_size"]
+        self.levels = self.index["levels"]
+        data_path = os.path.splitext(index_path)[0] + ".tiles"
+        total_tiles = sum(level["cols"] * level["rows"] for level in self.levels)
+        self._tiles = np.memmap(
+            data_path, dtype=np.uint8, mode="r",
+            shape=(total_tiles, self.tile_size, self.tile_size, self.channels),
+        )
+
+    @property
+    def level_count(self):
+        return len(self.levels)
+
+    def level_for_scale(self, scale):
+        """Coarsest level that still has at least one source pixel per screen pixel"""
+        level = 0
+        while level + 1 < self.level_count and 2 ** (level + 1) <= 1.0 / scale:
+            level += 1
+        return level
+
+    def tile(self, level, row, col):
+        """(h, w, channels) view of one tile, cropped at the image edge"""
+        info = self.levels[level]
+        tile = self._tiles[info["first_tile"] + row * info["cols"] + col]
+        h = min(self.tile_size, info["height"] - row * self.tile_size)
+        w = min(self.tile_size, info["width"] - col * self.tile_size)
+        return tile[:h, :w]
+
+
+def _downsample(array):
+    """Halve both sides with a 2x2 box filter (odd edges are replicated)"""
+    h, w = array.shape[:2]
+    if h % 2 or w % 2:
+        array = np.pad(array, ((0, h % 2), (0, w % 2), (0, 0)), mode="edge")
+    h, w, c = array.shape
+    pooled = array.reshape(h // 2, 2, w // 2, 2, c).astype(np.uint16).sum(axis=(1, 3))
+    return ((pooled + 2) // 4).astype(np.uint8)
+
+
+def _level_layout(width, height, tile_size):
+    """Size and tile run of every level, and the total number of tiles"""
+    levels = []
+    first_tile = 0
+    while True:
+        rows = -(-height // tile_size)
+        cols = -(-width // tile_size)
+        levels.append({"width": width, "height": height, "rows": rows, "cols": cols, "first_tile": first_tile})
+        first_tile += rows * cols
+        if rows == 1 and cols == 1:
+            return levels, first_tile
+        width, height = -(-width // 2), -(-height // 2)
+
+
+def _write_band(out, info, row, band, tile_size):
+    """Copy one row of tiles into place; the zero-filled file is the padding"""
+    h = band.shape[0]
+    first = info["first_tile"] + row * info["cols"]
+    for col in range(info["cols"]):
+        piece = band[:, col * tile_size:(col + 1) * tile_size]
+        out[first + col, :h, :piece.shape[1]] = piece
+
+
+def _write_levels(out, levels, bands, tile_size):
+    """Write every level from bands, an iterator over level 0 in runs of tile_size rows.
+
+    A run is written as soon as it is complete and its downsampled rows are
+    queued on the next level, which writes its own run once tile_size rows
+    have gathered, so at most about one run per level is held at a time.
+    """
+    queued = [[] for _ in levels]
+    written = [0] * len(levels)
+
+    def add(level, rows, last):
+        if rows is not None:
+            queued[level].append(rows)
+        buffered = sum(len(part) for part in queued[level])
+        while buffered >= tile_size or (last and buffered):
+            rows = np.concatenate(queued[level]) if len(queued[level]) > 1 else queued[level][0]
+            band, rest = rows[:tile_size], rows[tile_size:]
+            queued[level] = [rest] if len(rest) else []
+            buffered = len(rest)
+            _write_band(out, levels[level], written[level], band, tile_size)
+            written[level] += 1
+            if level + 1 < len(levels):
+                # Runs have an even height, so pairs of rows never straddle two of them
+                add(level + 1, _downsample(band), False)
+        if last and level + 1 < len(levels):
+            add(level + 1, None, True)
+
+    for band, last in bands:
+        add(0, band, last)
+
+
+def _source_bands(img, tile_size):
+    """(rows, last) runs of tile_size rows of a decoded image, as (h, w, c) arrays"""
+    width, height = img.size
+    for top in range(0, height, tile_size):
+        bottom = min(top + tile_size, height)
+        band = np.asarray(img.crop((0, top, width, bottom)))
+        if band.ndim == 2:
+            band = band[:, :, np.newaxis]
+        yield band, bottom == height
+
+
+def build_pyramid(image_path, index_path, tile_size=TILE_SIZE):
+    """Decode image_path once and write its tile pyramid next to index_path.
+
+    Both PIL and pydicom decode whole images, so the decoded source is held
+    while building, but nothing else of its size: the pyramid is produced in
+    runs of tile_size rows straight into the memory-mapped output.
+    """
+    with open_image(image_path) as img:
+        img = to_display_mode(img)
+        width, height = img.size
+        channels = len(img.getbands())
+        levels, total_tiles = _level_layout(width, height, tile_size)
+
+        data_path = os.path.splitext(index_path)[0] + ".tiles"
+        tmp_data = f"{data_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        out = np.memmap(tmp_data, dtype=np.uint8, mode="w+",
+                        shape=(total_tiles, tile_size, tile_size, channels))
+        try:
+            _write_levels(out, levels, _source_bands(img, tile_size), tile_size)
+            out.flush()
+        finally:
+            del out
+    os.replace(tmp_data, data_path)
+
+    index = {
+        "version": PYRAMID_VERSION,
+        "width": width,
+        "height": height,
+        "channels": channels,
+        "tile_size": tile_size,
+        "levels": levels,
+    }
+    tmp_index = f"{index_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_index, "w") as f:
+        json.dump(index, f)
+    os.replace(tmp_index, index_path)
+
+
+def evict_pyramids(cache_dir, max_bytes, keep=None):
+    """Delete least recently used pyramids until the directory is at 90% of max_bytes.
+
+    A pyramid is its .json index and .tiles file, removed together; keep (an
+    index path) is never removed. Same policy as ThumbnailCache's disk tier:
+    get_pyramid refreshes an index's mtime on every hit.
+    """
+    pyramids = {}
+    for entry in os.scandir(cache_dir):
+        if entry.is_file() and not entry.name.endswith(".tmp"):
+            stat = entry.stat()
+            stem = os.path.splitext(entry.path)[0]
+            mtime, size = pyramids.get(stem, (0, 0))
+            pyramids[stem] = (max(mtime, stat.st_mtime), size + stat.st_size)
+    total = sum(size for _, size in pyramids.values())
+    if total <= max_bytes:
+        return
+    keep = keep and os.path.splitext(keep)[0]
+    for mtime, size, stem in sorted((mtime, size, stem) for stem, (mtime, size) in pyramids.items()):
+        if total <= max_bytes * 0.9:
+            break
+        if stem == keep:
+            continue
+        try:
+            # Index first, so a half-removed pyramid is rebuilt rather than opened
+            for ext in (".json", ".tiles"):
+                if os.path.exists(stem + ext):
+                    os.remove(stem + ext)
+            total -= size
+        except OSError:
+            # Still mapped by a viewer on Windows; try again after the next build
+            pass
+
+
+def get_pyramid(image_path, cache_dir=None, max_bytes=None):
+    """Open the cached pyramid for image_path, building it on first use"""
+    config = core()
+    cache_dir = cache_dir or os.path.join(config["cache_dir"], "pyramids")
+    max_bytes = max_bytes or config["pyramid_cache_mb"] * 1024 * 1024
+    os.makedirs(cache_dir, exist_ok=True)
+    index_path = os.path.join(cache_dir, f"{file_digest(image_path)}_v{PYRAMID_VERSION}.json")
+    try:
+        os.utime(index_path)
+    except OSError:
+        build_pyramid(image_path, index_path)
+        evict_pyramids(cache_dir, max_bytes, keep=index_path)
+    return TilePyramid(index_path)
+
+
+def load_pyramid(progress, is_cancelled, image_path):
+    """Worker entry point (see ui.workers.Worker)"""
+    progress(10, "Preparing image tiles...")
+    return get_pyramid(image_path)
@@ -0,0 +1,215 @@
+import io
+import os
+import threading
+from collections import OrderedDict
+
+from PIL import Image
+
+from core.core import core
+from helper.file_hash import file_digest
+from imaging.formats import is_dicom
+
+
+def to_display_mode(img):
+    """Convert any decoded image (including 16-bit grayscale) to L or RGB"""
+    if img.mode in ("L", "RGB"):
+        return img
+    if img.mode.startswith("I"):
+        # 16/32-bit grayscale: scale the used range down to 8 bits
+        img = img.convert("I")
+        low, high = img.getextrema()
+        scale = 255.0 / max(high - low, 1)
+        return img.point(lambda v: (v - low) * scale).convert("L")
+    if img.mode == "F":
+        low, high = img.getextrema()
+        scale = 255.0 / max(high - low, 1e-6)
+        return img.point(lambda v: (v - low) * scale).convert("L")
+    return img.convert("RGB")
+
+
+def open_image(image_path):
+    """PIL image for any supported file; DICOM is windowed to 8 bits first"""
+    if is_dicom(image_path):
+        from imaging.dicom import load_display_array
+        return Image.fromarray(load_display_array(image_path))
+    return Image.open(image_path)
+
+
+def make_thumbnail(image_path, size, fmt="JPEG", quality=90):
+    """Decode image_path at reduced size and encode a thumbnail that fits in size"""
+    with open_image(image_path) as img:
+        # Let the JPEG decoder skip detail we are about to throw away, in the
+        # file's own mode so colour (including CMYK) thumbnails stay in colour
+        img.draft(img.mode, size)
+        img = to_display_mode(img)
+        img.thumbnail(size, Image.LANCZOS)
+        out = io.BytesIO()
+        if fmt == "JPEG":
+            img.save(out, "JPEG", quality=quality or 85, optimize=True)
+        else:
+            img.save(out, fmt, optimize=True)
+        return out.getvalue()
+
+
+class ThumbnailCache:
+    """Two-tier cache of encoded thumbnails.
+
+    Keys are the SHA-256 of the source file plus the target size and encoding,
+    so a renamed or copied file still hits and an edited file never does.
+    The memory tier is an LRU bounded by total bytes. The disk tier is a
+    directory bounded by max_disk_bytes: every hit refreshes the file's mtime,
+    and the oldest files are deleted when the directory grows past the cap.
+    Writes go through a temp file and an atomic rename, so several processes
+    can share the directory.
+    """
+
+    def __init__(self, cache_dir=None, max_disk_bytes=None, max_memory_bytes=None):
+        config = core()
+        self.cache_dir = cache_dir or os.path.join(config["cache_dir"], "thumbnails")
+        self.max_disk_bytes = max_disk_bytes or config["thumbnail_cache_mb"] * 1024 * 1024
+        self.max_memory_bytes = max_memory_bytes or config["thumbnail_memory_mb"] * 1024 * 1024
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+        self._disk_bytes = None
+        self._lock = threading.Lock()
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def key(self, image_path, size, fmt="JPEG", quality=90):
+        ext = "jpg" if fmt == "JPEG" else fmt.lower()
+        return f"{file_digest(image_path)}_{size[0]}x{size[1]}_{fmt}{quality or ''}.{ext}"
+
+    def get_bytes(self, image_path, size, fmt="JPEG", quality=90):
+        """Encoded thumbnail bytes for image_path, generating them on a miss"""
+        key = self.key(image_path, size, fmt, quality)
+        data = self._memory_get(key)
+        if data is not None:
+            return data
+        path = os.path.join(self.cache_dir, key)
+        data = self._disk_get(path)
+        if data is None:
+            with self._lock:
+                self.misses += 1
+            data = make_thumbnail(image_path, size, fmt, quality)
+            self._disk_put(path, data)
+        self._memory_put(key, data)
+        return data
+
+    def get_path(self, image_path, size, fmt="JPEG", quality=90):
+        """Path of the thumbnail file on disk, for consumers that need a file"""
+        key = self.key(image_path, size, fmt, quality)
+        path = os.path.join(self.cache_dir, key)
+        if self._touch(path):
+            with self._lock:
+                self.disk_hits += 1
+            return path
+        with self._lock:
+            self.misses += 1
+        data = make_thumbnail(image_path, size, fmt, quality)
+        self._disk_put(path, data)
+        self._memory_put(key, data)
+        return path
+
+    def _memory_get(self, key):
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+            return data
+
+    def _memory_put(self, key, data):
+        with self._lock:
+            if key in self._memory:
+                return
+            self._memory[key] = data
+            self._memory_bytes += len(data)
+            while self._memory_bytes > self.max_memory_bytes and len(self._memory) > 1:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_bytes -= len(evicted)
+
+    def _touch(self, path):
+        try:
+            os.utime(path)
+            return True
+        except OSError:
+            return False
+
+    def _disk_get(self, path):
+        if not self._touch(path):
+            return None
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        with self._lock:
+            self.disk_hits += 1
+        return data
+
+    def _disk_put(self, path, data):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+        with self._lock:
+            if self._disk_bytes is None:
+                self._disk_bytes = self._scan()[1]
+            else:
+                self._disk_bytes += len(data)
+            over = self._disk_bytes > self.max_disk_bytes
+        if over:
+            self._evict(keep=path)
+
+    def _scan(self):
+        entries = []
+        total = 0
+        for entry in os.scandir(self.cache_dir):
+            if entry.is_file() and not entry.name.endswith(".tmp"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+        return entries, total
+
+    def _evict(self, keep=None):
+        """Delete least recently used files until the directory is at 90% of its cap.
+
+        keep is the file just written; it stays even if it alone is over the
+        cap, since the caller is about to use it.
+        """
+        entries, total = self._scan()
+        target = self.max_disk_bytes * 0.9
+        for _, size, path in sorted(entries):
+            if total <= target:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+        with self._lock:
+            self._disk_bytes = total
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_thumbnail_cache():
+    """Process-wide thumbnail cache"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ThumbnailCache()
+    return _cache
+
+
+def load_thumbnail(progress, is_cancelled, image_path, size):
+    """Worker entry point (see ui.workers.Worker): encoded thumbnail bytes"""
+    return get_thumbnail_cache().get_bytes(image_path, size)
@@ -1,35 +1,42 @@
+import logging
+import multiprocessing
 import sys
+from helper import startup
+
 from PyQt5.QtWidgets import (
     QApplication, QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
     QLineEdit, QDateEdit, QComboBox, QCheckBox, QTextEdit, QFrame, 
     QGroupBox, QGridLayout, QFileDialog, QStackedWidget, QScrollArea,
     QListWidget, QListWidgetItem, QDateTimeEdit, QTimeEdit, QButtonGroup,
-    QRadioButton, QSpinBox, QProgressBar, QMessageBox, QDialog, QFormLayout
+    QRadioButton, QSpinBox, QProgressBar, QMessageBox, QDialog, QFormLayout,
+    QSplashScreen, QCompleter
 )
 from PyQt5.QtGui import QFont, QPixmap, QIcon, QPalette, QColor, QTextCharFormat, QTextCursor,QBrush
-from PyQt5.QtCore import Qt, QDate, QDateTime, pyqtSignal, QFileInfo
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image, HRFlowable, Flowable
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.pagesizes import A4
-from reportlab.lib import colors
-from reportlab.lib.units import inch
-from reportlab.lib.colors import HexColor
+from PyQt5.QtCore import Qt, QDate, QDateTime, pyqtSignal, QFileInfo, QTimer, QStringListModel
 from PyQt5.QtWidgets import QFileDialog, QMessageBox
 from PyQt5.QtCore import QFileInfo
 
 from helper.generate_id import generate_patient_id
 from core.core import core
+from ui.workers import Worker, start_worker
+from ui.background import load_background
+from imaging.formats import IMAGE_FILE_FILTER, is_dicom, image_paths
+from records.store import RecordWriter, split_list, init_db, load_summary, connect as connect_store
+from records.search import search_patients, find_duplicates, patient_exists
+from records.fields import (
+    SEXES, MENOPAUSAL_STATUSES, MODALITIES, LATERALITIES, RIGHT_FINDINGS, LEFT_FINDINGS, INDICATORS
+)
+from ui.thumbnail_strip import ThumbnailStrip
 
-arch = core()
-patient_id = generate_patient_id()
+startup.mark("imports done")
 
+# reportlab and the AI stack (numpy, PIL) are only needed for reports and
+# analysis; they are imported on a background thread once the window is up
+DEFERRED_MODULES = ("report.pdf", "ai.analysis", "imaging.thumbnails")
+
+arch = core()
+logger = logging.getLogger(__name__)
 
-class HRGradient(HRFlowable):
-    """Custom horizontal line with gradient effect"""
-    def draw(self):
-        self.canv.setStrokeColor(HexColor("#e02793"))
-        self.canv.setLineWidth(2)
-        self.canv.line(0, 0, self.width, 0)
 
 class SummaryDialog(QDialog):
     def __init__(self, summary_data, parent=None):
@@ -79,6 +86,9 @@ class SummaryDialog(QDialog):
         """)
         
         self.summary_data = summary_data
+        self.ai_worker = None
+        self.report_worker = None
+        self.preview_worker = None
         self.init_ui()
         
     def init_ui(self):
@@ -160,11 +170,15 @@ class SummaryDialog(QDialog):
         self.report_btn = QPushButton("Generate Report")
         self.report_btn.clicked.connect(self.generate_pdf_report)
 
+        self.confirm_btn = QPushButton("Confirm & Submit")
+        self.confirm_btn.clicked.connect(self.accept)
+
         
         
         button_layout.addWidget(self.edit_btn)
         button_layout.addWidget(self.report_btn)
         button_layout.addStretch()
+        button_layout.addWidget(self.confirm_btn)
        
         layout.addLayout(button_layout)
         
@@ -173,26 +187,32 @@ class SummaryDialog(QDialog):
         """Helper to create the image preview and AI button"""
         # 1. Display text metadata first
         for key, value in data.items():
-            if key.lower() != 'path': # Don't show path as text
+            if key.lower() not in ('path', 'paths'): # Don't show paths as text
                 layout.addWidget(QLabel(f"<b>{key}:</b> {value}"))
 
         # 2. The 'Real' Image Preview
-        image_path = data.get('path') # Assume the dictionary has a 'path' key
-        image_label = QLabel()
-        image_label.setAlignment(Qt.AlignCenter)
-        image_label.setMinimumHeight(300)
-        image_label.setStyleSheet("border: 1px solid #ddd; background: #000; border-radius: 5px;")
+        paths = image_paths(data)
+        image_path = paths[0] if paths else None
+        self.preview_path = image_path
+        self.image_label = QLabel()
+        self.image_label.setAlignment(Qt.AlignCenter)
+        self.image_label.setMinimumHeight(300)
+        self.image_label.setStyleSheet("border: 1px solid #ddd; background: #000; border-radius: 5px;")
 
         if image_path and QFileInfo.exists(image_path):
-            pixmap = QPixmap(image_path)
-            # Scale image to fit while maintaining aspect ratio
-            scaled_pixmap = pixmap.scaled(600, 400, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-            image_label.setPixmap(scaled_pixmap)
+            self.show_preview(image_path)
         else:
-            image_label.setText("No Image Preview Available")
-            image_label.setStyleSheet("color: white; background: #333;")
+            self.image_label.setText("No Image Preview Available")
+            self.image_label.setStyleSheet("color: white; background: #333;")
+
+        layout.addWidget(self.image_label)
 
-        layout.addWidget(image_label)
+        # Studies with several images get a strip to switch the preview
+        if len(paths) > 1:
+            self.thumbnail_strip = ThumbnailStrip()
+            self.thumbnail_strip.set_paths(paths)
+            self.thumbnail_strip.image_selected.connect(self.show_preview)
+            layout.addWidget(self.thumbnail_strip)
 
         # 3. Run AI Analysis Button
         self.ai_btn = QPushButton("Run AI Analysis")
@@ -200,18 +220,151 @@ class SummaryDialog(QDialog):
         self.ai_btn.setCursor(Qt.PointingHandCursor)
         self.ai_btn.clicked.connect(self.on_run_ai_analysis)
         
+        self.viewer_btn = QPushButton("Open Full Resolution")
+        self.viewer_btn.setObjectName("editBtn")
+        self.viewer_btn.clicked.connect(lambda: self.open_image_viewer(self.preview_path))
+        self.viewer_btn.setVisible(bool(image_path and QFileInfo.exists(image_path)))
+
+        self.ai_cancel_btn = QPushButton("Cancel")
+        self.ai_cancel_btn.setObjectName("editBtn")
+        self.ai_cancel_btn.clicked.connect(self.on_cancel_ai_analysis)
+        self.ai_cancel_btn.setVisible(False)
+        
         # Center the AI button
         ai_btn_layout = QHBoxLayout()
         ai_btn_layout.addStretch()
+        ai_btn_layout.addWidget(self.viewer_btn)
         ai_btn_layout.addWidget(self.ai_btn)
+        ai_btn_layout.addWidget(self.ai_cancel_btn)
         ai_btn_layout.addStretch()
         layout.addLayout(ai_btn_layout)
 
+        # 4. Progress and result of the AI analysis
+        self.ai_progress = QProgressBar()
+        self.ai_progress.setRange(0, 100)
+        self.ai_progress.setVisible(False)
+        layout.addWidget(self.ai_progress)
+
+        self.ai_result_label = QLabel()
+        self.ai_result_label.setAlignment(Qt.AlignCenter)
+        self.ai_result_label.setWordWrap(True)
+        self.ai_result_label.setVisible(False)
+        layout.addWidget(self.ai_result_label)
+
+    def open_image_viewer(self, image_path):
+        ImageViewerDialog(image_path, self).exec_()
+
+    def show_preview(self, image_path):
+        # Preview comes from the thumbnail cache; decoding on a miss happens off the GUI thread
+        from imaging.thumbnails import load_thumbnail
+        self.preview_path = image_path
+        self.image_label.setText("Loading preview...")
+        self.preview_worker = Worker(load_thumbnail, image_path, (600, 400))
+        self.preview_worker.signals.result.connect(lambda data: self.on_preview_loaded(image_path, data))
+        self.preview_worker.signals.error.connect(lambda message: self.image_label.setText("No Image Preview Available"))
+        start_worker(self.preview_worker)
+
+    def on_preview_loaded(self, image_path, data):
+        # A later click may already have asked for another image
+        if image_path != self.preview_path:
+            return
+        pixmap = QPixmap()
+        if pixmap.loadFromData(data):
+            self.image_label.setPixmap(pixmap)
+        else:
+            self.image_label.setText("No Image Preview Available")
+
     def on_run_ai_analysis(self):
-        # Placeholder for AI logic
+        """Start the AI analysis on a worker thread so the dialog stays responsive"""
+        if self.ai_worker is not None:
+            return
+        imaging = self.summary_data.get("imaging", {})
+
         self.ai_btn.setText("Analyzing...")
         self.ai_btn.setEnabled(False)
-        print("Starting AI Analysis on image...")
+        self.ai_cancel_btn.setVisible(True)
+        self.ai_progress.setValue(0)
+        self.ai_progress.setVisible(True)
+        self.ai_result_label.setVisible(False)
+
+        from ai.analysis import analyze_image
+        self.ai_worker = Worker(analyze_image, image_paths(imaging), imaging.get("Image Type"))
+        self.ai_worker.signals.progress.connect(self.on_ai_progress)
+        self.ai_worker.signals.result.connect(self.on_ai_result)
+        self.ai_worker.signals.error.connect(self.on_ai_error)
+        self.ai_worker.signals.cancelled.connect(self.on_ai_cancelled)
+        self.ai_worker.signals.finished.connect(self.on_ai_finished)
+        start_worker(self.ai_worker)
+
+    def on_cancel_ai_analysis(self):
+        if self.ai_worker is not None:
+            self.ai_worker.cancel()
+            self.ai_cancel_btn.setEnabled(False)
+            self.ai_progress.setFormat("Cancelling...")
+
+    def on_ai_progress(self, percent, message):
+        self.ai_progress.setValue(percent)
+        self.ai_progress.setFormat(f"{message} %p%" if message else "%p%")
+
+    def on_ai_result(self, result):
+        self.summary_data["ai_analysis"] = result
+        self.show_ai_result(result)
+
+    def show_ai_result(self, result):
+        """Post the analysis result back into the imaging section"""
+        if result.get("status") == "unavailable":
+            text = result.get("message", "AI analysis unavailable")
+            style = "color: #856404; background-color: #fff3cd;"
+        else:
+            text = f"<b>AI Result:</b> {result.get('label', 'Unknown')}"
+            if "score" in result:
+                text += f" (score {result['score']:.2f})"
+            images = result.get("images", [])
+            if len(images) > 1:
+                for image in images:
+                    name = QFileInfo(image.get("path") or "").fileName()
+                    if image.get("status") == "ok":
+                        text += f"<br>{name}: {image['label']} ({image['score']:.2f})"
+                    else:
+                        text += f"<br>{name}: not analysed"
+            style = "color: #212529; background-color: #e9ecef;"
+        self.ai_result_label.setText(text)
+        self.ai_result_label.setStyleSheet(style + " padding: 10px; border-radius: 5px;")
+        self.ai_result_label.setVisible(True)
+
+    def on_ai_error(self, message):
+        self.ai_result_label.setText(f"AI analysis failed: {message}")
+        self.ai_result_label.setStyleSheet("color: #721c24; background-color: #f8d7da; padding: 10px; border-radius: 5px;")
+        self.ai_result_label.setVisible(True)
+
+    def on_ai_cancelled(self):
+        self.ai_result_label.setText("AI analysis cancelled.")
+        self.ai_result_label.setStyleSheet("color: #495057; padding: 10px;")
+        self.ai_result_label.setVisible(True)
+
+    def on_ai_finished(self):
+        self.ai_worker = None
+        self.ai_btn.setText("Run AI Analysis")
+        self.ai_btn.setEnabled(True)
+        self.ai_cancel_btn.setVisible(False)
+        self.ai_cancel_btn.setEnabled(True)
+        self.ai_progress.setVisible(False)
+
+    def done(self, result):
+        # Don't leave an analysis running for a dialog that is going away
+        if self.ai_worker is not None:
+            self.ai_worker.cancel()
+        if self.report_worker is not None:
+            # The PDF is still written; its outcome is shown over the main window,
+            # never through the slots of this dialog
+            signals = self.report_worker.signals
+            for signal in (signals.result, signals.error, signals.finished):
+                signal.disconnect()
+            parent = self.parentWidget()
+            signals.result.connect(lambda _: QMessageBox.information(parent, "Success", "PDF report generated!"))
+            signals.error.connect(
+                lambda message: QMessageBox.critical(parent, "Error", f"Failed to generate PDF: {message}"))
+        super().done(result)
             
     def generate_pdf_report(self):
         # Ensure patient_id is retrieved safely
@@ -224,151 +377,68 @@ class SummaryDialog(QDialog):
         if not file_path:
             return
 
-        # Configuration
-        doc = SimpleDocTemplate(
-            file_path,
-            pagesize=A4,
-            rightMargin=50, leftMargin=50, topMargin=50, bottomMargin=50
-        )
+        # Build off the GUI thread so a slow reportlab build never freezes the window
+        self.report_btn.setEnabled(False)
+        self.report_btn.setText("Generating...")
+        from report.pdf import build_report
+        summary_data = dict(self.summary_data)
+        self.report_worker = Worker(lambda progress, is_cancelled: build_report(summary_data, file_path))
+        self.report_worker.signals.result.connect(self.on_report_built)
+        self.report_worker.signals.error.connect(self.on_report_failed)
+        self.report_worker.signals.finished.connect(self.on_report_finished)
+        start_worker(self.report_worker)
 
-        # Color Palette
-        PRIMARY_COLOR = HexColor("#2c3e50")   # Dark Navy
-        ACCENT_COLOR = HexColor("#e02793")    # Clinical Blue
-        TEXT_COLOR = HexColor("#2d3436")      # Soft Black
-        BORDER_COLOR = HexColor("#dfe6e9")    # Light Grey
-
-        styles = getSampleStyleSheet()
-        
-        # Custom Styles
-        styles.add(ParagraphStyle(
-            name="MainTitle",
-            fontSize=22,
-            fontName="Helvetica-Bold",
-            textColor=PRIMARY_COLOR,
-            alignment=0, # Left aligned
-            spaceAfter=10
-        ))
-
-        styles.add(ParagraphStyle(
-            name="ClinicHeader",
-            fontSize=10,
-            textColor=colors.grey,
-            alignment=2, # Right aligned
-        ))
-
-        styles.add(ParagraphStyle(
-            name="SectionHeader",
-            fontSize=12,
-            fontName="Helvetica-Bold",
-            textColor=ACCENT_COLOR,
-            textTransform='UPPERCASE',
-            spaceBefore=20,
-            spaceAfter=10
-        ))
-
-        story = []
-
-        header_data = [
-            [
-                Paragraph("MEDICAL SCREENING REPORT", styles["MainTitle"]),
-                Paragraph("<b>Jimma Medical Center</b><br/>123 Health , NY<br/>Phone: +251965492118", styles["ClinicHeader"])
-            ]
-        ]
-        header_table = Table(header_data, colWidths=[3.5 * inch, 2.5 * inch])
-        header_table.setStyle(TableStyle([('VALIGN', (0,0), (-1,-1), 'BOTTOM')]))
-        story.append(header_table)
-        
-        story.append(HRFlowable(width="100%", thickness=1, color=PRIMARY_COLOR, spaceBefore=5, spaceAfter=20))
-
-        # --- 2. PATIENT INFO (2-Column Layout) ---
-        story.append(Paragraph("Patient Profile", styles["SectionHeader"]))
-        
-        p_info = self.summary_data.get("patient_info", {})
-        # Chunking data into pairs for a 2-column table layout
-        items = list(p_info.items())
-        table_data = []
-        for i in range(0, len(items), 2):
-            row = []
-            # Column 1
-            row.append(Paragraph(f"<b>{items[i][0]}:</b> {items[i][1]}", styles["Normal"]))
-            # Column 2 (if exists)
-            if i + 1 < len(items):
-                row.append(Paragraph(f"<b>{items[i+1][0]}:</b> {items[i+1][1]}", styles["Normal"]))
-            else:
-                row.append("")
-            table_data.append(row)
-
-        patient_table = Table(table_data, colWidths=[3 * inch, 3 * inch])
-        patient_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, -1), HexColor("#f8f9fa")),
-            ('BOX', (0, 0), (-1, -1), 0.5, BORDER_COLOR),
-            ('LEFTPADDING', (0, 0), (-1, -1), 10),
-            ('TOPPADDING', (0, 0), (-1, -1), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
-        ]))
-        story.append(patient_table)
-
-        # --- 3. CLINICAL FINDINGS ---
-        story.append(Paragraph("Examination Findings", styles["SectionHeader"]))
-        
-        findings = self.summary_data.get("findings", {})
-        findings_data = [[Paragraph(f"<b>{k}</b>", styles["Normal"]), Paragraph(str(v), styles["Normal"])] for k, v in findings.items()]
-        
-        findings_table = Table(findings_data, colWidths=[2 * inch, 4 * inch])
-        findings_table.setStyle(TableStyle([
-            ('INNERGRID', (0, 0), (-1, -1), 0.25, BORDER_COLOR),
-            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-            ('TOPPADDING', (0, 0), (-1, -1), 8),
-        ]))
-        story.append(findings_table)
-
-        # --- 4. IMAGING SECTION ---
-        imaging = self.summary_data.get("imaging", {})
-        image_path = imaging.get("path")
-        
-        if image_path and QFileInfo.exists(image_path):
-            story.append(Paragraph("Imaging Analysis", styles["SectionHeader"]))
-            # Professional Frame for the Image
-            img = Image(image_path, width=4.0 * inch, height=2.8 * inch)
-            img_table = Table([[img]], colWidths=[6 * inch])
-            img_table.setStyle(TableStyle([
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('BOX', (0, 0), (-1, -1), 1, PRIMARY_COLOR),
-            ]))
-            story.append(img_table)
-            story.append(Spacer(1, 10))
-            story.append(Paragraph(f"<i>Source: {imaging.get('type', 'Radiology Scan')}</i>", styles["ClinicHeader"]))
-
-        # --- 5. FOOTER & SIGNATURE ---
-        story.append(Spacer(1, 40))
-        
-        # Signature Line
-        sig_data = [["", "__________________________"], ["", "Authorized Physician Signature"]]
-        sig_table = Table(sig_data, colWidths=[3.5 * inch, 2.5 * inch])
-        sig_table.setStyle(TableStyle([('ALIGN', (1, 1), (1, 1), 'CENTER')]))
-        story.append(sig_table)
-
-        story.append(Spacer(1, 30))
-        story.append(Paragraph(
-            "This is a confidential medical record. Generated by BCD Systems 2025.",
-            styles["ClinicHeader"]
-        ))
-
-        # Build PDF
-        try:
-            doc.build(story)
-            QMessageBox.information(self, "Success", "PDF report generated!")
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"Failed to generate PDF: {str(e)}")
+    def on_report_built(self, file_path):
+        QMessageBox.information(self, "Success", "PDF report generated!")
+
+    def on_report_failed(self, message):
+        QMessageBox.critical(self, "Error", f"Failed to generate PDF: {message}")
+
+    def on_report_finished(self):
+        self.report_worker = None
+        self.report_btn.setEnabled(True)
+        self.report_btn.setText("Generate Report")
+
+
+class ImageViewerDialog(QDialog):
+    """Zoom/pan viewer over the tile pyramid of a large image"""
+    def __init__(self, image_path, parent=None):
+        super().__init__(parent)
+        from ui.tile_viewer import TiledImageView
+        from imaging.pyramid import load_pyramid
+
+        self.setWindowTitle(QFileInfo(image_path).fileName())
+        self.resize(1000, 800)
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        self.view = TiledImageView()
+        layout.addWidget(self.view)
+        hint = QLabel("Scroll to zoom, drag to pan, double-click to fit")
+        hint.setAlignment(Qt.AlignCenter)
+        layout.addWidget(hint)
+
+        # Building the pyramid decodes the image once; do it off the GUI thread
+        self.pyramid_worker = Worker(load_pyramid, image_path)
+        self.pyramid_worker.signals.result.connect(self.view.set_pyramid)
+        self.pyramid_worker.signals.error.connect(
+            lambda message: QMessageBox.critical(self, "Error", f"Cannot open image: {message}"))
+        start_worker(self.pyramid_worker)
 
 
 class BreastScreeningApp(QWidget):
+    record_saved = pyqtSignal(object)
+    record_failed = pyqtSignal(str)
+
     def __init__(self):
         super().__init__()
         self.setWindowTitle(arch['appname'])
         self.setWindowIcon(QIcon(arch['icon']))
         self.selected_image_path = None
+        self.selected_image_paths = []
+        # Set while a record reopened from the worklist is being edited
+        self.editing_visit_id = None
+        self.search_conn = None
+        self.dashboard = None
         
         self.setGeometry(100, 70, 1150, 400)
         self.setStyleSheet("""
@@ -433,6 +503,13 @@ class BreastScreeningApp(QWidget):
         
         self.current_page = 0
         self.data = {}
+        # Default date/time of the form, shared by pages built later on
+        self.opened_at = QDateTime.currentDateTime()
+        self.prefetch_started = False
+        # Records are written on a background thread in batched transactions
+        self.record_writer = RecordWriter()
+        self.record_saved.connect(self.on_record_saved)
+        self.record_failed.connect(self.on_record_failed)
         self.init_ui()
         
     def init_ui(self):
@@ -440,16 +517,15 @@ class BreastScreeningApp(QWidget):
         main_layout.setContentsMargins(20, 20, 20, 20)
         main_layout.setSpacing(15)
         
-        palette = QPalette()
-
-        pixmap = QPixmap(arch['background_image']).scaled(
-            self.size(),
-            Qt.IgnoreAspectRatio,
-            Qt.SmoothTransformation
-        )
-
-        palette.setBrush(QPalette.Window, QBrush(pixmap))
-        self.setPalette(palette)
+        # The background is decoded at window size on a worker thread
+        # (see request_background) and re-rendered when the window is resized
+        self.background_pixmap = None
+        self.background_generation = 0
+        self.background_workers = set()
+        self.background_timer = QTimer(self)
+        self.background_timer.setSingleShot(True)
+        self.background_timer.setInterval(150)
+        self.background_timer.timeout.connect(self.request_background)
         
         
         
@@ -475,20 +551,20 @@ class BreastScreeningApp(QWidget):
         # Create stacked widget for pages
         self.stacked_widget = QStackedWidget()
         
-        # Create pages
-        self.page1 = self.create_page1()
-        self.page2 = self.create_page2()
-        self.page3 = self.create_page3()
-        self.page4 = self.create_page4()
-        self.page5 = self.create_page5()
-        self.page6 = self.create_summary_page()
-        
-        self.stacked_widget.addWidget(self.page1)
-        self.stacked_widget.addWidget(self.page2)
-        self.stacked_widget.addWidget(self.page3)
-        self.stacked_widget.addWidget(self.page4)
-        self.stacked_widget.addWidget(self.page5)
-        self.stacked_widget.addWidget(self.page6)
+        # Pages are built the first time they are needed (or prefetched when
+        # idle); until then the stack holds empty placeholders
+        self.page_builders = [
+            self.create_page1,
+            self.create_page2,
+            self.create_page3,
+            self.create_page4,
+            self.create_page5,
+            self.create_summary_page,
+        ]
+        self.pages_built = [False] * len(self.page_builders)
+        for _ in self.page_builders:
+            self.stacked_widget.addWidget(QWidget())
+        self.ensure_page(0)
         
         main_layout.addWidget(self.stacked_widget)
         
@@ -506,6 +582,18 @@ class BreastScreeningApp(QWidget):
         self.submit_btn.clicked.connect(self.show_summary_dialog)
         self.submit_btn.setVisible(False)
         
+        self.new_record_btn = QPushButton("New Record")
+        self.new_record_btn.clicked.connect(self.reset_form)
+        nav_layout.addWidget(self.new_record_btn)
+
+        self.worklist_btn = QPushButton("Worklist")
+        self.worklist_btn.clicked.connect(self.show_worklist)
+        nav_layout.addWidget(self.worklist_btn)
+
+        self.dashboard_btn = QPushButton("Dashboard")
+        self.dashboard_btn.clicked.connect(self.show_dashboard)
+        nav_layout.addWidget(self.dashboard_btn)
+        
         nav_layout.addStretch()
         nav_layout.addWidget(self.prev_btn)
         nav_layout.addWidget(self.next_btn)
@@ -517,6 +605,97 @@ class BreastScreeningApp(QWidget):
         # Update progress
         self.update_progress()
         
+    def ensure_page(self, index):
+        """Build page index if it hasn't been built yet"""
+        if self.pages_built[index]:
+            return
+        page = self.page_builders[index]()
+        placeholder = self.stacked_widget.widget(index)
+        current = self.stacked_widget.currentIndex()
+        self.stacked_widget.removeWidget(placeholder)
+        self.stacked_widget.insertWidget(index, page)
+        self.stacked_widget.setCurrentIndex(current)
+        placeholder.deleteLater()
+        setattr(self, f"page{index + 1}", page)
+        self.pages_built[index] = True
+
+    def reset_form(self):
+        """Start a blank record: rebuild the pages with their defaults and leave update mode"""
+        self.editing_visit_id = None
+        self.selected_image_path = None
+        self.selected_image_paths = []
+        self.opened_at = QDateTime.currentDateTime()
+        if self.pages_built[0]:
+            # Parented to the window rather than page 1, so they would outlive it
+            self.name_completer.deleteLater()
+            self.search_timer.deleteLater()
+        for index, built in enumerate(self.pages_built):
+            if built:
+                page = self.stacked_widget.widget(index)
+                self.stacked_widget.removeWidget(page)
+                self.stacked_widget.insertWidget(index, QWidget())
+                page.deleteLater()
+                self.pages_built[index] = False
+        self.ensure_page(0)
+        self.current_page = 0
+        self.stacked_widget.setCurrentIndex(0)
+        self.update_progress()
+        self.prev_btn.setEnabled(False)
+        self.next_btn.setVisible(True)
+        self.submit_btn.setVisible(False)
+        QTimer.singleShot(0, self.prefetch_pages)
+
+    def ensure_all_pages(self):
+        for index in range(len(self.page_builders)):
+            self.ensure_page(index)
+
+    def prefetch_pages(self):
+        """Build the next unbuilt page, then yield to the event loop before the next one"""
+        for index, built in enumerate(self.pages_built):
+            if not built:
+                self.ensure_page(index)
+                QTimer.singleShot(0, self.prefetch_pages)
+                return
+        startup.mark("all pages built")
+
+    def request_background(self):
+        """Render the background for the current window size off the GUI thread"""
+        self.background_generation += 1
+        generation = self.background_generation
+        worker = Worker(load_background, arch['background_image'], self.width(), self.height())
+        worker.signals.result.connect(lambda image: self.on_background_loaded(image, generation))
+        worker.signals.error.connect(lambda message: print(f"Background not loaded: {message}"))
+        worker.signals.finished.connect(lambda: self.background_workers.discard(worker))
+        self.background_workers.add(worker)
+        start_worker(worker)
+
+    def on_background_loaded(self, image, generation):
+        # Ignore renders for sizes the window has already left
+        if image is None or generation != self.background_generation:
+            return
+        self.set_background(QPixmap.fromImage(image))
+
+    def set_background(self, pixmap):
+        self.background_pixmap = pixmap
+        palette = self.palette()
+        palette.setBrush(QPalette.Window, QBrush(pixmap))
+        self.setPalette(palette)
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        if self.background_pixmap is not None:
+            # Cheap stretch of the screen-sized pixmap until the proper render arrives
+            self.set_background(self.background_pixmap.scaled(self.size(), Qt.IgnoreAspectRatio, Qt.FastTransformation))
+        self.background_timer.start()
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        if not self.prefetch_started:
+            self.prefetch_started = True
+            QTimer.singleShot(0, lambda: startup.mark("first paint"))
+            # Give the first paint a head start before building the other pages
+            QTimer.singleShot(50, self.prefetch_pages)
+
     def create_page1(self):
         page = QWidget()
         layout = QVBoxLayout()
@@ -540,12 +719,26 @@ class BreastScreeningApp(QWidget):
         self.patient_name = QLineEdit()
         self.patient_name.setPlaceholderText("Enter name or anonymous code")
         grid.addWidget(self.patient_name, 0, 3)
+
+        # Type-ahead over stored patients; picking one starts a visit for that patient
+        self.name_matches = {}
+        self.name_completer = QCompleter(self)
+        self.name_completer.setModel(QStringListModel(self.name_completer))
+        # Results are already filtered by the search index
+        self.name_completer.setCompletionMode(QCompleter.UnfilteredPopupCompletion)
+        self.name_completer.activated[str].connect(self.on_patient_suggestion)
+        self.patient_name.setCompleter(self.name_completer)
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(150)
+        self.search_timer.timeout.connect(self.update_name_suggestions)
+        self.patient_name.textEdited.connect(lambda _: self.search_timer.start())
         
         # Row 2
         grid.addWidget(QLabel("Date of Birth:"), 1, 0)
         self.dob = QDateEdit()
         self.dob.setCalendarPopup(True)
-        self.dob.setDate(QDate.currentDate().addYears(-40))
+        self.dob.setDate(self.opened_at.date().addYears(-40))
         grid.addWidget(self.dob, 1, 1)
         
         grid.addWidget(QLabel("Age:"), 1, 2)
@@ -557,12 +750,12 @@ class BreastScreeningApp(QWidget):
         # Row 3
         grid.addWidget(QLabel("Sex:"), 2, 0)
         self.sex = QComboBox()
-        self.sex.addItems(["Female"])
+        self.sex.addItems(SEXES)
         grid.addWidget(self.sex, 2, 1)
         
         grid.addWidget(QLabel("Menopausal Status:"), 2, 2)
         self.menopause = QComboBox()
-        self.menopause.addItems(["Pre-menopause", "Post-menopause", "Unknown"])
+        self.menopause.addItems(MENOPAUSAL_STATUSES)
         grid.addWidget(self.menopause, 2, 3)
         
         # Row 4
@@ -579,6 +772,69 @@ class BreastScreeningApp(QWidget):
         page.setLayout(layout)
         return page
     
+    def search_connection(self):
+        """Read-only lookups (search, duplicate checks) share one connection"""
+        if self.search_conn is None:
+            self.search_conn = connect_store()
+            init_db(self.search_conn)
+        return self.search_conn
+
+    def update_name_suggestions(self):
+        matches = search_patients(self.search_connection(), self.patient_name.text(), limit=10)
+        self.name_matches = {
+            f"{m['name'] or ''} \u2014 {m['patient_id']}"
+            + (f" (last study {m['last_study'][:10]})" if m['last_study'] else ""): m
+            for m in matches
+        }
+        self.name_completer.model().setStringList(list(self.name_matches))
+        if self.name_matches:
+            self.name_completer.complete()
+
+    def on_patient_suggestion(self, text):
+        patient = self.name_matches.get(text)
+        if patient is not None:
+            self.use_existing_patient(patient)
+
+    def use_existing_patient(self, patient):
+        """Take over the identity of a stored patient for a new visit"""
+        self.patient_id.setText(patient["patient_id"])
+        self.patient_name.setText(patient["name"] or "")
+        dob = QDate.fromString(patient["date_of_birth"] or "", "yyyy-MM-dd")
+        if dob.isValid():
+            self.dob.setDate(dob)
+        self.contact.setText(patient["contact"] or "")
+
+    def check_duplicate_patient(self):
+        """Warn before creating a patient that looks like one already stored.
+
+        Returns False if the user cancelled.
+        """
+        conn = self.search_connection()
+        if self.editing_visit_id is not None or patient_exists(conn, self.patient_id.text()):
+            return True
+        duplicates = find_duplicates(
+            conn, self.patient_name.text(), self.dob.date().toString('yyyy-MM-dd'),
+            self.contact.text(), exclude_patient_id=self.patient_id.text(),
+        )
+        if not duplicates:
+            return True
+        best = duplicates[0]
+        lines = "\n".join(
+            f"\u2022 {d['name']} ({d['patient_id']}, born {d['date_of_birth']}): {d['reason']}"
+            for d in duplicates
+        )
+        answer = QMessageBox.question(
+            self, "Possible Duplicate Patient",
+            f"This patient may already be registered:\n\n{lines}\n\n"
+            f"Record this visit under {best['patient_id']} instead of a new patient?",
+            QMessageBox.Yes | QMessageBox.No | QMessageBox.Cancel, QMessageBox.Yes,
+        )
+        if answer == QMessageBox.Cancel:
+            return False
+        if answer == QMessageBox.Yes:
+            self.use_existing_patient(best)
+        return True
+
     def update_age_from_dob(self):
         current_year = QDate.currentDate().year()
         birth_year = self.dob.date().year()
@@ -605,14 +861,14 @@ class BreastScreeningApp(QWidget):
         
         grid.addWidget(QLabel("Study Date & Time:"), 0, 2)
         self.study_datetime = QDateTimeEdit()
-        self.study_datetime.setDateTime(QDateTime.currentDateTime())
+        self.study_datetime.setDateTime(self.opened_at)
         self.study_datetime.setCalendarPopup(True)
         grid.addWidget(self.study_datetime, 0, 3)
         
         # Row 2
         grid.addWidget(QLabel("Imaging Modality:"), 1, 0)
         self.modality = QComboBox()
-        self.modality.addItems(["Ultrasound", "Mammography", "MRI"])
+        self.modality.addItems(MODALITIES)
         grid.addWidget(self.modality, 1, 1)
         
         grid.addWidget(QLabel("Examination Type:"), 1, 2)
@@ -670,19 +926,8 @@ class BreastScreeningApp(QWidget):
         right_layout = QVBoxLayout()
         
         self.right_findings = []
-        findings = [
-            "Retroareolar duct dilatation",
-            "Echogenic duct content",
-            "Duct ectasia",
-            "Solid mass present",
-            "Skin thickening",
-            "Nipple retraction",
-            "Architectural distortion",
-            "Mammillary lymphadenopathy",
-            "Axillary lymphadenopathy"
-        ]
         
-        for finding in findings:
+        for finding in RIGHT_FINDINGS:
             cb = QCheckBox(finding)
             right_layout.addWidget(cb)
             self.right_findings.append(cb)
@@ -695,18 +940,8 @@ class BreastScreeningApp(QWidget):
         left_layout = QVBoxLayout()
         
         self.left_findings = []
-        left_findings = [
-            "Retroareolar duct dilatation",
-            "Echogenic duct content",
-            "Solid mass present",
-            "Skin thickening",
-            "Nipple retraction",
-            "Architectural distortion",
-            "Mammillary lymphadenopathy",
-            "Axillary lymphadenopathy"
-        ]
         
-        for finding in left_findings:
+        for finding in LEFT_FINDINGS:
             cb = QCheckBox(finding)
             left_layout.addWidget(cb)
             self.left_findings.append(cb)
@@ -736,16 +971,8 @@ class BreastScreeningApp(QWidget):
         indicators_layout = QVBoxLayout()
         
         self.indicators = []
-        indicators = [
-            "Suspicious mass detected",
-            "Suspicious lymph nodes detected",
-            "Skin or nipple abnormality detected",
-            "Previous examination available",
-            "Change compared to previous exam",
-            "Stability over time"
-        ]
         
-        for indicator in indicators:
+        for indicator in INDICATORS:
             cb = QCheckBox(indicator)
             indicators_layout.addWidget(cb)
             self.indicators.append(cb)
@@ -770,28 +997,38 @@ class BreastScreeningApp(QWidget):
         grid.addWidget(QLabel("Upload Image:"), 0, 0)
         self.upload_btn = QPushButton("Select Image")
         self.upload_btn.clicked.connect(self.select_image)
-        grid.addWidget(self.upload_btn, 0, 1)
+        self.study_folder_btn = QPushButton("Open DICOM Study")
+        self.study_folder_btn.clicked.connect(self.select_study_folder)
+        upload_layout = QHBoxLayout()
+        upload_layout.addWidget(self.upload_btn)
+        upload_layout.addWidget(self.study_folder_btn)
+        grid.addLayout(upload_layout, 0, 1)
         
         self.image_path_label = QLabel("No image selected")
         self.image_path_label.setStyleSheet("color: #6c757d; font-style: italic;")
         grid.addWidget(self.image_path_label, 0, 2, 1, 2)
+
+        # Thumbnails of the selected images, loaded as they scroll into view
+        self.image_strip = ThumbnailStrip()
+        self.image_strip.setVisible(False)
+        grid.addWidget(self.image_strip, 4, 0, 1, 4)
         
         # Image Type
         grid.addWidget(QLabel("Image Type:"), 1, 0)
         self.image_type = QComboBox()
-        self.image_type.addItems(["Ultrasound", "Mammography", "MRI"])
+        self.image_type.addItems(MODALITIES)
         grid.addWidget(self.image_type, 1, 1)
         
         # Laterality
         grid.addWidget(QLabel("Laterality:"), 1, 2)
         self.laterality = QComboBox()
-        self.laterality.addItems(["Right", "Left", "Bilateral"])
+        self.laterality.addItems(LATERALITIES)
         grid.addWidget(self.laterality, 1, 3)
         
         # Image Date
         grid.addWidget(QLabel("Image Date:"), 2, 0)
         self.image_date = QDateTimeEdit()
-        self.image_date.setDateTime(QDateTime.currentDateTime())
+        self.image_date.setDateTime(self.opened_at)
         self.image_date.setCalendarPopup(True)
         grid.addWidget(self.image_date, 2, 1)
         
@@ -849,19 +1086,83 @@ class BreastScreeningApp(QWidget):
         return page
     
     def select_image(self):
-        file_path, _ = QFileDialog.getOpenFileName(
-            self, "Select Medical Image", "",
-            "Image Files (*.png *.jpg *.jpeg *.bmp)"
+        file_paths, _ = QFileDialog.getOpenFileNames(
+            self, "Select Medical Images", "",
+            IMAGE_FILE_FILTER
         )
 
-        if file_path:
-            self.selected_image_path = file_path
-            self.image_path_label.setText(QFileInfo(file_path).fileName())
+        if file_paths:
+            self.set_selected_images(file_paths)
+            if is_dicom(file_paths[0]):
+                self.read_dicom_headers(file_paths[0])
+
+    def set_selected_images(self, paths):
+        self.selected_image_paths = list(paths)
+        self.selected_image_path = paths[0]
+        name = QFileInfo(paths[0]).fileName()
+        self.image_path_label.setText(name if len(paths) == 1 else f"{name} (+{len(paths) - 1} more)")
+        self.image_strip.set_paths(paths)
+        self.image_strip.setVisible(len(paths) > 1)
+
+    def clear_selected_images(self):
+        self.selected_image_path = None
+        self.selected_image_paths = []
+        self.image_path_label.setText("No image selected")
+        self.image_strip.set_paths([])
+        self.image_strip.setVisible(False)
+
+    def select_study_folder(self):
+        folder = QFileDialog.getExistingDirectory(self, "Select DICOM Study Folder")
+        if folder:
+            # A folder without usable images must not leave the previous study selected
+            self.clear_selected_images()
+            self.image_path_label.setText("Reading study...")
+            self.read_dicom_headers(folder)
+
+    def read_dicom_headers(self, path):
+        """Read DICOM headers (no pixel data) off the GUI thread and fill the form"""
+        from imaging.dicom import load_headers
+        self.dicom_worker = Worker(load_headers, path)
+        self.dicom_worker.signals.result.connect(self.on_dicom_headers)
+        self.dicom_worker.signals.error.connect(
+            lambda message: QMessageBox.warning(self, "DICOM", f"Could not read DICOM data: {message}"))
+        start_worker(self.dicom_worker)
+
+    def on_dicom_headers(self, headers):
+        if not headers:
+            self.image_path_label.setText("No image selected")
+            QMessageBox.warning(self, "DICOM", "No DICOM images found in the selected folder.")
+            return
+        # A single picked file keeps the selection it came with
+        if len(headers) > 1 or not self.selected_image_paths:
+            self.set_selected_images([header["path"] for header in headers])
+        self.apply_dicom_header(headers[0])
+
+    def apply_dicom_header(self, header):
+        """Fill the visit and imaging fields from a DICOM header"""
+        self.ensure_page(1)
+        if header.get("study_id"):
+            self.study_id.setText(str(header["study_id"]))
+        modality = header.get("modality")
+        if modality and self.modality.findText(modality) >= 0:
+            self.modality.setCurrentText(modality)
+            self.image_type.setCurrentText(modality)
+        laterality = header.get("laterality")
+        if laterality and self.laterality.findText(laterality) >= 0:
+            self.laterality.setCurrentText(laterality)
+        if header.get("image_date"):
+            image_date = header["image_date"]
+            parsed = QDateTime.fromString(image_date, "yyyy-MM-dd hh:mm")
+            if not parsed.isValid():
+                parsed = QDateTime(QDate.fromString(image_date[:10], "yyyy-MM-dd"))
+            if parsed.isValid():
+                self.image_date.setDateTime(parsed)
 
     
     def next_page(self):
         if self.current_page < 5:
             self.current_page += 1
+            self.ensure_page(self.current_page)
             self.stacked_widget.setCurrentIndex(self.current_page)
             self.update_progress()
             
@@ -890,6 +1191,7 @@ class BreastScreeningApp(QWidget):
     
     def update_summary_preview(self):
         """Create a quick preview for the summary page"""
+        self.ensure_all_pages()
         preview_text = f"""
         <b>Patient:</b> {self.patient_name.text() or 'Anonymous'} (ID: {self.patient_id.text() or 'Not specified'})<br>
         <b>Study:</b> {self.study_id.text() or 'Not specified'} on {self.study_datetime.dateTime().toString('yyyy-MM-dd')}<br>
@@ -916,7 +1218,12 @@ class BreastScreeningApp(QWidget):
     
     def collect_summary_data(self):
         """Collect all data in a structured format for the summary dialog"""
+        # Unvisited pages are built with their defaults so the result is the
+        # same as if every page had been built up front
+        self.ensure_all_pages()
         data = {}
+        if self.editing_visit_id is not None:
+            data['visit_id'] = self.editing_visit_id
         
         # Patient Information
         data['patient_info'] = {
@@ -978,27 +1285,136 @@ class BreastScreeningApp(QWidget):
             'Image Reference ID': self.image_ref.text(),
             'Image File': self.image_path_label.text(),
             'Description': self.image_desc.toPlainText()[:100] + ('...' if len(self.image_desc.toPlainText()) > 100 else ''),
-            'path': self.selected_image_path
+            'path': self.selected_image_path,
+            'paths': list(self.selected_image_paths)
         }
         
         return data
     
+    def show_worklist(self):
+        from ui.worklist import WorklistDialog
+        dialog = WorklistDialog(parent=self)
+        dialog.record_opened.connect(self.open_record)
+        dialog.exec_()
+
+    def show_dashboard(self):
+        # Modeless, so it can stay open beside the wizard and follow new submissions
+        if self.dashboard is None:
+            from ui.dashboard import DashboardDialog
+            self.dashboard = DashboardDialog(parent=self)
+            self.dashboard.finished.connect(self.on_dashboard_closed)
+        self.dashboard.show()
+        self.dashboard.raise_()
+
+    def on_dashboard_closed(self, result):
+        self.dashboard = None
+
+    def open_record(self, visit_id):
+        """Load a stored visit back into the wizard for review or correction"""
+        summary = load_summary(self.search_connection(), visit_id)
+        if summary is None:
+            QMessageBox.warning(self, "Worklist", "That record no longer exists.")
+            return
+        self.load_record(summary)
+
+    def load_record(self, summary):
+        """Fill every page from a collect_summary_data()-shaped dict"""
+        self.ensure_all_pages()
+        self.editing_visit_id = summary.get("visit_id")
+
+        p = summary.get("patient_info", {})
+        self.patient_id.setText(p.get("Patient ID") or "")
+        self.patient_name.setText(p.get("Name/Code") or "")
+        dob = QDate.fromString(p.get("Date of Birth") or "", "yyyy-MM-dd")
+        if dob.isValid():
+            self.dob.setDate(dob)
+        if (p.get("Age") or "").isdigit():
+            self.age.setValue(int(p["Age"]))
+        self.sex.setCurrentText(p.get("Sex") or self.sex.currentText())
+        self.menopause.setCurrentText(p.get("Menopausal Status") or self.menopause.currentText())
+        contact = p.get("Contact")
+        self.contact.setText("" if contact in (None, "Not provided") else contact)
+
+        v = summary.get("visit_info", {})
+        self.study_id.setText(v.get("Study ID") or "")
+        study_date = QDateTime.fromString(v.get("Study Date") or "", "yyyy-MM-dd hh:mm")
+        if study_date.isValid():
+            self.study_datetime.setDateTime(study_date)
+        self.modality.setCurrentText(v.get("Imaging Modality") or self.modality.currentText())
+        self.exam_type.setText(v.get("Examination Type") or "")
+        techniques = split_list(v.get("Techniques"))
+        self.tech_radial.setChecked("Radial" in techniques)
+        self.tech_antiradial.setChecked("Anti-radial" in techniques)
+        self.tech_other.setChecked("Other" in techniques)
+        self.facility.setText(v.get("Health Facility") or "")
+        self.clinician.setText(v.get("Reporting Clinician") or "")
+
+        f = summary.get("findings", {})
+        right = split_list(f.get("Right Breast Findings"))
+        left = split_list(f.get("Left Breast Findings"))
+        for cb in self.right_findings:
+            cb.setChecked(cb.text() in right)
+        for cb in self.left_findings:
+            cb.setChecked(cb.text() in left)
+        indicators = summary.get("indicators", [])
+        for cb in self.indicators:
+            cb.setChecked(cb.text() in indicators)
+
+        imaging = summary.get("imaging", {})
+        self.image_type.setCurrentText(imaging.get("Image Type") or self.image_type.currentText())
+        self.laterality.setCurrentText(imaging.get("Laterality") or self.laterality.currentText())
+        image_date = QDateTime.fromString(imaging.get("Image Date") or "", "yyyy-MM-dd hh:mm")
+        if image_date.isValid():
+            self.image_date.setDateTime(image_date)
+        self.image_ref.setText(imaging.get("Image Reference ID") or "")
+        self.image_desc.setPlainText(imaging.get("Description") or "")
+        paths = image_paths(imaging)
+        if paths:
+            self.set_selected_images(paths)
+        else:
+            self.clear_selected_images()
+
+        self.current_page = 0
+        self.stacked_widget.setCurrentIndex(0)
+        self.update_progress()
+        self.prev_btn.setEnabled(False)
+        self.next_btn.setVisible(True)
+        self.submit_btn.setVisible(False)
+
     def show_summary_dialog(self):
         """Show the detailed summary dialog for final review"""
+        self.ensure_all_pages()
+        if not self.check_duplicate_patient():
+            return
         summary_data = self.collect_summary_data()
         
         dialog = SummaryDialog(summary_data, self)
         result = dialog.exec_()
         
         if result == QDialog.Accepted:
-            self.submit_data()
+            self.submit_data(summary_data)
         # If rejected (Edit button clicked), stay on summary page
     
-    def submit_data(self):
+    def submit_data(self, summary_data):
         """Final submission of data"""
-        # Here you would normally save the data to a database or file
-        print("Data submitted successfully!")
-        
+        future = self.record_writer.submit(summary_data)
+        future.add_done_callback(self._on_record_written)
+
+    def _on_record_written(self, future):
+        # Runs on the writer thread; hop back to the GUI thread through signals
+        if future.exception() is not None:
+            self.record_failed.emit(str(future.exception()))
+        else:
+            self.record_saved.emit(future.result())
+
+    def on_record_saved(self, visit_id):
+        print(f"Data submitted successfully! (visit {visit_id})")
+        # The reopened record is saved; another submission must not overwrite it again
+        if self.editing_visit_id == visit_id:
+            self.editing_visit_id = None
+        if self.dashboard is not None:
+            self.dashboard.refresh()
+
         # Success message
         msg = QMessageBox()
         msg.setIcon(QMessageBox.Information)
@@ -1007,14 +1423,66 @@ class BreastScreeningApp(QWidget):
         msg.setInformativeText("Your breast screening data has been recorded and saved.")
         msg.setStandardButtons(QMessageBox.Ok)
         msg.exec_()
-        
-        
+
         # Optionally reset the form or close
         # self.reset_form()
 
+    def on_record_failed(self, message):
+        QMessageBox.critical(self, "Submission Failed", f"Could not save the screening record: {message}")
+
+    def closeEvent(self, event):
+        self.record_writer.close()
+        if self.search_conn is not None:
+            self.search_conn.close()
+        super().closeEvent(event)
+
+    def load_in_background(self):
+        """Import the deferred modules and warm up the AI model off the GUI thread"""
+        self.preload_worker = Worker(preload_heavy_modules)
+        self.preload_worker.signals.result.connect(self.on_model_ready)
+        self.preload_worker.signals.finished.connect(startup.report)
+        start_worker(self.preload_worker)
+
+    def on_model_ready(self, timings):
+        if timings:
+            print(f"AI model ready (load {timings['load_time'] * 1000:.0f} ms, "
+                  f"warm-up {timings['warmup_time'] * 1000:.0f} ms)")
+
+
+def preload_heavy_modules(progress, is_cancelled):
+    # Each step on its own: a broken reportlab install must not keep the model
+    # from warming up, and whatever fails is imported again (and reported) on use
+    for name in DEFERRED_MODULES:
+        try:
+            startup.timed_import(name)
+        except Exception:
+            logger.exception("Preloading %s failed", name)
+    try:
+        from ai.analysis import warm_up_model
+        with startup.phase("warm up model"):
+            return warm_up_model(progress, is_cancelled)
+    except Exception:
+        logger.exception("Warming up the AI model failed")
+        return None
+
 
 if __name__ == "__main__":
-    app = QApplication(sys.argv)
-    window = BreastScreeningApp()
+    # In a frozen build the spawned inference and report workers start this
+    # executable again; this turns them into workers instead of new windows
+    multiprocessing.freeze_support()
+    with startup.phase("QApplication"):
+        app = QApplication(sys.argv)
+
+    with startup.phase("splash"):
+        splash = QSplashScreen(QPixmap(arch['icon']).scaled(300, 300, Qt.KeepAspectRatio, Qt.SmoothTransformation))
+        splash.showMessage(f"{arch['appname']} {arch['version']}\nLoading...", Qt.AlignBottom | Qt.AlignHCenter)
+        splash.show()
+        app.processEvents()
+
+    with startup.phase("build main window"):
+        window = BreastScreeningApp()
     window.show()
-    sys.exit(app.exec_())
\ No newline at end of file
+    splash.finish(window)
+    startup.mark("main window shown")
+    QTimer.singleShot(0, window.load_in_background)
+    sys.exit(app.exec_())
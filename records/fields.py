@@ -0,0 +1,49 @@
+"""Choices offered by the screening wizard.
+
+The wizard pages, the bulk importer and the exporters all use these lists,
+so a finding added here shows up everywhere.
+"""
+
+SEXES = ["Female"]
+
+MENOPAUSAL_STATUSES = ["Pre-menopause", "Post-menopause", "Unknown"]
+
+MODALITIES = ["Ultrasound", "Mammography", "MRI"]
+
+TECHNIQUES = ["Radial", "Anti-radial", "Other"]
+
+LATERALITIES = ["Right", "Left", "Bilateral"]
+
+RIGHT_FINDINGS = [
+    "Retroareolar duct dilatation",
+    "Echogenic duct content",
+    "Duct ectasia",
+    "Solid mass present",
+    "Skin thickening",
+    "Nipple retraction",
+    "Architectural distortion",
+    "Mammillary lymphadenopathy",
+    "Axillary lymphadenopathy",
+]
+
+LEFT_FINDINGS = [
+    "Retroareolar duct dilatation",
+    "Echogenic duct content",
+    "Solid mass present",
+    "Skin thickening",
+    "Nipple retraction",
+    "Architectural distortion",
+    "Mammillary lymphadenopathy",
+    "Axillary lymphadenopathy",
+]
+
+FINDINGS = {"right": RIGHT_FINDINGS, "left": LEFT_FINDINGS}
+
+INDICATORS = [
+    "Suspicious mass detected",
+    "Suspicious lymph nodes detected",
+    "Skin or nipple abnormality detected",
+    "Previous examination available",
+    "Change compared to previous exam",
+    "Stability over time",
+]
@@ -0,0 +1,552 @@
+"""Bulk import of historical screening records.
+
+Reads CSV, JSONL or XLSX exports row by row, maps every row onto the
+collect_summary_data() structure, validates it and writes it to the record
+store in large transactions:
+
+    python -m records.importer history.csv
+    python -m records.importer history.xlsx --sheet Screenings --mapping columns.json
+    python -m records.importer history.jsonl --batch-size 10000
+
+Reading, mapping and validation are generators, so memory use does not grow
+with the file. Progress is saved in the import_checkpoints table inside the
+same transaction as the rows it covers: running the same command after an
+interruption continues after the last committed row, and a finished import
+is not repeated unless --restart is given. Rejected rows are written with
+their errors to <file>.rejects.jsonl, one line each; on resume the file is
+cut back to the rejects the checkpoint counts, so none is listed twice.
+
+Columns are matched to fields by name, ignoring case, spaces and
+punctuation, so "Patient ID", "patient_id" and "PATIENTID" all fill
+patient_info["Patient ID"] (see COLUMN_ALIASES for other accepted names).
+List fields (findings, indicators, techniques, image paths) take values
+separated by ",", ";" or "|". Spreadsheets with one yes/no column per item
+work too: "Right: Solid mass present", "left_skin_thickening" and
+"Indicator: Stability over time" are flag columns. Anything else can be
+mapped with a JSON file of {"source column": "target"}, where target is
+"section.Field" (e.g. "patient_info.Patient ID"), "indicators",
+"right.<finding>", "left.<finding>", "indicator.<name>" or null to skip the
+column. JSONL lines that already have the nested structure are used as is.
+
+Dates are read day first when ambiguous (31/01/2024).
+"""
+import argparse
+import csv
+import json
+import os
+import re
+import sqlite3
+import sys
+import time
+from datetime import date, datetime
+from itertools import islice
+
+from records.fields import (
+    SEXES, MENOPAUSAL_STATUSES, MODALITIES, TECHNIQUES, LATERALITIES, FINDINGS, INDICATORS
+)
+from records.store import connect, init_db, insert_summary
+
+FIELDS = {
+    "patient_info": ["Patient ID", "Name/Code", "Date of Birth", "Age", "Sex", "Menopausal Status",
+                     "Contact"],
+    "visit_info": ["Study ID", "Study Date", "Imaging Modality", "Examination Type", "Techniques",
+                   "Health Facility", "Reporting Clinician"],
+    "findings": ["Right Breast Findings", "Left Breast Findings"],
+    "imaging": ["Image Type", "Laterality", "Image Date", "Image Reference ID", "Image File",
+                "Description", "paths"],
+}
+
+# Extra column names (normalized, see _norm) on top of the field names themselves
+COLUMN_ALIASES = {
+    "name": ("patient_info", "Name/Code"),
+    "patientname": ("patient_info", "Name/Code"),
+    "code": ("patient_info", "Name/Code"),
+    "dob": ("patient_info", "Date of Birth"),
+    "birthdate": ("patient_info", "Date of Birth"),
+    "menopause": ("patient_info", "Menopausal Status"),
+    "phone": ("patient_info", "Contact"),
+    "contactinformation": ("patient_info", "Contact"),
+    "accessionnumber": ("visit_info", "Study ID"),
+    "studydatetime": ("visit_info", "Study Date"),
+    "date": ("visit_info", "Study Date"),
+    "modality": ("visit_info", "Imaging Modality"),
+    "examtype": ("visit_info", "Examination Type"),
+    "technique": ("visit_info", "Techniques"),
+    "facility": ("visit_info", "Health Facility"),
+    "institution": ("visit_info", "Health Facility"),
+    "clinician": ("visit_info", "Reporting Clinician"),
+    "rightfindings": ("findings", "Right Breast Findings"),
+    "leftfindings": ("findings", "Left Breast Findings"),
+    "indicators": ("indicators", None),
+    "earlydetectionindicators": ("indicators", None),
+    "imageref": ("imaging", "Image Reference ID"),
+    "imagedescription": ("imaging", "Description"),
+    "path": ("imaging", "paths"),
+    "imagepath": ("imaging", "paths"),
+    "imagepaths": ("imaging", "paths"),
+}
+
+# Year first (2024-01-31 10:30, 2024-01-31T10:30:00) or day first (31/01/2024, 31.01.2024 10:30).
+# Matched with regexes: strptime walking a list of formats dominated import time.
+_YMD = re.compile(r"(\d{4})-(\d{1,2})-(\d{1,2})(?:[ T](\d{1,2}):(\d{2})(?::(\d{2})(?:\.\d+)?)?)?$")
+_DMY = re.compile(r"(\d{1,2})[/.-](\d{1,2})[/.-](\d{4})(?:[ T](\d{1,2}):(\d{2})(?::(\d{2}))?)?$")
+_COMPACT = re.compile(r"(\d{4})(\d{2})(\d{2})$")
+
+TRUE_VALUES = {"1", "y", "yes", "true", "x", "present"}
+FALSE_VALUES = {"", "0", "n", "no", "false", "absent", "none"}
+
+
+def _norm(name):
+    return re.sub(r"[^a-z0-9]", "", str(name).lower())
+
+
+def _column_targets():
+    targets = dict(COLUMN_ALIASES)
+    for section, names in FIELDS.items():
+        for name in names:
+            targets.setdefault(_norm(name), (section, name))
+    for side, names in FINDINGS.items():
+        for name in names:
+            targets[side + _norm(name)] = (side, name)
+    for name in INDICATORS:
+        targets["indicator" + _norm(name)] = ("indicator", name)
+        targets.setdefault(_norm(name), ("indicator", name))
+    return targets
+
+
+def parse_target(target):
+    """'patient_info.Patient ID' -> ('patient_info', 'Patient ID'); None skips the column"""
+    if target is None or target == "":
+        return None
+    section, _, field = target.partition(".")
+    if section == "indicators" and not field:
+        return ("indicators", None)
+    if section in FIELDS and field in FIELDS[section]:
+        return (section, field)
+    if section in FINDINGS and field in FINDINGS[section]:
+        return (section, field)
+    if section == "indicator" and field in INDICATORS:
+        return (section, field)
+    raise ValueError(f"Unknown import target {target!r}")
+
+
+def load_mapping(path):
+    """Read a {"source column": "target"} JSON file into {column: parsed target}"""
+    with open(path, encoding="utf-8") as f:
+        mapping = json.load(f)
+    if not isinstance(mapping, dict):
+        raise ValueError(f"{path} must hold a JSON object")
+    return {column: parse_target(target) for column, target in mapping.items()}
+
+
+# Readers: each yields (line, row, error) with row a {column: value} dict
+
+
+def read_csv(path, delimiter=","):
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.reader(f, delimiter=delimiter)
+        header = next(reader, None)
+        if header is None:
+            return
+        for row in reader:
+            if any(cell.strip() for cell in row):
+                yield reader.line_num, dict(zip(header, row)), None
+
+
+def read_jsonl(path):
+    with open(path, encoding="utf-8-sig") as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield line_no, None, f"invalid JSON: {e}"
+                continue
+            if isinstance(row, dict):
+                yield line_no, row, None
+            else:
+                yield line_no, None, "line is not a JSON object"
+
+
+def read_xlsx(path, sheet=None):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise RuntimeError("Reading .xlsx files needs openpyxl (pip install openpyxl)") from None
+    # read_only streams rows from the zip instead of loading the whole sheet
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = (workbook[sheet] if sheet else workbook.active).iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        header = [_text(cell) for cell in header]
+        for line, values in enumerate(rows, 2):
+            if any(_text(value) for value in values):
+                yield line, dict(zip(header, values)), None
+    finally:
+        workbook.close()
+
+
+def read_rows(path, fmt=None, sheet=None):
+    """Pick the reader from fmt or the file extension"""
+    fmt = (fmt or os.path.splitext(path)[1]).lower().lstrip(".")
+    if fmt == "csv":
+        return read_csv(path)
+    if fmt == "tsv":
+        return read_csv(path, "\t")
+    if fmt in ("jsonl", "ndjson"):
+        return read_jsonl(path)
+    if fmt in ("xlsx", "xlsm"):
+        return read_xlsx(path, sheet)
+    raise ValueError(f"Unsupported file type {fmt!r}; use csv, tsv, jsonl or xlsx")
+
+
+# Mapping and validation
+
+
+def _text(value):
+    if type(value) is str:
+        return value.strip()
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.strftime("%Y-%m-%d %H:%M")
+    if isinstance(value, date):
+        return value.strftime("%Y-%m-%d")
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value).strip()
+
+
+def _split(value):
+    if isinstance(value, (list, tuple)):
+        return [_text(part) for part in value if _text(part)]
+    value = _text(value)
+    if value in ("None", "None specified"):
+        return []
+    return [part.strip() for part in re.split(r"[,;|]", value) if part.strip()]
+
+
+def _parse_date(value):
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, date):
+        return datetime(value.year, value.month, value.day)
+    value = _text(value)
+    match = _YMD.match(value) or _COMPACT.match(value)
+    if match:
+        parts = match.groups()
+    else:
+        match = _DMY.match(value)
+        if not match:
+            return None
+        day, month, year = match.groups()[:3]
+        parts = (year, month, day) + match.groups()[3:]
+    try:
+        return datetime(*(int(part) for part in parts if part is not None))
+    except ValueError:
+        return None
+
+
+def _choice(value, choices, field, errors):
+    """Canonical spelling of value from choices, matched case-insensitively"""
+    value = _text(value)
+    if not value:
+        return None
+    for choice in choices:
+        if choice.lower() == value.lower():
+            return choice
+    errors.append(f"{field}: {value!r} is not one of {', '.join(choices)}")
+    return None
+
+
+def _choices(values, choices, field, errors):
+    return [choice for choice in (_choice(value, choices, field, errors) for value in values) if choice]
+
+
+def _flag(value):
+    text = _text(value).lower()
+    if text in TRUE_VALUES:
+        return True
+    if text in FALSE_VALUES:
+        return False
+    raise ValueError(text)
+
+
+def map_row(row, columns):
+    """Turn a flat {column: value} row into the nested summary structure.
+
+    columns maps each column to a target from parse_target() or None.
+    Returns (summary, errors).
+    """
+    summary = {section: {} for section in FIELDS}
+    summary["indicators"] = []
+    flags = {"right": [], "left": [], "indicator": []}
+    errors = []
+    for column, value in row.items():
+        target = columns.get(column)
+        if target is None:
+            continue
+        section, field = target
+        if section in flags:
+            try:
+                if _flag(value):
+                    flags[section].append(field)
+            except ValueError:
+                errors.append(f"{column}: {_text(value)!r} is not a yes/no value")
+        elif section == "indicators":
+            summary["indicators"] += _split(value)
+        elif field == "paths":
+            summary[section][field] = _split(value)
+        else:
+            summary[section][field] = value
+    f = summary["findings"]
+    for side, key in (("right", "Right Breast Findings"), ("left", "Left Breast Findings")):
+        if flags[side]:
+            f[key] = _split(f.get(key)) + flags[side]
+    summary["indicators"] += flags["indicator"]
+    return summary, errors
+
+
+def validate(summary, errors=None):
+    """Check a nested summary and normalize it in place to what the wizard produces.
+
+    Returns the list of errors; the summary can be stored when it is empty.
+    """
+    errors = [] if errors is None else errors
+    p = summary.setdefault("patient_info", {})
+    v = summary.setdefault("visit_info", {})
+    f = summary.setdefault("findings", {})
+    imaging = summary.get("imaging") or {}
+    summary.pop("visit_id", None)
+
+    p["Patient ID"] = _text(p.get("Patient ID"))
+    if not p["Patient ID"]:
+        errors.append("Patient ID is missing")
+    p["Name/Code"] = _text(p.get("Name/Code"))
+
+    study_date = _parse_date(v.get("Study Date"))
+    if study_date is None:
+        errors.append(f"Study Date: {_text(v.get('Study Date'))!r} is not a date" if _text(v.get("Study Date"))
+                      else "Study Date is missing")
+    else:
+        v["Study Date"] = study_date.strftime("%Y-%m-%d %H:%M")
+
+    dob = None
+    if _text(p.get("Date of Birth")):
+        dob = _parse_date(p["Date of Birth"])
+        if dob is None:
+            errors.append(f"Date of Birth: {_text(p['Date of Birth'])!r} is not a date")
+    p["Date of Birth"] = dob.strftime("%Y-%m-%d") if dob else None
+
+    age = _text(p.get("Age"))
+    if age:
+        if not age.isdigit() or not 0 < int(age) < 130:
+            errors.append(f"Age: {age!r} is not a valid age")
+    elif dob and study_date:
+        age = str(study_date.year - dob.year - ((study_date.month, study_date.day) < (dob.month, dob.day)))
+    p["Age"] = age
+
+    sex = _text(p.get("Sex"))
+    p["Sex"] = SEXES[0] if sex.upper() == "F" else _choice(sex, SEXES, "Sex", errors)
+    p["Menopausal Status"] = _choice(p.get("Menopausal Status"), MENOPAUSAL_STATUSES,
+                                     "Menopausal Status", errors)
+    p["Contact"] = _text(p.get("Contact")) or "Not provided"
+
+    for field in ("Study ID", "Examination Type", "Health Facility", "Reporting Clinician"):
+        v[field] = _text(v.get(field))
+    v["Imaging Modality"] = _choice(v.get("Imaging Modality"), MODALITIES, "Imaging Modality", errors)
+    techniques = _choices(_split(v.get("Techniques")), TECHNIQUES, "Techniques", errors)
+    v["Techniques"] = ", ".join(techniques) or "None specified"
+
+    for side, key in (("right", "Right Breast Findings"), ("left", "Left Breast Findings")):
+        found = _choices(_split(f.get(key)), FINDINGS[side], key, errors)
+        f[key] = ", ".join(dict.fromkeys(found)) or "None"
+    indicators = _choices(_split(summary.get("indicators")), INDICATORS, "Indicators", errors)
+    summary["indicators"] = list(dict.fromkeys(indicators))
+
+    if any(_text(value) for value in imaging.values() if not isinstance(value, list)) or imaging.get("paths"):
+        paths = _split(imaging.get("paths")) or _split(imaging.get("path"))
+        image_date = _parse_date(imaging.get("Image Date")) if _text(imaging.get("Image Date")) else study_date
+        if _text(imaging.get("Image Date")) and image_date is None:
+            errors.append(f"Image Date: {_text(imaging['Image Date'])!r} is not a date")
+        summary["imaging"] = {
+            "Image Type": _choice(imaging.get("Image Type"), MODALITIES, "Image Type", errors)
+                          or v["Imaging Modality"],
+            "Laterality": _choice(imaging.get("Laterality"), LATERALITIES, "Laterality", errors),
+            "Image Date": image_date.strftime("%Y-%m-%d %H:%M") if image_date else None,
+            "Image Reference ID": _text(imaging.get("Image Reference ID")),
+            "Image File": _text(imaging.get("Image File"))
+                          or ", ".join(os.path.basename(path) for path in paths),
+            "Description": _text(imaging.get("Description")),
+            "path": paths[0] if paths else None,
+            "paths": paths,
+        }
+    else:
+        summary["imaging"] = {}
+    return errors
+
+
+def summaries(rows, mapping=None, log=print):
+    """Yield (line, row, summary, errors) for each (line, row, error) from a reader"""
+    targets = _column_targets()
+    resolved = {}
+    for line, row, error in rows:
+        if error is not None:
+            yield line, row, None, [error]
+            continue
+        if "patient_info" in row:
+            summary, errors = row, []
+        else:
+            # CSV/XLSX rows all share one header; JSONL lines may differ
+            header = tuple(row)
+            columns = resolved.get(header)
+            if columns is None:
+                columns = {}
+                for column in header:
+                    if mapping is not None and column in mapping:
+                        columns[column] = mapping[column]
+                    else:
+                        columns[column] = targets.get(_norm(column))
+                        if columns[column] is None:
+                            log(f"Ignoring unknown column {column!r}")
+                resolved[header] = columns
+            summary, errors = map_row(row, columns)
+        yield line, row, summary, validate(summary, errors)
+
+
+# Import
+
+
+def load_checkpoint(conn, source):
+    row = conn.execute("SELECT * FROM import_checkpoints WHERE source = ?", (source,)).fetchone()
+    return dict(row) if row is not None else None
+
+
+def _keep_rejects(path, count):
+    """Cut the rejects file back to its first count lines, the ones already committed"""
+    try:
+        with open(path, "r+b") as f:
+            for _ in range(count):
+                if not f.readline():
+                    break
+            f.truncate(f.tell())
+    except FileNotFoundError:
+        pass
+
+
+def _commit(conn, batch, checkpoint, reject, flush_rejects):
+    """Insert a batch and advance the checkpoint in one transaction.
+
+    The rejects file is flushed before the commit, so it always holds at
+    least the checkpoint's rejected count of lines.
+    """
+    now = datetime.now().isoformat(timespec="seconds")
+    with conn:
+        conn.execute("BEGIN")
+        for line, row, summary in batch:
+            # A row the database refuses is rolled back alone, not with the batch
+            conn.execute("SAVEPOINT import_row")
+            try:
+                insert_summary(conn, summary, now)
+            except sqlite3.Error as e:
+                conn.execute("ROLLBACK TO import_row")
+                reject(line, row, [f"database: {e}"])
+            else:
+                checkpoint["imported"] += 1
+            conn.execute("RELEASE import_row")
+        flush_rejects()
+        conn.execute(
+            """INSERT INTO import_checkpoints (source, size, mtime, rows_done, imported, rejected,
+                                               finished, updated_at)
+               VALUES (:source, :size, :mtime, :rows_done, :imported, :rejected, :finished, :updated_at)
+               ON CONFLICT(source) DO UPDATE SET
+                   size=excluded.size, mtime=excluded.mtime, rows_done=excluded.rows_done,
+                   imported=excluded.imported, rejected=excluded.rejected,
+                   finished=excluded.finished, updated_at=excluded.updated_at""",
+            dict(checkpoint, updated_at=now),
+        )
+
+
+def import_records(path, db_path=None, fmt=None, mapping=None, sheet=None, batch_size=5000,
+                   restart=False, log=print):
+    """Import a file into the record store; returns the checkpoint dict with the totals"""
+    source = os.path.abspath(path)
+    stat = os.stat(source)
+    conn = connect(db_path)
+    try:
+        init_db(conn)
+        checkpoint = load_checkpoint(conn, source)
+        if checkpoint is not None and not restart:
+            if (checkpoint["size"], checkpoint["mtime"]) != (stat.st_size, stat.st_mtime):
+                raise ValueError(f"{path} has changed since it was last imported; "
+                                 "use --restart to import it again from the start")
+            if checkpoint["finished"]:
+                log(f"{path} was already imported ({checkpoint['imported']} rows); "
+                    "use --restart to import it again")
+                return checkpoint
+            log(f"Resuming after row {checkpoint['rows_done']}")
+        else:
+            checkpoint = {"source": source, "rows_done": 0, "imported": 0, "rejected": 0}
+        checkpoint.update(size=stat.st_size, mtime=stat.st_mtime, finished=0)
+        skip = checkpoint["rows_done"]
+
+        rejects_path = path + ".rejects.jsonl"
+        if skip:
+            # Rows after the checkpoint are read again; drop what they wrote last time
+            _keep_rejects(rejects_path, checkpoint["rejected"])
+        with open(rejects_path, "a" if skip else "w", encoding="utf-8") as rejects:
+            def reject(line, row, errors):
+                checkpoint["rejected"] += 1
+                rejects.write(json.dumps({"line": line, "errors": errors, "row": row}, default=str) + "\n")
+
+            start = time.perf_counter()
+            batch = []
+            rows = islice(read_rows(path, fmt, sheet), skip, None)
+            for line, row, summary, errors in summaries(rows, mapping, log):
+                checkpoint["rows_done"] += 1
+                if errors:
+                    reject(line, row, errors)
+                else:
+                    batch.append((line, row, summary))
+                if checkpoint["rows_done"] % batch_size == 0:
+                    _commit(conn, batch, checkpoint, reject, rejects.flush)
+                    batch = []
+                    done = checkpoint["rows_done"] - skip
+                    log(f"{checkpoint['rows_done']} rows ({done / (time.perf_counter() - start):.0f}/s), "
+                        f"{checkpoint['imported']} imported, {checkpoint['rejected']} rejected")
+            checkpoint["finished"] = 1
+            _commit(conn, batch, checkpoint, reject, rejects.flush)
+
+        elapsed = time.perf_counter() - start
+        log(f"Done: {checkpoint['imported']} imported, {checkpoint['rejected']} rejected "
+            f"in {elapsed:.1f}s ({(checkpoint['rows_done'] - skip) / max(elapsed, 1e-9):.0f} rows/s)")
+        if checkpoint["rejected"]:
+            log(f"Rejected rows are listed in {rejects_path}")
+        return checkpoint
+    finally:
+        conn.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import historical screening records")
+    parser.add_argument("file", help="CSV, TSV, JSONL or XLSX file")
+    parser.add_argument("--db", default=None, help="record store (default: database setting)")
+    parser.add_argument("--format", default=None, help="file type if the extension doesn't say (csv, jsonl, xlsx)")
+    parser.add_argument("--mapping", default=None, help='JSON file of {"source column": "section.Field"}')
+    parser.add_argument("--sheet", default=None, help="XLSX sheet name (default: the active sheet)")
+    parser.add_argument("--batch-size", type=int, default=5000, help="rows per transaction")
+    parser.add_argument("--restart", action="store_true", help="ignore the checkpoint and start over")
+    args = parser.parse_args(argv)
+
+    mapping = load_mapping(args.mapping) if args.mapping else None
+    checkpoint = import_records(args.file, args.db, args.format, mapping, args.sheet,
+                                args.batch_size, args.restart)
+    return 1 if checkpoint["rejected"] and not checkpoint["imported"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,208 @@
+"""Patient lookup over the record store.
+
+patient_search is an FTS5 table with the trigram tokenizer, one row per
+patient (rowid = patients.id) holding the patient ID, name/code, contact and
+every study ID of the patient. Any substring of three or more characters is
+an index lookup, so type-ahead stays in the low milliseconds with hundreds of
+thousands of patients. Shorter queries fall back to prefix matching on the
+patients table indexes.
+
+insert_summary() calls index_patient() for every submission, inside the same
+transaction, so the index is never behind the data.
+"""
+import sqlite3
+from difflib import SequenceMatcher
+from itertools import combinations
+
+SEARCH_TABLE_SQL = """
+CREATE VIRTUAL TABLE patient_search USING fts5(
+    patient_id, name, contact, study_ids, tokenize='trigram'
+);
+CREATE VIRTUAL TABLE patient_search_vocab USING fts5vocab(patient_search, 'row');
+"""
+
+_INDEX_SELECT = """
+SELECT p.id, p.patient_id, p.name, p.contact,
+       (SELECT group_concat(v.study_id, ' ') FROM visits v WHERE v.patient_ref = p.id)
+FROM patients p
+"""
+
+
+def has_search_index(conn):
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE name = 'patient_search'"
+    ).fetchone() is not None
+
+
+def create_search_index(conn):
+    """Create and fill patient_search; False when SQLite lacks FTS5 trigram support"""
+    if has_search_index(conn):
+        return True
+    try:
+        for statement in SEARCH_TABLE_SQL.split(";"):
+            if statement.strip():
+                conn.execute(statement)
+    except sqlite3.OperationalError:
+        return False
+    conn.execute(
+        "INSERT INTO patient_search (rowid, patient_id, name, contact, study_ids) " + _INDEX_SELECT
+    )
+    return True
+
+
+def index_patient(conn, patient_ref):
+    """Refresh the search row of one patient"""
+    if not has_search_index(conn):
+        return
+    conn.execute("DELETE FROM patient_search WHERE rowid = ?", (patient_ref,))
+    conn.execute(
+        "INSERT INTO patient_search (rowid, patient_id, name, contact, study_ids) "
+        + _INDEX_SELECT + " WHERE p.id = ?",
+        (patient_ref,),
+    )
+
+
+def _phrase(text):
+    return '"' + text.replace('"', '""') + '"'
+
+
+def _trigrams(text):
+    text = text.lower()
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def similarity(a, b):
+    return SequenceMatcher(None, (a or "").lower(), (b or "").lower()).ratio()
+
+
+def match_query(text):
+    """FTS5 MATCH expression for a substring search, or None if text is too short"""
+    text = text.strip()
+    return _phrase(text) if len(text) >= 3 else None
+
+
+def _patients(conn, refs):
+    if not refs:
+        return []
+    marks = ", ".join("?" * len(refs))
+    rows = conn.execute(
+        f"""SELECT p.id, p.patient_id, p.name, p.date_of_birth, p.contact,
+                   (SELECT MAX(v.study_date) FROM visits v WHERE v.patient_ref = p.id) AS last_study
+            FROM patients p WHERE p.id IN ({marks})""",
+        refs,
+    ).fetchall()
+    by_ref = {row[0]: row for row in rows}
+    return [
+        {
+            "patient_ref": row[0], "patient_id": row[1], "name": row[2],
+            "date_of_birth": row[3], "contact": row[4], "last_study": row[5],
+        }
+        for row in (by_ref.get(ref) for ref in refs) if row is not None
+    ]
+
+
+def _fuzzy_refs(conn, text, limit, candidates=300):
+    """Patients whose name is close to text, best similarity first.
+
+    Candidates are the patients containing at least two of the five rarest
+    trigrams of text that exist in the index. A typo only breaks the
+    trigrams around it, so close names keep most of theirs, and pairs of
+    rare trigrams keep the candidate set small without bm25 ranking every
+    patient that shares a common trigram.
+    """
+    grams = sorted(_trigrams(text))
+    if not grams:
+        return []
+    marks = ", ".join("?" * len(grams))
+    counts = conn.execute(
+        f"SELECT term, doc FROM patient_search_vocab WHERE term IN ({marks})", grams
+    ).fetchall()
+    rare = [term for term, _ in sorted(counts, key=lambda row: row[1])[:5]]
+    if not rare:
+        return []
+    if len(rare) == 1:
+        query = _phrase(rare[0])
+    else:
+        query = " OR ".join(f"({_phrase(a)} AND {_phrase(b)})" for a, b in combinations(rare, 2))
+    rows = conn.execute(
+        "SELECT rowid, name FROM patient_search WHERE patient_search MATCH ? LIMIT ?",
+        (query, candidates),
+    ).fetchall()
+    scored = sorted(((similarity(text, name), ref) for ref, name in rows), reverse=True)
+    return [ref for score, ref in scored[:limit] if score >= 0.6]
+
+
+def search_patients(conn, text, limit=20, fuzzy=True):
+    """Patients whose ID, name/code, contact or study IDs contain text.
+
+    With fuzzy=True and fewer than limit substring hits, the rest is filled
+    with patients whose name is close to text (typos, swapped letters).
+    Each result dict has a "match" key: "exact" or "fuzzy".
+    """
+    text = text.strip()
+    if not text:
+        return []
+    query = match_query(text)
+    if query is None or not has_search_index(conn):
+        # Too short for trigrams: prefix match on the indexed columns
+        prefix = text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        refs = [row[0] for row in conn.execute(
+            """SELECT id FROM patients WHERE name LIKE ? ESCAPE '\\'
+               UNION SELECT id FROM patients WHERE patient_id LIKE ? ESCAPE '\\'
+               LIMIT ?""",
+            (prefix, prefix, limit),
+        )]
+        return [dict(p, match="exact") for p in _patients(conn, refs)]
+
+    # No ORDER BY rank: bm25 would score every match, and common substrings
+    # match tens of thousands of patients
+    refs = [row[0] for row in conn.execute(
+        "SELECT rowid FROM patient_search WHERE patient_search MATCH ? LIMIT ?",
+        (query, limit),
+    )]
+    results = [dict(p, match="exact") for p in _patients(conn, refs)]
+    if fuzzy and len(refs) < limit:
+        extra = [ref for ref in _fuzzy_refs(conn, text, limit) if ref not in refs]
+        results += [dict(p, match="fuzzy") for p in _patients(conn, extra[:limit - len(refs)])]
+    return results
+
+
+def patient_exists(conn, patient_id):
+    return conn.execute("SELECT 1 FROM patients WHERE patient_id = ?", (patient_id,)).fetchone() is not None
+
+
+def find_duplicates(conn, name, date_of_birth=None, contact=None, exclude_patient_id=None, limit=5):
+    """Existing patients that are likely the same person as a new entry.
+
+    Flags a close name match (or a looser one with the same date of birth)
+    and any patient with the same contact. Each result carries a "reason".
+    """
+    name = (name or "").strip()
+    contact = (contact or "").strip()
+    if contact == "Not provided":
+        contact = ""
+    candidates = {}
+    if len(name) >= 3:
+        for patient in search_patients(conn, name, limit=limit * 4):
+            candidates[patient["patient_ref"]] = patient
+    if len(contact) >= 3 and has_search_index(conn):
+        for patient in search_patients(conn, contact, limit=limit, fuzzy=False):
+            candidates.setdefault(patient["patient_ref"], patient)
+
+    flagged = []
+    for patient in candidates.values():
+        if exclude_patient_id and patient["patient_id"] == exclude_patient_id:
+            continue
+        score = similarity(name, patient["name"]) if name else 0.0
+        same_dob = bool(date_of_birth) and patient["date_of_birth"] == date_of_birth
+        if contact and patient["contact"] == contact:
+            reason = "same contact"
+        elif score >= 0.9:
+            reason = "same name" if score == 1.0 else "similar name"
+        elif score >= 0.7 and same_dob:
+            reason = "similar name and same date of birth"
+        else:
+            continue
+        flagged.append((score + same_dob, dict(patient, reason=reason)))
+    flagged.sort(key=lambda item: item[0], reverse=True)
+    return [patient for _, patient in flagged[:limit]]
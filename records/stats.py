@@ -0,0 +1,198 @@
+"""Screening statistics kept up to date on every write.
+
+Aggregate tables, keyed by period and facility:
+
+    stats_screenings   screenings and AI-flagged positives
+    stats_findings     visits with each finding, per side
+    stats_indicators   visits with each early-detection indicator
+
+Each exists per day (period = YYYY-MM-DD) and, with a _monthly suffix, per
+month (period = YYYY-MM). insert_summary() calls add_visit() after writing a
+visit and remove_visit() before replacing one, inside the same transaction,
+so the tables always equal a GROUP BY over the visits without ever running
+one.
+
+The dashboard queries below read the monthly tables when the requested
+range is whole months (all time, the last 12 months) and the daily tables
+otherwise, so even ten years of a busy program sum in milliseconds.
+"""
+import calendar
+
+_TABLES = {
+    "stats_screenings": "screenings INTEGER NOT NULL, ai_positive INTEGER NOT NULL, PRIMARY KEY (period, facility)",
+    "stats_findings": ("side TEXT NOT NULL, finding TEXT NOT NULL, visits INTEGER NOT NULL, "
+                       "PRIMARY KEY (period, facility, side, finding)"),
+    "stats_indicators": "indicator TEXT NOT NULL, visits INTEGER NOT NULL, PRIMARY KEY (period, facility, indicator)",
+}
+
+AI_POSITIVE_LABEL = "Suspicious"
+
+# (table suffix, period of a visit). Visits without a date or facility are counted under ''.
+_PERIODS = [
+    ("", "COALESCE(substr(v.study_date, 1, 10), '')"),
+    ("_monthly", "COALESCE(substr(v.study_date, 1, 7), '')"),
+]
+_FACILITY = "COALESCE(v.facility, '')"
+
+
+def has_stats_tables(conn):
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE name = 'stats_screenings'"
+    ).fetchone() is not None
+
+
+def create_stats_tables(conn):
+    """Create the aggregate tables and fill them from the visits already stored"""
+    if has_stats_tables(conn):
+        return
+    for suffix, period in _PERIODS:
+        for table, columns in _TABLES.items():
+            conn.execute(
+                f"CREATE TABLE {table}{suffix} (period TEXT NOT NULL, facility TEXT NOT NULL, {columns})"
+                " WITHOUT ROWID"
+            )
+        # One full pass when upgrading an existing store; incremental from here on
+        conn.execute(
+            f"""INSERT INTO stats_screenings{suffix} (period, facility, screenings, ai_positive)
+                SELECT {period}, {_FACILITY}, COUNT(*), COALESCE(SUM(v.ai_label = ?), 0)
+                FROM visits v GROUP BY 1, 2""",
+            (AI_POSITIVE_LABEL,),
+        )
+        conn.execute(
+            f"""INSERT INTO stats_findings{suffix} (period, facility, side, finding, visits)
+                SELECT {period}, {_FACILITY}, f.side, f.finding, COUNT(*)
+                FROM findings f JOIN visits v ON v.id = f.visit_id GROUP BY 1, 2, 3, 4"""
+        )
+        conn.execute(
+            f"""INSERT INTO stats_indicators{suffix} (period, facility, indicator, visits)
+                SELECT {period}, {_FACILITY}, i.indicator, COUNT(*)
+                FROM indicators i JOIN visits v ON v.id = i.visit_id GROUP BY 1, 2, 3"""
+        )
+
+
+def _apply(conn, visit_id, sign):
+    row = conn.execute(
+        f"SELECT {_PERIODS[0][1]}, {_FACILITY}, v.ai_label FROM visits v WHERE v.id = ?", (visit_id,)
+    ).fetchone()
+    if row is None:
+        return
+    day, facility, label = row
+    for suffix, period in (("", day), ("_monthly", day[:7])):
+        conn.execute(
+            f"""INSERT INTO stats_screenings{suffix} (period, facility, screenings, ai_positive)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(period, facility) DO UPDATE SET
+                    screenings = screenings + excluded.screenings,
+                    ai_positive = ai_positive + excluded.ai_positive""",
+            (period, facility, sign, sign if label == AI_POSITIVE_LABEL else 0),
+        )
+        conn.execute(
+            f"""INSERT INTO stats_findings{suffix} (period, facility, side, finding, visits)
+                SELECT ?, ?, side, finding, ? FROM findings WHERE visit_id = ?
+                ON CONFLICT(period, facility, side, finding) DO UPDATE SET visits = visits + excluded.visits""",
+            (period, facility, sign, visit_id),
+        )
+        conn.execute(
+            f"""INSERT INTO stats_indicators{suffix} (period, facility, indicator, visits)
+                SELECT ?, ?, indicator, ? FROM indicators WHERE visit_id = ?
+                ON CONFLICT(period, facility, indicator) DO UPDATE SET visits = visits + excluded.visits""",
+            (period, facility, sign, visit_id),
+        )
+
+
+def add_visit(conn, visit_id):
+    """Count a visit that has just been written, with its findings and indicators"""
+    if has_stats_tables(conn):
+        _apply(conn, visit_id, 1)
+
+
+def remove_visit(conn, visit_id):
+    """Take a visit out of the counts before it is changed"""
+    if has_stats_tables(conn):
+        _apply(conn, visit_id, -1)
+
+
+# Dashboard queries. since/until are inclusive YYYY-MM-DD days; None is unbounded.
+
+
+def whole_months(since, until):
+    """True when [since, until] starts on a 1st and ends on a month's last day"""
+    if since and not since.endswith("-01"):
+        return False
+    if until:
+        year, month = int(until[:4]), int(until[5:7])
+        if int(until[8:10]) != calendar.monthrange(year, month)[1]:
+            return False
+    return True
+
+
+def _source(table, since, until, facility, monthly=None):
+    """FROM/WHERE clause and params over the daily or the monthly table"""
+    if monthly is None:
+        monthly = whole_months(since, until)
+    clauses, params = [], []
+    if since or until:
+        clauses.append("period != ''")
+    if since:
+        clauses.append("period >= ?")
+        params.append(since[:7] if monthly else since)
+    if until:
+        clauses.append("period <= ?")
+        params.append(until[:7] if monthly else until)
+    if facility is not None:
+        clauses.append("facility = ?")
+        params.append(facility)
+    sql = f" FROM {table}_monthly" if monthly else f" FROM {table}"
+    if clauses:
+        sql += " WHERE " + " AND ".join(clauses)
+    return sql, params
+
+
+def facilities(conn):
+    return [row[0] for row in conn.execute(
+        "SELECT DISTINCT facility FROM stats_screenings_monthly WHERE screenings > 0 ORDER BY facility")]
+
+
+def totals(conn, since=None, until=None, facility=None):
+    """(screenings, AI-flagged positives)"""
+    source, params = _source("stats_screenings", since, until, facility)
+    row = conn.execute(
+        f"SELECT COALESCE(SUM(screenings), 0), COALESCE(SUM(ai_positive), 0){source}", params
+    ).fetchone()
+    return row[0], row[1]
+
+
+def screenings_by_period(conn, since=None, until=None, facility=None, by_month=False):
+    """[(YYYY-MM-DD day, or YYYY-MM month with by_month, screenings, AI positives)], oldest first"""
+    monthly = by_month and whole_months(since, until)
+    source, params = _source("stats_screenings", since, until, facility, monthly)
+    key = "substr(period, 1, 7)" if by_month else "period"
+    return [tuple(row) for row in conn.execute(
+        f"""SELECT {key}, SUM(screenings), SUM(ai_positive){source}
+            GROUP BY 1 HAVING SUM(screenings) > 0 ORDER BY 1""",
+        params,
+    )]
+
+
+def screenings_by_facility(conn, since=None, until=None):
+    """[(facility, screenings, AI positives)], busiest first"""
+    source, params = _source("stats_screenings", since, until, None)
+    return [tuple(row) for row in conn.execute(
+        f"""SELECT facility, SUM(screenings), SUM(ai_positive){source}
+            GROUP BY 1 HAVING SUM(screenings) > 0 ORDER BY 2 DESC""",
+        params,
+    )]
+
+
+def finding_counts(conn, since=None, until=None, facility=None):
+    """{(side, finding): visits}"""
+    source, params = _source("stats_findings", since, until, facility)
+    return {(row[0], row[1]): row[2] for row in conn.execute(
+        f"SELECT side, finding, SUM(visits){source} GROUP BY 1, 2", params)}
+
+
+def indicator_counts(conn, since=None, until=None, facility=None):
+    """{indicator: visits}"""
+    source, params = _source("stats_indicators", since, until, facility)
+    return {row[0]: row[1] for row in conn.execute(
+        f"SELECT indicator, SUM(visits){source} GROUP BY 1", params)}
@@ -0,0 +1,513 @@
+import os
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from datetime import datetime
+
+from core.core import core
+from imaging.formats import image_paths
+from records.search import create_search_index, has_search_index, index_patient, match_query
+from records.stats import create_stats_tables, add_visit, remove_visit
+
+SCHEMA_VERSION = 7
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS patients (
+    id INTEGER PRIMARY KEY,
+    patient_id TEXT NOT NULL UNIQUE,
+    name TEXT,
+    date_of_birth TEXT,
+    age INTEGER,
+    sex TEXT,
+    menopausal_status TEXT,
+    contact TEXT,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS visits (
+    id INTEGER PRIMARY KEY,
+    patient_ref INTEGER NOT NULL REFERENCES patients(id),
+    study_id TEXT,
+    study_date TEXT,
+    modality TEXT,
+    examination_type TEXT,
+    techniques TEXT,
+    facility TEXT,
+    clinician TEXT,
+    ai_status TEXT,
+    ai_score REAL,
+    ai_label TEXT,
+    ai_model_version TEXT,
+    submitted_at TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS findings (
+    visit_id INTEGER NOT NULL REFERENCES visits(id) ON DELETE CASCADE,
+    side TEXT NOT NULL,
+    finding TEXT NOT NULL,
+    PRIMARY KEY (visit_id, side, finding)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS indicators (
+    visit_id INTEGER NOT NULL REFERENCES visits(id) ON DELETE CASCADE,
+    indicator TEXT NOT NULL,
+    PRIMARY KEY (visit_id, indicator)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS images (
+    id INTEGER PRIMARY KEY,
+    visit_id INTEGER NOT NULL REFERENCES visits(id) ON DELETE CASCADE,
+    path TEXT,
+    file_name TEXT,
+    image_type TEXT,
+    laterality TEXT,
+    image_date TEXT,
+    reference_id TEXT,
+    description TEXT
+);
+
+-- Progress of bulk imports (records.importer), committed together with the rows
+CREATE TABLE IF NOT EXISTS import_checkpoints (
+    source TEXT PRIMARY KEY,
+    size INTEGER,
+    mtime REAL,
+    rows_done INTEGER NOT NULL,
+    imported INTEGER NOT NULL,
+    rejected INTEGER NOT NULL,
+    finished INTEGER NOT NULL DEFAULT 0,
+    updated_at TEXT NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_visits_patient ON visits(patient_ref);
+CREATE INDEX IF NOT EXISTS idx_visits_study_id ON visits(study_id);
+CREATE INDEX IF NOT EXISTS idx_visits_study_date ON visits(study_date);
+CREATE INDEX IF NOT EXISTS idx_visits_facility_date ON visits(facility, study_date);
+CREATE INDEX IF NOT EXISTS idx_findings_finding ON findings(side, finding);
+CREATE INDEX IF NOT EXISTS idx_indicators_indicator ON indicators(indicator);
+CREATE INDEX IF NOT EXISTS idx_images_visit ON images(visit_id);
+CREATE INDEX IF NOT EXISTS idx_visits_submitted ON visits(submitted_at);
+CREATE INDEX IF NOT EXISTS idx_patients_name ON patients(name COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS idx_patients_patient_id_nocase ON patients(patient_id COLLATE NOCASE);
+
+-- Worklist sort orders, each matching a WORKLIST_COLUMNS expression exactly
+CREATE INDEX IF NOT EXISTS idx_patients_worklist_name ON patients(COALESCE(name, ''));
+CREATE INDEX IF NOT EXISTS idx_visits_worklist_study_id ON visits(COALESCE(study_id, ''));
+CREATE INDEX IF NOT EXISTS idx_visits_worklist_study_date ON visits(COALESCE(study_date, ''));
+CREATE INDEX IF NOT EXISTS idx_visits_worklist_modality ON visits(COALESCE(modality, ''));
+CREATE INDEX IF NOT EXISTS idx_visits_worklist_facility ON visits(COALESCE(facility, ''));
+CREATE INDEX IF NOT EXISTS idx_visits_worklist_ai_label ON visits(COALESCE(ai_label, ''));
+"""
+
+
+def default_db_path():
+    return core()["database"]
+
+
+def connect(db_path=None):
+    """Open a connection with the pragmas every connection to the store needs"""
+    db_path = db_path or default_db_path()
+    if db_path != ":memory:":
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+    conn = sqlite3.connect(db_path, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA foreign_keys=ON")
+    conn.execute("PRAGMA busy_timeout=5000")
+    return conn
+
+
+def init_db(conn):
+    """Create tables and indexes if they don't exist yet.
+
+    The upgrade runs as one transaction together with the user_version bump,
+    so a crash or error part-way leaves the store at its old version and the
+    next start redoes it. (executescript() would commit before running.)
+    """
+    if conn.execute("PRAGMA user_version").fetchone()[0] >= SCHEMA_VERSION:
+        return
+    # IMMEDIATE takes the write lock up front: a second process waits here
+    # and then finds the upgrade done
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        if conn.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+            for statement in SCHEMA.split(";"):
+                if statement.strip():
+                    conn.execute(statement)
+            create_search_index(conn)
+            create_stats_tables(conn)
+            conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+    except BaseException:
+        conn.rollback()
+        raise
+    conn.commit()
+
+
+def split_list(value):
+    """'A, B' -> ['A', 'B']; the 'None' placeholders become []"""
+    if isinstance(value, (list, tuple)):
+        return list(value)
+    if not value or value in ("None", "None specified"):
+        return []
+    return [part.strip() for part in value.split(",") if part.strip()]
+
+
+def _int_or_none(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def insert_summary(conn, summary, now=None):
+    """Insert one collect_summary_data() dict; returns the new visit id.
+
+    A summary carrying a "visit_id" (a record reopened from the worklist)
+    replaces that visit instead of adding a new one. Runs inside the
+    caller's transaction, together with the search index and statistics
+    updates.
+    """
+    now = now or datetime.now().isoformat(timespec="seconds")
+    p = summary.get("patient_info", {})
+    v = summary.get("visit_info", {})
+    f = summary.get("findings", {})
+    imaging = summary.get("imaging", {})
+    ai = summary.get("ai_analysis") or {}
+
+    contact = p.get("Contact")
+    conn.execute(
+        """INSERT INTO patients (patient_id, name, date_of_birth, age, sex, menopausal_status,
+                                 contact, created_at, updated_at)
+           VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+           ON CONFLICT(patient_id) DO UPDATE SET
+               name=excluded.name, date_of_birth=excluded.date_of_birth, age=excluded.age,
+               sex=excluded.sex, menopausal_status=excluded.menopausal_status,
+               contact=excluded.contact, updated_at=excluded.updated_at""",
+        (p.get("Patient ID"), p.get("Name/Code"), p.get("Date of Birth"), _int_or_none(p.get("Age")),
+         p.get("Sex"), p.get("Menopausal Status"),
+         None if contact == "Not provided" else contact, now, now),
+    )
+    patient_ref = conn.execute(
+        "SELECT id FROM patients WHERE patient_id = ?", (p.get("Patient ID"),)
+    ).fetchone()[0]
+
+    values = (patient_ref, v.get("Study ID"), v.get("Study Date"), v.get("Imaging Modality"),
+              v.get("Examination Type"), ", ".join(split_list(v.get("Techniques"))),
+              v.get("Health Facility"), v.get("Reporting Clinician"),
+              ai.get("status"), ai.get("score"), ai.get("label"), ai.get("model_version"), now)
+    visit_id = summary.get("visit_id")
+    if visit_id is not None:
+        # Its old day, facility, findings and indicators come out of the statistics
+        remove_visit(conn, visit_id)
+        cur = conn.execute(
+            """UPDATE visits SET patient_ref=?, study_id=?, study_date=?, modality=?,
+                                 examination_type=?, techniques=?, facility=?, clinician=?,
+                                 ai_status=?, ai_score=?, ai_label=?, ai_model_version=?,
+                                 submitted_at=?
+               WHERE id = ?""",
+            values + (visit_id,),
+        )
+        if cur.rowcount == 0:
+            raise KeyError(f"Visit {visit_id} does not exist")
+        for table in ("findings", "indicators", "images"):
+            conn.execute(f"DELETE FROM {table} WHERE visit_id = ?", (visit_id,))
+    else:
+        cur = conn.execute(
+            """INSERT INTO visits (patient_ref, study_id, study_date, modality, examination_type,
+                                   techniques, facility, clinician, ai_status, ai_score, ai_label,
+                                   ai_model_version, submitted_at)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+            values,
+        )
+        visit_id = cur.lastrowid
+
+    conn.executemany(
+        "INSERT OR IGNORE INTO findings (visit_id, side, finding) VALUES (?, ?, ?)",
+        [(visit_id, "right", name) for name in split_list(f.get("Right Breast Findings"))]
+        + [(visit_id, "left", name) for name in split_list(f.get("Left Breast Findings"))],
+    )
+    conn.executemany(
+        "INSERT OR IGNORE INTO indicators (visit_id, indicator) VALUES (?, ?)",
+        [(visit_id, name) for name in summary.get("indicators", [])],
+    )
+    if imaging:
+        # One row per image of the study; a record without images still keeps its metadata
+        paths = image_paths(imaging) or [None]
+        conn.executemany(
+            """INSERT INTO images (visit_id, path, file_name, image_type, laterality, image_date,
+                                   reference_id, description)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+            [(visit_id, path, os.path.basename(path) if path else imaging.get("Image File"),
+              imaging.get("Image Type"), imaging.get("Laterality"), imaging.get("Image Date"),
+              imaging.get("Image Reference ID"), imaging.get("Description"))
+             for path in paths],
+        )
+    index_patient(conn, patient_ref)
+    add_visit(conn, visit_id)
+    return visit_id
+
+
+def insert_summaries(conn, summaries):
+    """Insert many summaries in one transaction; returns their visit ids"""
+    now = datetime.now().isoformat(timespec="seconds")
+    with conn:
+        return [insert_summary(conn, summary, now) for summary in summaries]
+
+
+def load_summary(conn, visit_id):
+    """Rebuild the collect_summary_data() dict for a stored visit"""
+    visit = conn.execute(
+        """SELECT v.*, p.patient_id, p.name, p.date_of_birth, p.age, p.sex,
+                  p.menopausal_status, p.contact
+           FROM visits v JOIN patients p ON p.id = v.patient_ref
+           WHERE v.id = ?""",
+        (visit_id,),
+    ).fetchone()
+    if visit is None:
+        return None
+
+    findings = {"right": [], "left": []}
+    for row in conn.execute("SELECT side, finding FROM findings WHERE visit_id = ?", (visit_id,)):
+        findings[row["side"]].append(row["finding"])
+    indicators = [row["indicator"] for row in
+                  conn.execute("SELECT indicator FROM indicators WHERE visit_id = ?", (visit_id,))]
+    images = conn.execute("SELECT * FROM images WHERE visit_id = ? ORDER BY id", (visit_id,)).fetchall()
+
+    summary = {
+        "visit_id": visit_id,
+        "patient_info": {
+            "Patient ID": visit["patient_id"],
+            "Name/Code": visit["name"],
+            "Date of Birth": visit["date_of_birth"],
+            "Age": str(visit["age"]) if visit["age"] is not None else "",
+            "Sex": visit["sex"],
+            "Menopausal Status": visit["menopausal_status"],
+            "Contact": visit["contact"] or "Not provided",
+        },
+        "visit_info": {
+            "Study ID": visit["study_id"],
+            "Study Date": visit["study_date"],
+            "Imaging Modality": visit["modality"],
+            "Examination Type": visit["examination_type"],
+            "Techniques": visit["techniques"] or "None specified",
+            "Health Facility": visit["facility"],
+            "Reporting Clinician": visit["clinician"],
+        },
+        "findings": {
+            "Right Breast Findings": ", ".join(findings["right"]) or "None",
+            "Left Breast Findings": ", ".join(findings["left"]) or "None",
+        },
+        "indicators": indicators,
+        "imaging": {},
+    }
+    if images:
+        image = images[0]
+        paths = [row["path"] for row in images if row["path"]]
+        summary["imaging"] = {
+            "Image Type": image["image_type"],
+            "Laterality": image["laterality"],
+            "Image Date": image["image_date"],
+            "Image Reference ID": image["reference_id"],
+            "Image File": ", ".join(row["file_name"] or "" for row in images),
+            "Description": image["description"],
+            "path": paths[0] if paths else None,
+            "paths": paths,
+        }
+    if visit["ai_status"]:
+        summary["ai_analysis"] = {
+            "status": visit["ai_status"],
+            "score": visit["ai_score"],
+            "label": visit["ai_label"],
+            "model_version": visit["ai_model_version"],
+        }
+    return summary
+
+
+# Worklist columns: (header, SQL sort expression). NULLs are folded into a
+# value so the keyset comparison in query_visits works on every column, and
+# the schema has an index on each expression so sorting never scans.
+WORKLIST_COLUMNS = [
+    ("Patient ID", "p.patient_id"),
+    ("Name / Code", "COALESCE(p.name, '')"),
+    ("Study ID", "COALESCE(v.study_id, '')"),
+    ("Study Date", "COALESCE(v.study_date, '')"),
+    ("Modality", "COALESCE(v.modality, '')"),
+    ("Facility", "COALESCE(v.facility, '')"),
+    ("AI Result", "COALESCE(v.ai_label, '')"),
+    ("Submitted", "v.submitted_at"),
+]
+
+# Trailing patient row id: the tie-breaker for the patient columns
+_WORKLIST_FIELDS = "SELECT v.id, " + ", ".join(expr for _, expr in WORKLIST_COLUMNS) + ", p.id"
+_WORKLIST_SELECT = _WORKLIST_FIELDS + " FROM visits v JOIN patients p ON p.id = v.patient_ref"
+# Sorting on a patient column walks the patients index and reads each
+# patient's visits through idx_visits_patient, so the join order is fixed
+_WORKLIST_SELECT_BY_PATIENT = _WORKLIST_FIELDS + " FROM patients p CROSS JOIN visits v ON p.id = v.patient_ref"
+
+
+def _worklist_filter(conn, text):
+    """WHERE clause + params for the worklist filter box.
+
+    Three or more characters go through the patient search index (substring
+    match on ID, name/code, contact and study IDs); shorter ones are a prefix
+    match.
+    """
+    if not text:
+        return "", []
+    query = match_query(text)
+    if query is not None and has_search_index(conn):
+        return "p.id IN (SELECT rowid FROM patient_search WHERE patient_search MATCH ?)", [query]
+    pattern = text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+    clause = ("(p.patient_id LIKE ? ESCAPE '\\' OR p.name LIKE ? ESCAPE '\\'"
+              " OR v.study_id LIKE ? ESCAPE '\\')")
+    return clause, [pattern] * 3
+
+
+def count_visits(conn, text="", cap=None):
+    """Number of visits matching the filter; stops counting past cap if given"""
+    clause, params = _worklist_filter(conn, text)
+    sql = "SELECT 1 FROM visits v JOIN patients p ON p.id = v.patient_ref"
+    sql += " WHERE " + clause if clause else ""
+    if cap is not None:
+        sql += " LIMIT ?"
+        params = params + [cap + 1]
+    return conn.execute(f"SELECT COUNT(*) FROM ({sql})", params).fetchone()[0]
+
+
+def query_visits(conn, text="", sort_column=7, descending=True, after=None, limit=200):
+    """One page of worklist rows: (visit_id, *WORKLIST_COLUMNS values, patient row id).
+
+    Paging is keyset based: pass the last row of the previous page as after
+    to get the next one, so page 500 costs the same as page 1 (OFFSET would
+    rescan every row before it). Sorting and filtering happen in SQL.
+    """
+    expr = WORKLIST_COLUMNS[sort_column][1]
+    op, direction = ("<", "DESC") if descending else (">", "ASC")
+    by_patient = expr.startswith(("p.", "COALESCE(p."))
+    # Ties come out of the index walk by visit id, or by patient then visit
+    ties = ["p.id", "v.id"] if by_patient else ["v.id"]
+    select = _WORKLIST_SELECT_BY_PATIENT if by_patient else _WORKLIST_SELECT
+    clause, params = _worklist_filter(conn, text)
+    clauses = [clause] if clause else []
+    if after is None:
+        steps = [(clauses, params, [expr] + ties)]
+    else:
+        value = after[sort_column + 1]
+        tie_values = [after[-1], after[0]] if by_patient else [after[0]]
+        # Two index seeks, the rest of the rows sharing the last value and then
+        # the rows past it; a single OR-ed condition makes SQLite walk the
+        # index from the start
+        steps = [
+            (clauses + [f"{expr} = ?", f"({', '.join(ties)}) {op} ({', '.join('?' * len(ties))})"],
+             params + [value] + tie_values, ties),
+            (clauses + [f"{expr} {op} ?"], params + [value], [expr] + ties),
+        ]
+    rows = []
+    for step_clauses, step_params, keys in steps:
+        sql = select + (" WHERE " + " AND ".join(step_clauses) if step_clauses else "")
+        sql += " ORDER BY " + ", ".join(f"{key} {direction}" for key in keys) + " LIMIT ?"
+        rows.extend(tuple(row) for row in conn.execute(sql, step_params + [limit - len(rows)]))
+        if len(rows) >= limit:
+            break
+    return rows
+
+
+class RecordWriter:
+    """Background writer that batches submissions into few transactions.
+
+    submit() never touches the database on the caller's thread; it queues the
+    summary and returns a Future resolved with the visit id once the batch
+    holding it has been committed. A batch is committed when it reaches
+    batch_size summaries or when max_delay seconds have passed since its first
+    summary arrived. If the store cannot be opened, every queued and later
+    submission fails with that error; submitting after close() raises.
+    """
+
+    _STOP = object()
+
+    def __init__(self, db_path=None, batch_size=100, max_delay=0.25):
+        self.db_path = db_path or default_db_path()
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._closed = False
+        self._error = None
+        self._thread = threading.Thread(target=self._run, name="RecordWriter", daemon=True)
+        self._thread.start()
+
+    def submit(self, summary):
+        future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("RecordWriter is closed")
+            if self._error is not None:
+                future.set_exception(self._error)
+            else:
+                self._queue.put((summary, future))
+        return future
+
+    def close(self, timeout=None):
+        """Flush everything queued so far and stop the writer thread"""
+        with self._lock:
+            if not self._closed:
+                self._closed = True
+                self._queue.put(self._STOP)
+        self._thread.join(timeout)
+
+    def _run(self):
+        conn = None
+        try:
+            conn = connect(self.db_path)
+            init_db(conn)
+        except Exception as e:
+            if conn is not None:
+                conn.close()
+            with self._lock:
+                self._error = e
+            # Nothing can be queued past this point; fail what already was
+            while True:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    return
+                if item is not self._STOP:
+                    item[1].set_exception(e)
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is self._STOP:
+                break
+            batch = [item]
+            deadline = time.monotonic() + self.max_delay
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is self._STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._write(conn, batch)
+        conn.close()
+
+    def _write(self, conn, batch):
+        try:
+            visit_ids = insert_summaries(conn, [summary for summary, _ in batch])
+        except Exception:
+            # One bad record must not lose the rest of the batch
+            for summary, future in batch:
+                try:
+                    future.set_result(insert_summaries(conn, [summary])[0])
+                except Exception as e:
+                    future.set_exception(e)
+        else:
+            for (_, future), visit_id in zip(batch, visit_ids):
+                future.set_result(visit_id)
@@ -0,0 +1,21 @@
+from core.core import core
+from imaging.thumbnails import get_thumbnail_cache
+
+DEFAULT_ENCODING = {"format": "JPEG", "quality": 85}
+
+
+def prepare_report_image(image_path, modality, width, height, dpi=None):
+    """Return the path of a copy of image_path resampled for a width x height
+    box (in points) at the configured DPI and re-encoded for the modality.
+
+    The copy comes from the shared thumbnail cache, keyed by content hash,
+    pixel size and encoding, so regenerating a report reuses the file from
+    the previous build.
+    """
+    config = core()
+    dpi = dpi or config["report_image_dpi"]
+    encoding = config["report_image_encoding"].get(modality, DEFAULT_ENCODING)
+    target = (max(1, round(width / 72.0 * dpi)), max(1, round(height / 72.0 * dpi)))
+    return get_thumbnail_cache().get_path(
+        image_path, target, encoding["format"].upper(), encoding.get("quality")
+    )
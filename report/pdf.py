@@ -0,0 +1,260 @@
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image, HRFlowable
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.pagesizes import A4
+from reportlab.lib import colors
+from reportlab.lib.units import inch
+from reportlab.lib.colors import HexColor
+
+from imaging.formats import image_paths
+from report.images import prepare_report_image
+
+logger = logging.getLogger(__name__)
+
+
+class HRGradient(HRFlowable):
+    """Custom horizontal line with gradient effect"""
+    def draw(self):
+        self.canv.setStrokeColor(HexColor("#e02793"))
+        self.canv.setLineWidth(2)
+        self.canv.line(0, 0, self.width, 0)
+
+
+# Color Palette
+PRIMARY_COLOR = HexColor("#2c3e50")   # Dark Navy
+ACCENT_COLOR = HexColor("#e02793")    # Clinical Blue
+TEXT_COLOR = HexColor("#2d3436")      # Soft Black
+BORDER_COLOR = HexColor("#dfe6e9")    # Light Grey
+
+
+class ReportTemplate:
+    """Everything in a report that doesn't depend on the patient.
+
+    The style sheet, the custom paragraph styles and the table styles are
+    built once per process (see get_template()). Flowables are not cached:
+    reportlab changes them while laying out a document, so header(),
+    section_header() and footer() make new ones for every build.
+    """
+
+    def __init__(self):
+        styles = getSampleStyleSheet()
+
+        # Custom Styles
+        styles.add(ParagraphStyle(
+            name="MainTitle",
+            fontSize=22,
+            fontName="Helvetica-Bold",
+            textColor=PRIMARY_COLOR,
+            alignment=0, # Left aligned
+            spaceAfter=10
+        ))
+
+        styles.add(ParagraphStyle(
+            name="ClinicHeader",
+            fontSize=10,
+            textColor=colors.grey,
+            alignment=2, # Right aligned
+        ))
+
+        styles.add(ParagraphStyle(
+            name="SectionHeader",
+            fontSize=12,
+            fontName="Helvetica-Bold",
+            textColor=ACCENT_COLOR,
+            textTransform='UPPERCASE',
+            spaceBefore=20,
+            spaceAfter=10
+        ))
+        self.styles = styles
+
+        self.header_table_style = TableStyle([('VALIGN', (0,0), (-1,-1), 'BOTTOM')])
+        self.patient_table_style = TableStyle([
+            ('BACKGROUND', (0, 0), (-1, -1), HexColor("#f8f9fa")),
+            ('BOX', (0, 0), (-1, -1), 0.5, BORDER_COLOR),
+            ('LEFTPADDING', (0, 0), (-1, -1), 10),
+            ('TOPPADDING', (0, 0), (-1, -1), 10),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
+        ])
+        self.findings_table_style = TableStyle([
+            ('INNERGRID', (0, 0), (-1, -1), 0.25, BORDER_COLOR),
+            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+            ('TOPPADDING', (0, 0), (-1, -1), 8),
+        ])
+        self.image_table_style = TableStyle([
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('BOX', (0, 0), (-1, -1), 1, PRIMARY_COLOR),
+        ])
+        self.signature_table_style = TableStyle([('ALIGN', (1, 1), (1, 1), 'CENTER')])
+        self.header_col_widths = [3.5 * inch, 2.5 * inch]
+
+    def header(self):
+        header_data = [
+            [
+                Paragraph("MEDICAL SCREENING REPORT", self.styles["MainTitle"]),
+                Paragraph("<b>Jimma Medical Center</b><br/>123 Health , NY<br/>Phone: +251965492118", self.styles["ClinicHeader"])
+            ]
+        ]
+        header_table = Table(header_data, colWidths=self.header_col_widths)
+        header_table.setStyle(self.header_table_style)
+        return [
+            header_table,
+            HRFlowable(width="100%", thickness=1, color=PRIMARY_COLOR, spaceBefore=5, spaceAfter=20),
+        ]
+
+    def section_header(self, title):
+        return Paragraph(title, self.styles["SectionHeader"])
+
+    def footer(self):
+        # Signature Line
+        sig_data = [["", "__________________________"], ["", "Authorized Physician Signature"]]
+        sig_table = Table(sig_data, colWidths=self.header_col_widths)
+        sig_table.setStyle(self.signature_table_style)
+        return [
+            Spacer(1, 40),
+            sig_table,
+            Spacer(1, 30),
+            Paragraph(
+                "This is a confidential medical record. Generated by BCD Systems 2025.",
+                self.styles["ClinicHeader"]
+            ),
+        ]
+
+
+_template = None
+
+
+def get_template():
+    """The per-process ReportTemplate"""
+    global _template
+    if _template is None:
+        _template = ReportTemplate()
+    return _template
+
+
+def build_report(summary_data, file_path, template=None):
+    """Build the PDF screening report for one summary dict (as produced by
+    BreastScreeningApp.collect_summary_data) and write it to file_path."""
+    template = template or get_template()
+    styles = template.styles
+
+    # Configuration
+    doc = SimpleDocTemplate(
+        file_path,
+        pagesize=A4,
+        rightMargin=50, leftMargin=50, topMargin=50, bottomMargin=50
+    )
+
+    story = template.header()
+
+    # --- 2. PATIENT INFO (2-Column Layout) ---
+    story.append(template.section_header("Patient Profile"))
+
+    p_info = summary_data.get("patient_info", {})
+    # Chunking data into pairs for a 2-column table layout
+    items = list(p_info.items())
+    table_data = []
+    for i in range(0, len(items), 2):
+        row = []
+        # Column 1
+        row.append(Paragraph(f"<b>{items[i][0]}:</b> {items[i][1]}", styles["Normal"]))
+        # Column 2 (if exists)
+        if i + 1 < len(items):
+            row.append(Paragraph(f"<b>{items[i+1][0]}:</b> {items[i+1][1]}", styles["Normal"]))
+        else:
+            row.append("")
+        table_data.append(row)
+
+    patient_table = Table(table_data, colWidths=[3 * inch, 3 * inch])
+    patient_table.setStyle(template.patient_table_style)
+    story.append(patient_table)
+
+    # --- 3. CLINICAL FINDINGS ---
+    story.append(template.section_header("Examination Findings"))
+
+    findings = summary_data.get("findings", {})
+    findings_data = [[Paragraph(f"<b>{k}</b>", styles["Normal"]), Paragraph(str(v), styles["Normal"])] for k, v in findings.items()]
+
+    findings_table = Table(findings_data, colWidths=[2 * inch, 4 * inch])
+    findings_table.setStyle(template.findings_table_style)
+    story.append(findings_table)
+
+    # --- 4. IMAGING SECTION ---
+    imaging = summary_data.get("imaging", {})
+    paths = [path for path in image_paths(imaging) if os.path.exists(path)]
+
+    if paths:
+        story.append(template.section_header("Imaging Analysis"))
+        # Professional Frame for the Image; studies with several views get a 2-column grid
+        if len(paths) == 1:
+            width, height, columns = 4.0 * inch, 2.8 * inch, 1
+        else:
+            width, height, columns = 2.8 * inch, 2.0 * inch, 2
+        cells = []
+        for path in paths:
+            try:
+                embedded_path = prepare_report_image(path, imaging.get("Image Type"), width, height)
+            except (OSError, ValueError) as e:
+                # Unreadable by PIL (or the cache unwritable); let reportlab try the original
+                logger.warning("Embedding %s unresampled: %s", path, e)
+                embedded_path = path
+            cells.append(Image(embedded_path, width=width, height=height))
+        rows = [cells[i:i + columns] for i in range(0, len(cells), columns)]
+        if len(rows[-1]) < columns:
+            rows[-1].append("")
+        img_table = Table(rows, colWidths=[6 * inch / columns] * columns)
+        img_table.setStyle(template.image_table_style)
+        story.append(img_table)
+        story.append(Spacer(1, 10))
+        story.append(Paragraph(f"<i>Source: {imaging.get('type', 'Radiology Scan')}</i>", styles["ClinicHeader"]))
+
+    ai_analysis = summary_data.get("ai_analysis") or {}
+    if ai_analysis.get("status") == "ok":
+        story.append(Paragraph(
+            f"<b>AI Result:</b> {ai_analysis['label']} (score {ai_analysis['score']:.2f}, "
+            f"model {ai_analysis.get('model_version', 'unknown')})",
+            styles["Normal"]
+        ))
+
+    # --- 5. FOOTER & SIGNATURE ---
+    story.extend(template.footer())
+
+    # Build PDF
+    doc.build(story)
+    return file_path
+
+
+def build_report_timed(summary_data, file_path):
+    """build_report() that never raises; returns the path, build time and error.
+
+    Top-level so it can be sent to a process pool.
+    """
+    start = time.perf_counter()
+    try:
+        build_report(summary_data, file_path)
+        error = None
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    return {"path": file_path, "seconds": time.perf_counter() - start, "error": error}
+
+
+def build_reports(jobs, workers=None):
+    """Build many reports concurrently in a process pool.
+
+    jobs is an iterable of (summary_data, file_path) pairs. Returns one
+    build_report_timed() dict per job, in job order.
+    """
+    jobs = list(jobs)
+    if not jobs:
+        return []
+    workers = min(workers or os.cpu_count() or 1, len(jobs))
+    chunksize = max(1, len(jobs) // (workers * 4))
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        summaries, paths = zip(*jobs)
+        return list(pool.map(build_report_timed, summaries, paths, chunksize=chunksize))
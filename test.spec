@@ -6,7 +6,8 @@ a = Analysis(
     pathex=[],
     binaries=[],
   
-    hiddenimports=[],
+    # Imported lazily after the window is shown (see DEFERRED_MODULES in main.py)
+    hiddenimports=['report.pdf', 'ai.analysis', 'imaging.thumbnails'],
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
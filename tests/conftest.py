@@ -0,0 +1,46 @@
+import pytest
+
+from records.store import connect, init_db
+
+
+@pytest.fixture
+def store(tmp_path):
+    """A fresh record store in a temporary directory"""
+    conn = connect(str(tmp_path / "store.db"))
+    init_db(conn)
+    yield conn
+    conn.close()
+
+
+@pytest.fixture
+def make_summary():
+    """Builder for collect_summary_data() dicts with only the fields a test cares about"""
+    def make(patient_id, name=None, study_id=None, study_date=None, modality=None, facility=None,
+             ai_label=None, right=(), left=(), indicators=(), contact=None, date_of_birth=None,
+             visit_id=None):
+        summary = {
+            "patient_info": {
+                "Patient ID": patient_id,
+                "Name/Code": name,
+                "Date of Birth": date_of_birth,
+                "Contact": contact or "Not provided",
+            },
+            "visit_info": {
+                "Study ID": study_id,
+                "Study Date": study_date,
+                "Imaging Modality": modality,
+                "Health Facility": facility,
+            },
+            "findings": {
+                "Right Breast Findings": ", ".join(right) or "None",
+                "Left Breast Findings": ", ".join(left) or "None",
+            },
+            "indicators": list(indicators),
+            "imaging": {},
+        }
+        if ai_label is not None:
+            summary["ai_analysis"] = {"status": "ok", "score": 0.5, "label": ai_label, "model_version": "test"}
+        if visit_id is not None:
+            summary["visit_id"] = visit_id
+        return summary
+    return make
@@ -0,0 +1,99 @@
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from ai.batching import BatchingQueue
+
+
+class FakeEngine:
+    """Scores each image by its mean and records the size of every forward pass"""
+    def __init__(self, gate=None, error=None):
+        self.gate = gate
+        self.error = error
+        self.batch_sizes = []
+        self.started = threading.Event()
+
+    def classify(self, batch):
+        self.batch_sizes.append(len(batch))
+        self.started.set()
+        if self.gate is not None:
+            self.gate.wait(5)
+        if self.error is not None:
+            raise self.error
+        return [{"score": float(image.mean())} for image in batch]
+
+
+def image(value):
+    return np.full((4, 4), value, dtype=np.float32)
+
+
+def test_concurrent_callers_share_one_forward_pass():
+    engine = FakeEngine()
+    batching = BatchingQueue(engine, max_batch_size=2, max_wait=5.0)
+    results = {}
+
+    def call(value):
+        results[value] = batching.classify([image(value)], timeout=5)
+
+    threads = [threading.Thread(target=call, args=(value,)) for value in (0.25, 0.75)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    batching.close(5)
+    assert engine.batch_sizes == [2]
+    assert results == {0.25: [{"score": 0.25}], 0.75: [{"score": 0.75}]}
+    assert batching.fill_ratio == 1.0
+
+
+def test_a_partial_batch_goes_after_max_wait():
+    engine = FakeEngine()
+    batching = BatchingQueue(engine, max_batch_size=8, max_wait=0.01)
+    assert batching.classify([image(0.5)], timeout=5) == [{"score": 0.5}]
+    batching.close(5)
+    assert engine.batch_sizes == [1]
+
+
+def test_classify_after_close_fails_fast():
+    batching = BatchingQueue(FakeEngine(), max_batch_size=4, max_wait=0.01)
+    batching.close(5)
+    started = time.perf_counter()
+    with pytest.raises(RuntimeError, match="closed"):
+        batching.classify([image(0.5)], timeout=5)
+    assert time.perf_counter() - started < 1
+    # Closing twice is harmless
+    batching.close(5)
+
+
+def test_close_finishes_requests_already_queued():
+    gate = threading.Event()
+    engine = FakeEngine(gate)
+    batching = BatchingQueue(engine, max_batch_size=2, max_wait=0.0)
+    first = batching.submit(image(0.1))
+    assert engine.started.wait(5)
+    # These wait behind the forward pass that is holding the thread
+    queued = [batching.submit(image(value)) for value in (0.2, 0.3, 0.4)]
+    closer = threading.Thread(target=batching.close, args=(5,))
+    closer.start()
+    gate.set()
+    closer.join(5)
+    assert not closer.is_alive()
+    assert [future.result(0)["score"] for future in [first] + queued] == pytest.approx([0.1, 0.2, 0.3, 0.4])
+
+
+@pytest.mark.filterwarnings("ignore::pytest.PytestUnhandledThreadExceptionWarning")
+def test_requests_are_rejected_when_the_thread_dies():
+    gate = threading.Event()
+    engine = FakeEngine(gate, error=SystemExit())
+    batching = BatchingQueue(engine, max_batch_size=1, max_wait=0.0)
+    first = batching.submit(image(0.1))
+    assert engine.started.wait(5)
+    queued = batching.submit(image(0.2))
+    gate.set()
+    batching._thread.join(5)
+    assert isinstance(first.exception(0), SystemExit)
+    assert isinstance(queued.exception(0), RuntimeError)
+    with pytest.raises(RuntimeError):
+        batching.submit(image(0.3))
@@ -0,0 +1,93 @@
+import os
+import time
+
+import numpy as np
+import pytest
+
+import ai.analysis as analysis
+import ai.executor as executor_module
+from ai.executor import InferenceWorkerCrashed, ProcessInferenceExecutor
+from ai.model import InferenceEngine, get_engine, init_random_weights
+
+
+@pytest.fixture
+def model_dir(tmp_path):
+    path = str(tmp_path / "weights")
+    init_random_weights(path)
+    return path
+
+
+@pytest.fixture
+def make_executor():
+    executors = []
+
+    def make(model_dir, **kwargs):
+        executor = ProcessInferenceExecutor(processes=1, model_dir=model_dir, **kwargs)
+        executors.append(executor)
+        return executor
+    yield make
+    for executor in executors:
+        executor.close()
+
+
+def wait_for(condition, timeout=30):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.05)
+
+
+def batch_for(executor, count=2):
+    return np.random.default_rng(0).random((count,) + executor.input_size).astype(np.float32)
+
+
+def test_classify_in_a_worker_process(model_dir, make_executor):
+    executor = make_executor(model_dir)
+    batch = batch_for(executor, 3)
+    expected = [result["score"] for result in InferenceEngine(model_dir).classify(batch)]
+    assert [result["score"] for result in executor.classify(batch)] == pytest.approx(expected)
+
+
+def test_a_killed_worker_is_replaced(model_dir, make_executor):
+    executor = make_executor(model_dir)
+    executor.warm_up()
+    executor.classify(batch_for(executor))
+    worker = executor._workers[0]
+    worker.kill()
+    worker.join(10)
+    # The request either lands on the dead worker and fails, or waits for its
+    # replacement; it never hangs
+    future = executor.submit(batch_for(executor))
+    try:
+        assert len(future.result(30)) == 2
+    except InferenceWorkerCrashed:
+        pass
+    wait_for(lambda: executor.restarts == 1)
+    assert executor._workers[0] is not worker
+    assert len(executor.classify(batch_for(executor))) == 2
+    assert executor.is_available()
+
+
+def test_workers_that_keep_dying_exhaust_the_restart_budget(model_dir, make_executor, monkeypatch):
+    executor = make_executor(model_dir, max_restarts=2)
+    executor.engine.load()
+    # The parent has its weights mapped; workers started from now on find a
+    # broken file and exit before taking any work
+    broken = os.path.join(model_dir, "w1.npy.tmp")
+    with open(broken, "wb") as f:
+        f.write(b"not an array")
+    os.replace(broken, os.path.join(model_dir, "w1.npy"))
+
+    future = executor.submit(batch_for(executor))
+    with pytest.raises(InferenceWorkerCrashed):
+        future.result(60)
+    wait_for(lambda: executor.failed is not None, timeout=60)
+    assert executor.restarts == 2
+    assert not executor.is_available()
+    with pytest.raises(RuntimeError):
+        executor.submit(batch_for(executor))
+
+    # ai.analysis falls back to the in-process engine
+    monkeypatch.setattr(executor_module, "_executor", executor)
+    monkeypatch.setattr(analysis, "core", lambda: {"inference_server": "", "inference_executor": "process"})
+    assert analysis.current_engine() is get_engine()
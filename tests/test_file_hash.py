@@ -0,0 +1,31 @@
+import hashlib
+import os
+
+import helper.file_hash as file_hash
+from helper.file_hash import file_digest
+
+
+def test_digest_follows_content(tmp_path):
+    path = tmp_path / "scan.dcm"
+    path.write_bytes(b"first")
+    assert file_digest(str(path)) == hashlib.sha256(b"first").hexdigest()
+    path.write_bytes(b"second!")
+    os.utime(path, ns=(0, 10 ** 9))
+    assert file_digest(str(path)) == hashlib.sha256(b"second!").hexdigest()
+
+
+def test_memo_keeps_only_the_recently_used_files(tmp_path, monkeypatch):
+    monkeypatch.setattr(file_hash, "_MAX_DIGESTS", 3)
+    monkeypatch.setattr(file_hash, "_digests", file_hash.OrderedDict())
+    paths = []
+    for i in range(5):
+        path = tmp_path / f"{i}.png"
+        path.write_bytes(bytes([i]))
+        paths.append(str(path))
+    for path in paths[:3]:
+        file_digest(path)
+    # Using the first file again keeps it over the second
+    file_digest(paths[0])
+    file_digest(paths[3])
+    file_digest(paths[4])
+    assert [key[0] for key in file_hash._digests] == [os.path.abspath(p) for p in (paths[0], paths[3], paths[4])]
@@ -0,0 +1,100 @@
+import re
+import threading
+from datetime import datetime
+
+import pytest
+
+import helper.generate_id as generate_id
+from helper.generate_id import MAX_PER_DAY, PatientIdAllocator, encode_sequence
+
+
+class FakeDatetime:
+    """Stands in for datetime in helper.generate_id so tests choose the day"""
+    day = datetime(2024, 3, 1)
+
+    @classmethod
+    def now(cls):
+        return cls.day
+
+
+@pytest.fixture
+def fake_day(monkeypatch):
+    monkeypatch.setattr(generate_id, "datetime", FakeDatetime)
+    FakeDatetime.day = datetime(2024, 3, 1)
+    return FakeDatetime
+
+
+def read_counter(state_dir, name):
+    return int((state_dir / name).read_text())
+
+
+def test_encode_sequence():
+    assert encode_sequence(0) == "0000"
+    assert encode_sequence(35) == "000Z"
+    assert encode_sequence(36) == "0010"
+    assert encode_sequence(MAX_PER_DAY - 1) == "ZZZZ"
+
+
+def test_id_format(tmp_path):
+    allocator = PatientIdAllocator(state_dir=str(tmp_path))
+    assert re.fullmatch(r"BC-\d{8}-[0-9A-Z]{4}", allocator.next_id())
+
+
+def test_reserves_blocks_not_single_ids(tmp_path, fake_day):
+    allocator = PatientIdAllocator(state_dir=str(tmp_path), block_size=4)
+    ids = [allocator.next_id() for _ in range(4)]
+    assert ids == [f"BC-20240301-000{i}" for i in range(4)]
+    assert read_counter(tmp_path, "BC-20240301.seq") == 4
+    allocator.next_id()
+    assert read_counter(tmp_path, "BC-20240301.seq") == 8
+
+
+def test_allocators_sharing_a_directory_never_collide(tmp_path, fake_day):
+    # Two allocators stand in for two processes on the same machine
+    first = PatientIdAllocator(state_dir=str(tmp_path), block_size=3)
+    second = PatientIdAllocator(state_dir=str(tmp_path), block_size=3)
+    ids = [allocator.next_id() for _ in range(10) for allocator in (first, second)]
+    assert len(set(ids)) == len(ids)
+
+
+def test_unique_across_threads(tmp_path):
+    allocator = PatientIdAllocator(state_dir=str(tmp_path), block_size=16)
+    ids = []
+    lock = threading.Lock()
+
+    def take():
+        mine = [allocator.next_id() for _ in range(200)]
+        with lock:
+            ids.extend(mine)
+
+    threads = [threading.Thread(target=take) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(set(ids)) == 1600
+
+
+def test_new_day_starts_a_new_sequence(tmp_path, fake_day):
+    allocator = PatientIdAllocator(state_dir=str(tmp_path), block_size=64)
+    allocator.next_id()
+    allocator.next_id()
+    fake_day.day = datetime(2024, 3, 2)
+    # The rest of the old day's block is not carried over
+    assert allocator.next_id() == "BC-20240302-0000"
+    assert read_counter(tmp_path, "BC-20240301.seq") == 64
+    assert read_counter(tmp_path, "BC-20240302.seq") == 64
+
+
+def test_day_space_runs_out_at_max_per_day(tmp_path, fake_day):
+    (tmp_path / "BC-20240301.seq").write_text(str(MAX_PER_DAY - 2))
+    allocator = PatientIdAllocator(state_dir=str(tmp_path), block_size=64)
+    # The last block is cut short at the end of the space
+    assert allocator.next_id() == f"BC-20240301-{encode_sequence(MAX_PER_DAY - 2)}"
+    assert allocator.next_id() == "BC-20240301-ZZZZ"
+    assert read_counter(tmp_path, "BC-20240301.seq") == MAX_PER_DAY
+    with pytest.raises(RuntimeError, match="exhausted"):
+        allocator.next_id()
+    # Another prefix has its own space
+    other = PatientIdAllocator(prefix="XY", state_dir=str(tmp_path))
+    assert other.next_id() == "XY-20240301-0000"
@@ -0,0 +1,141 @@
+import csv
+import json
+import os
+
+import pytest
+
+import records.importer as importer
+from records.importer import import_records, load_checkpoint, summaries
+from records.store import connect, load_summary
+
+HEADER = ["Patient ID", "Name", "Study Date", "Modality", "Facility", "Right: Solid mass present",
+          "Left Findings", "Indicators"]
+
+
+def write_csv(path, count, bad_every=7):
+    """count rows; every bad_every-th one has an unreadable study date"""
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(HEADER)
+        for i in range(count):
+            writer.writerow([
+                f"P{i:05d}", f"Name {i}", "someday" if i % bad_every == 0 else "12/03/2023",
+                "ultrasound", "Jimma", "yes" if i % 2 else "no", "Skin thickening; Nipple retraction",
+                "Stability over time",
+            ])
+
+
+def quiet(message):
+    pass
+
+
+def rejects_of(path):
+    with open(path + ".rejects.jsonl", encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = str(tmp_path / "history.csv")
+    write_csv(path, 100)
+    return path
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "store.db")
+
+
+def test_row_mapping_and_normalization():
+    row = dict(zip(HEADER, ["P1", "Almaz", "31/01/2024", "MRI", "Jimma", "Yes", "skin thickening", ""]))
+    (_, _, summary, errors), = summaries([(2, row, None)], log=quiet)
+    assert errors == []
+    assert summary["visit_info"]["Study Date"] == "2024-01-31 00:00"
+    assert summary["visit_info"]["Imaging Modality"] == "MRI"
+    assert summary["findings"]["Right Breast Findings"] == "Solid mass present"
+    assert summary["findings"]["Left Breast Findings"] == "Skin thickening"
+
+
+def test_import_writes_rows_and_rejects(source, db_path):
+    checkpoint = import_records(source, db_path, batch_size=30, log=quiet)
+    assert (checkpoint["rows_done"], checkpoint["imported"], checkpoint["rejected"]) == (100, 85, 15)
+    assert checkpoint["finished"] == 1
+
+    rejects = rejects_of(source)
+    assert [reject["line"] for reject in rejects] == [i + 2 for i in range(0, 100, 7)]
+    assert all("Study Date" in reject["errors"][0] for reject in rejects)
+
+    conn = connect(db_path)
+    assert conn.execute("SELECT COUNT(*) FROM visits").fetchone()[0] == 85
+    summary = load_summary(conn, 1)
+    assert summary["patient_info"]["Patient ID"] == "P00001"
+    assert summary["visit_info"]["Imaging Modality"] == "Ultrasound"
+    assert summary["findings"]["Right Breast Findings"] == "Solid mass present"
+    assert summary["findings"]["Left Breast Findings"] == "Nipple retraction, Skin thickening"
+    conn.close()
+
+
+def test_finished_import_is_not_repeated(source, db_path):
+    import_records(source, db_path, log=quiet)
+    again = import_records(source, db_path, log=quiet)
+    assert again["imported"] == 85
+    conn = connect(db_path)
+    assert conn.execute("SELECT COUNT(*) FROM visits").fetchone()[0] == 85
+    conn.close()
+
+
+def test_changed_file_needs_restart(source, db_path):
+    import_records(source, db_path, log=quiet)
+    write_csv(source, 120)
+    with pytest.raises(ValueError, match="--restart"):
+        import_records(source, db_path, log=quiet)
+    assert import_records(source, db_path, restart=True, log=quiet)["rows_done"] == 120
+    # --restart starts the rejects file over too
+    assert len(rejects_of(source)) == 18
+
+
+@pytest.mark.parametrize("flushed", [False, True])
+def test_resume_after_interruption(source, db_path, tmp_path, monkeypatch, flushed):
+    clean = str(tmp_path / "clean.db")
+    import_records(source, clean, batch_size=20, log=quiet)
+    expected_rejects = rejects_of(source)
+
+    commit = importer._commit
+    calls = []
+
+    def interrupted(conn, batch, checkpoint, reject, flush_rejects):
+        calls.append(1)
+        if len(calls) == 3:
+            # Rejects of the lost batch may or may not have reached the file
+            if flushed:
+                flush_rejects()
+            raise KeyboardInterrupt
+        commit(conn, batch, checkpoint, reject, flush_rejects)
+
+    monkeypatch.setattr(importer, "_commit", interrupted)
+    with pytest.raises(KeyboardInterrupt):
+        import_records(source, db_path, batch_size=20, log=quiet)
+    conn = connect(db_path)
+    assert load_checkpoint(conn, os.path.abspath(source))["rows_done"] == 40
+    conn.close()
+
+    monkeypatch.setattr(importer, "_commit", commit)
+    checkpoint = import_records(source, db_path, batch_size=20, log=quiet)
+    assert (checkpoint["rows_done"], checkpoint["imported"], checkpoint["rejected"]) == (100, 85, 15)
+    assert rejects_of(source) == expected_rejects
+    conn = connect(db_path)
+    assert conn.execute("SELECT COUNT(*) FROM visits").fetchone()[0] == 85
+    conn.close()
+
+
+def test_jsonl_with_nested_summaries(tmp_path, db_path):
+    path = str(tmp_path / "history.jsonl")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(json.dumps({"patient_info": {"Patient ID": "P1"}, "visit_info": {"Study Date": "2024-01-31"},
+                            "indicators": ["Stability over time"]}) + "\n")
+        f.write("{not json\n")
+    checkpoint = import_records(path, db_path, log=quiet)
+    assert (checkpoint["imported"], checkpoint["rejected"]) == (1, 1)
+    conn = connect(db_path)
+    assert load_summary(conn, 1)["indicators"] == ["Stability over time"]
+    conn.close()
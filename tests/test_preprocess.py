@@ -0,0 +1,116 @@
+import numpy as np
+import pytest
+
+Image = pytest.importorskip("PIL.Image")
+
+from ai.preprocess import (  # noqa: E402
+    decode_image, decode_images, equalize, fit_size, pad_to, preprocess, preprocess_batch, resize_bilinear,
+    to_grayscale, window_normalize
+)
+
+
+def test_to_grayscale():
+    rgb = np.zeros((2, 3, 4, 3), dtype=np.uint8)
+    rgb[..., 0] = 100
+    rgb[..., 1] = 200
+    gray = to_grayscale(rgb)
+    assert gray.shape == (2, 3, 4) and gray.dtype == np.float32
+    assert np.allclose(gray, 0.299 * 100 + 0.587 * 200)
+    # Alpha is ignored, single-channel batches pass through
+    assert np.allclose(to_grayscale(np.concatenate([rgb, rgb[..., :1]], axis=-1)), gray)
+    assert to_grayscale(np.ones((1, 2, 2), dtype=np.uint16)).dtype == np.float32
+
+
+def test_window_normalize_scales_each_image_on_its_own():
+    rng = np.random.default_rng(0)
+    batch = np.stack([rng.normal(100, 10, (32, 32)), rng.normal(5000, 800, (32, 32))]).astype(np.float32)
+    out = window_normalize(batch, 1.0, 99.0)
+    assert out.min() == 0.0 and out.max() == 1.0
+    for image in out:
+        assert image.min() == 0.0 and image.max() == 1.0
+    # A flat image does not divide by zero
+    assert np.all(window_normalize(np.full((1, 4, 4), 7.0, dtype=np.float32), 1.0, 99.0) == 0.0)
+
+
+def test_fit_size_keeps_the_aspect_ratio():
+    assert fit_size((512, 256), (256, 256)) == (256, 128)
+    assert fit_size((100, 400), (256, 256)) == (64, 256)
+    assert fit_size((1, 10000), (256, 256)) == (1, 256)
+
+
+def test_resize_bilinear():
+    assert np.allclose(resize_bilinear(np.full((2, 10, 30), 0.25, dtype=np.float32), 7, 13), 0.25)
+    ramp = np.tile(np.arange(8, dtype=np.float32), (1, 4, 1))
+    out = resize_bilinear(ramp, 4, 4)
+    assert out.shape == (1, 4, 4)
+    assert np.all(np.diff(out[0, 0]) > 0)
+    assert np.allclose(resize_bilinear(ramp, 4, 8), ramp)
+    # Colour batches are resized per channel
+    rgb = np.random.default_rng(4).integers(0, 255, (2, 40, 60, 3), dtype=np.uint8)
+    out = resize_bilinear(rgb, 10, 15)
+    assert out.shape == (2, 10, 15, 3)
+    for c in range(3):
+        assert np.allclose(out[..., c], resize_bilinear(rgb[..., c].astype(np.float32), 10, 15))
+
+
+def test_equalize():
+    rng = np.random.default_rng(1)
+    batch = rng.random((2, 16, 16)).astype(np.float32) ** 3
+    assert equalize(batch, 0.0) is batch
+    out = equalize(batch, 1.0)
+    assert out.shape == batch.shape
+    assert 0.0 <= out.min() and out.max() <= 1.0
+    # Brightness order is kept while the dark-heavy histogram is spread out
+    for image, equalized in zip(batch, out):
+        order = np.argsort(image, axis=None)
+        assert np.all(np.diff(equalized.ravel()[order]) >= 0)
+    assert np.median(out) > np.median(batch) + 0.2
+
+
+def test_pad_to_centres_the_batch():
+    out = pad_to(np.ones((1, 2, 4), dtype=np.float32), (6, 6))
+    assert out.shape == (1, 6, 6)
+    assert out.sum() == 8
+    assert np.all(out[0, 2:4, 1:5] == 1)
+
+
+def test_preprocess_keeps_the_input_order():
+    rng = np.random.default_rng(2)
+    images = [
+        rng.integers(0, 255, (40, 60), dtype=np.uint8),
+        rng.integers(0, 255, (50, 50, 3), dtype=np.uint8),
+        rng.integers(0, 255, (40, 60), dtype=np.uint8),
+        rng.integers(0, 4095, (30, 80), dtype=np.uint16),
+    ]
+    out = preprocess(images, "Mammography", size=(32, 32))
+    assert out.shape == (4, 32, 32) and out.dtype == np.float32
+    expected = preprocess_batch(np.stack([images[0], images[2]]), "Mammography", (32, 32))
+    assert np.allclose(out[[0, 2]], expected)
+    assert np.allclose(out[1], preprocess_batch(images[1][None], "Mammography", (32, 32))[0])
+    assert np.allclose(out[3], preprocess_batch(images[3][None], "Mammography", (32, 32))[0])
+
+
+def test_large_images_are_windowed_at_model_size():
+    image = np.random.default_rng(5).integers(0, 4095, (1, 2048, 1536), dtype=np.uint16)
+    out = preprocess_batch(image, "MRI", (256, 256))
+    assert out.shape == (1, 256, 256)
+    # Full window range inside the fitted area, zero padding around it
+    assert out[0, :, 32:224].min() == 0.0 and out[0, :, 32:224].max() == 1.0
+    assert not out[0, :, :32].any() and not out[0, :, 224:].any()
+
+
+def test_unknown_modality_uses_the_ultrasound_parameters():
+    image = np.random.default_rng(3).integers(0, 255, (1, 20, 20), dtype=np.uint8)
+    assert np.array_equal(preprocess_batch(image, "Thermography", (16, 16)),
+                          preprocess_batch(image, "Ultrasound", (16, 16)))
+
+
+def test_decode_image(tmp_path):
+    pixels = np.arange(48, dtype=np.uint8).reshape(4, 4, 3)
+    Image.fromarray(pixels).save(tmp_path / "rgb.png")
+    Image.fromarray(pixels[..., 0]).convert("P").save(tmp_path / "palette.png")
+    assert np.array_equal(decode_image(str(tmp_path / "rgb.png")), pixels)
+    # Palette images come back as RGB
+    assert decode_image(str(tmp_path / "palette.png")).shape == (4, 4, 3)
+    decoded = decode_images([str(tmp_path / "rgb.png"), str(tmp_path / "palette.png")])
+    assert [image.shape for image in decoded] == [(4, 4, 3), (4, 4, 3)]
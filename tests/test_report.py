@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("reportlab")
+Image = pytest.importorskip("PIL.Image")
+
+from report.pdf import ReportTemplate, build_report  # noqa: E402
+
+
+@pytest.fixture
+def long_summary(tmp_path):
+    """A summary whose findings end right where the imaging section starts, so its
+    header is pushed to the next page"""
+    image_path = tmp_path / "scan.png"
+    Image.fromarray(np.zeros((300, 400), dtype=np.uint8)).save(image_path)
+    return {
+        "patient_info": {"Patient ID": "P1"},
+        "visit_info": {},
+        "findings": {f"Finding {i}": "Irregular margins noted. " * 10 for i in range(12)},
+        "indicators": [],
+        "imaging": {"path": str(image_path), "Image Type": "Ultrasound"},
+    }
+
+
+def page_count(path):
+    with open(path, "rb") as f:
+        return f.read().count(b"/Type /Page\n")
+
+
+def test_one_template_builds_a_multi_page_report_repeatedly(tmp_path, long_summary):
+    template = ReportTemplate()
+    paths = [build_report(long_summary, str(tmp_path / f"report{i}.pdf"), template) for i in range(3)]
+    counts = [page_count(path) for path in paths]
+    assert counts[0] > 1
+    assert counts == [counts[0]] * 3
@@ -0,0 +1,77 @@
+import itertools
+import shutil
+import time
+
+import pytest
+
+import ai.result_cache as result_cache
+from ai.result_cache import ResultCache
+
+
+class FakeTime:
+    """Stands in for time in ai.result_cache so every put and get has its own timestamp"""
+    def __init__(self):
+        self._clock = itertools.count(1000)
+
+    def time(self):
+        return float(next(self._clock))
+
+    def perf_counter(self):
+        return time.perf_counter()
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(result_cache, "time", FakeTime())
+    return ResultCache(db_path=str(tmp_path / "results.db"), max_entries=100)
+
+
+@pytest.fixture
+def image(tmp_path):
+    path = tmp_path / "scan.png"
+    path.write_bytes(b"not really a png, but only the bytes matter")
+    return str(path)
+
+
+def count(cache):
+    return cache._conn().execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+
+def test_round_trip_and_counters(cache):
+    assert cache.get("a") is None
+    cache.put("a", {"score": 0.25, "label": "Benign"})
+    assert cache.get("a") == {"score": 0.25, "label": "Benign"}
+    assert (cache.hits, cache.misses, cache.hit_rate) == (1, 1, 0.5)
+
+
+def test_key_follows_content_and_model_version(cache, image, tmp_path):
+    cache.put(ResultCache.key(image, "Ultrasound", "v1"), {"score": 0.9})
+    assert cache.get(ResultCache.key(image, "Ultrasound", "v1")) == {"score": 0.9}
+    # A new model version or another modality never sees the old score
+    assert cache.get(ResultCache.key(image, "Ultrasound", "v2")) is None
+    assert cache.get(ResultCache.key(image, "MRI", "v1")) is None
+    # A copy under another name still hits
+    copy = str(tmp_path / "renamed.png")
+    shutil.copy(image, copy)
+    assert cache.get(ResultCache.key(copy, "Ultrasound", "v1")) == {"score": 0.9}
+
+
+def test_size_cap_evicts_least_recently_used(cache):
+    for i in range(64):
+        cache.put(f"key{i}", {"i": i})
+    # Below the cap nothing is evicted
+    assert count(cache) == 64
+    for i in range(64, 127):
+        cache.put(f"key{i}", {"i": i})
+        if i == 100:
+            # Keep two early entries recently used
+            cache.get("key0")
+            cache.get("key1")
+    assert count(cache) == 127
+    # The 128th put checks the size and trims back to max_entries
+    cache.put("key127", {"i": 127})
+    assert count(cache) == 100
+    assert cache.get("key0") == {"i": 0}
+    assert cache.get("key1") == {"i": 1}
+    assert cache.get("key2") is None
+    assert cache.get("key127") == {"i": 127}
@@ -0,0 +1,71 @@
+import pytest
+
+from records.search import find_duplicates, has_search_index, match_query, patient_exists, search_patients
+from records.store import insert_summaries
+
+
+@pytest.fixture
+def patients(store, make_summary):
+    if not has_search_index(store):
+        pytest.skip("SQLite was built without FTS5 trigram support")
+    insert_summaries(store, [
+        make_summary("BC-20240301-0001", name="Almaz Tesfaye", study_id="US-7781",
+                     contact="+251911223344", date_of_birth="1980-02-01"),
+        make_summary("BC-20240301-0002", name="Tigist Bekele", study_id="MG-1200"),
+        make_summary("BC-20240302-0001", name="Hirut Alemu", contact="+251922000111"),
+    ])
+    return store
+
+
+def ids(results):
+    return [patient["patient_id"] for patient in results]
+
+
+def test_match_query_needs_three_characters():
+    assert match_query("ab") is None
+    assert match_query('a"b"c') == '"a""b""c"'
+
+
+def test_substring_search_on_every_indexed_field(patients):
+    assert ids(search_patients(patients, "tesfa")) == ["BC-20240301-0001"]
+    assert ids(search_patients(patients, "0301-0002")) == ["BC-20240301-0002"]
+    assert ids(search_patients(patients, "G-120")) == ["BC-20240301-0002"]
+    assert ids(search_patients(patients, "922000")) == ["BC-20240302-0001"]
+    assert sorted(ids(search_patients(patients, "BC-2024"))) == [
+        "BC-20240301-0001", "BC-20240301-0002", "BC-20240302-0001"]
+    assert all(patient["match"] == "exact" for patient in search_patients(patients, "BC-2024"))
+
+
+def test_short_text_is_a_prefix_match(patients):
+    assert ids(search_patients(patients, "Ti")) == ["BC-20240301-0002"]
+    assert search_patients(patients, "ig") == []
+
+
+def test_fuzzy_match_fills_in_after_typos(patients):
+    results = search_patients(patients, "Almaz Tesfye")
+    assert ids(results) == ["BC-20240301-0001"]
+    assert results[0]["match"] == "fuzzy"
+    assert search_patients(patients, "Almaz Tesfye", fuzzy=False) == []
+
+
+def test_index_follows_edits(patients, make_summary):
+    insert_summaries(patients, [make_summary("BC-20240301-0002", name="Tigist Haile", study_id="MG-1200",
+                                             visit_id=2)])
+    assert search_patients(patients, "Bekele", fuzzy=False) == []
+    assert ids(search_patients(patients, "Haile")) == ["BC-20240301-0002"]
+
+
+def test_find_duplicates(patients):
+    assert [p["reason"] for p in find_duplicates(patients, "Almaz Tesfaye")] == ["same name"]
+    assert [p["reason"] for p in find_duplicates(patients, "Almaz Tesfay")] == ["similar name"]
+    assert [p["reason"] for p in find_duplicates(patients, "Almas Tesfae", date_of_birth="1980-02-01")] == [
+        "similar name and same date of birth"]
+    assert [p["reason"] for p in find_duplicates(patients, "Someone Else", contact="+251922000111")] == [
+        "same contact"]
+    assert find_duplicates(patients, "Almaz Tesfaye", exclude_patient_id="BC-20240301-0001") == []
+    assert find_duplicates(patients, "Someone Else") == []
+
+
+def test_patient_exists(patients):
+    assert patient_exists(patients, "BC-20240301-0001")
+    assert not patient_exists(patients, "BC-20240301-0009")
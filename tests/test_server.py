@@ -0,0 +1,137 @@
+import http.client
+import io
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import numpy as np
+import pytest
+
+from ai.server import InferenceRequestHandler, RemoteEngine, start_server
+
+
+class FakeEngine:
+    """The parts of InferenceEngine the server uses; scores an image by its mean"""
+    version = "test-1"
+    input_size = (8, 8)
+    threshold = 0.5
+
+    def warm_up(self):
+        return 0.0
+
+    def classify(self, batch):
+        return [{"score": float(image.mean()), "label": "Benign", "model_version": self.version}
+                for image in batch]
+
+
+@pytest.fixture
+def server():
+    server = start_server(port=0, engine=FakeEngine())
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def remote(server):
+    return RemoteEngine(f"http://127.0.0.1:{server.server_address[1]}", timeout=5)
+
+
+def npy(batch):
+    buffer = io.BytesIO()
+    np.save(buffer, np.asarray(batch, dtype=np.float32), allow_pickle=False)
+    return buffer.getvalue()
+
+
+def post(server, headers, body=b""):
+    """Raw POST /classify with exactly the given headers; returns (status, payload, Connection header)"""
+    conn = http.client.HTTPConnection("127.0.0.1", server.server_address[1], timeout=5)
+    conn.putrequest("POST", "/classify")
+    for name, value in headers.items():
+        conn.putheader(name, value)
+    conn.endheaders(body or None)
+    response = conn.getresponse()
+    payload = json.loads(response.read())
+    conn.close()
+    return response.status, payload, response.getheader("Connection")
+
+
+def test_classify_through_the_server(server, remote):
+    assert remote.is_available()
+    assert (remote.version, remote.input_size) == ("test-1", (8, 8))
+    batch = np.stack([np.full((8, 8), value, dtype=np.float32) for value in (0.1, 0.6)])
+    assert [result["score"] for result in remote.classify(batch)] == pytest.approx([0.1, 0.6])
+
+
+def test_batches_bigger_than_the_server_takes_are_split(server, remote):
+    size = server.batching.max_batch_size
+    batch = np.random.default_rng(0).random((size * 2 + 3, 8, 8)).astype(np.float32)
+    scores = [result["score"] for result in remote.classify(batch)]
+    assert scores == pytest.approx(batch.mean(axis=(1, 2)))
+
+
+@pytest.mark.parametrize("headers", [{}, {"Content-Length": "lots"}, {"Content-Length": "-1"}])
+def test_missing_or_invalid_content_length(server, headers):
+    status, payload, connection = post(server, headers)
+    assert status == 400
+    assert "Content-Length" in payload["error"]
+    assert connection == "close"
+
+
+def test_wrong_image_size(server):
+    body = npy(np.zeros((1, 4, 4)))
+    status, payload, _ = post(server, {"Content-Length": str(len(body))}, body)
+    assert status == 400
+    assert "Expected images of (8, 8)" in payload["error"]
+
+
+def test_body_over_the_limit_is_refused_unread(server):
+    # Nothing is sent after the headers; the server must answer without waiting for it
+    status, payload, connection = post(server, {"Content-Length": str(server.max_body + 1)})
+    assert status == 413
+    assert connection == "close"
+
+
+def test_retry_after_the_server_drops_a_keep_alive_connection(server, remote, monkeypatch):
+    # Idle connections are closed by the server after a moment
+    monkeypatch.setattr(InferenceRequestHandler, "timeout", 0.2)
+    remote.info()
+    first = remote._local.conn
+    threading.Event().wait(0.5)
+    batch = np.full((1, 8, 8), 0.3, dtype=np.float32)
+    assert remote.classify(batch)[0]["score"] == pytest.approx(0.3)
+    assert remote._local.conn is not first
+
+
+class NotTheServer(BaseHTTPRequestHandler):
+    """Something else listening on the configured port"""
+    status = 200
+
+    def do_GET(self):
+        body = b"<html>hello</html>" if self.status == 200 else b'{"error": "nope"}'
+        self.send_response(self.status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.mark.parametrize("status", [200, 500])
+def test_is_available_is_false_for_bad_replies(status, monkeypatch):
+    monkeypatch.setattr(NotTheServer, "status", status)
+    other = HTTPServer(("127.0.0.1", 0), NotTheServer)
+    threading.Thread(target=other.serve_forever, daemon=True).start()
+    try:
+        assert not RemoteEngine(f"127.0.0.1:{other.server_address[1]}", timeout=5).is_available()
+    finally:
+        other.shutdown()
+        other.server_close()
+
+
+def test_is_available_is_false_when_nothing_listens(server):
+    port = server.server_address[1]
+    server.shutdown()
+    server.server_close()
+    assert not RemoteEngine(f"127.0.0.1:{port}", timeout=1).is_available()
@@ -0,0 +1,117 @@
+import random
+
+import pytest
+
+from records.stats import (
+    facilities, finding_counts, indicator_counts, screenings_by_facility, screenings_by_period, totals,
+    whole_months
+)
+from records.store import insert_summaries
+
+FINDINGS = ["Skin thickening", "Nipple retraction", "Solid mass present"]
+INDICATORS = ["Stability over time", "New finding"]
+
+
+def table(conn, name):
+    """Rows still counting something; groups edited down to zero are left behind at 0"""
+    count = "screenings" if name.startswith("stats_screenings") else "visits"
+    return sorted(tuple(row) for row in conn.execute(f"SELECT * FROM {name} WHERE {count} != 0"))
+
+
+def grouped(conn, period_length):
+    """The stats tables recomputed from scratch with a GROUP BY"""
+    period = f"COALESCE(substr(v.study_date, 1, {period_length}), '')"
+    screenings = conn.execute(
+        f"""SELECT {period}, COALESCE(v.facility, ''), COUNT(*), SUM(COALESCE(v.ai_label = 'Suspicious', 0))
+            FROM visits v GROUP BY 1, 2""").fetchall()
+    findings = conn.execute(
+        f"""SELECT {period}, COALESCE(v.facility, ''), f.side, f.finding, COUNT(*)
+            FROM findings f JOIN visits v ON v.id = f.visit_id GROUP BY 1, 2, 3, 4""").fetchall()
+    indicators = conn.execute(
+        f"""SELECT {period}, COALESCE(v.facility, ''), i.indicator, COUNT(*)
+            FROM indicators i JOIN visits v ON v.id = i.visit_id GROUP BY 1, 2, 3""").fetchall()
+    return [sorted(tuple(row) for row in rows) for rows in (screenings, findings, indicators)]
+
+
+def assert_consistent(conn):
+    assert [table(conn, "stats_screenings"), table(conn, "stats_findings"),
+            table(conn, "stats_indicators")] == grouped(conn, 10)
+    assert [table(conn, "stats_screenings_monthly"), table(conn, "stats_findings_monthly"),
+            table(conn, "stats_indicators_monthly")] == grouped(conn, 7)
+
+
+def random_summary(make_summary, rng, patient_id, visit_id=None):
+    return make_summary(
+        patient_id,
+        study_date=rng.choice([None, "2024-01-31 09:00", "2024-02-01 10:30", "2024-02-15 08:00"]),
+        facility=rng.choice([None, "Jimma", "Agaro"]),
+        ai_label=rng.choice([None, "Suspicious", "Benign"]),
+        right=rng.sample(FINDINGS, rng.randint(0, 2)),
+        left=rng.sample(FINDINGS, rng.randint(0, 2)),
+        indicators=rng.sample(INDICATORS, rng.randint(0, 2)),
+        visit_id=visit_id,
+    )
+
+
+def test_tables_equal_a_group_by_after_inserts_and_edits(store, make_summary):
+    rng = random.Random(3)
+    visit_ids = insert_summaries(store, [random_summary(make_summary, rng, f"P{i}") for i in range(40)])
+    assert_consistent(store)
+    edits = rng.sample(visit_ids, 15)
+    insert_summaries(store, [random_summary(make_summary, rng, f"P{visit_id - 1}", visit_id)
+                             for visit_id in edits])
+    assert_consistent(store)
+
+
+def test_an_edit_moves_one_visit_between_groups(store, make_summary):
+    insert_summaries(store, [make_summary("P1", study_date="2024-01-10", facility="Agaro")])
+    visit_id, = insert_summaries(store, [
+        make_summary("P2", study_date="2024-01-10", facility="Jimma", ai_label="Suspicious",
+                     right=["Skin thickening"], indicators=["New finding"])])
+    assert totals(store, facility="Jimma") == (1, 1)
+    insert_summaries(store, [
+        make_summary("P2", study_date="2024-02-03", facility="Agaro", left=["Skin thickening"],
+                     visit_id=visit_id)])
+
+    # The old facility and day lose the visit, the new ones gain it
+    assert totals(store, facility="Jimma") == (0, 0)
+    assert totals(store, facility="Agaro") == (2, 0)
+    assert screenings_by_period(store) == [("2024-01-10", 1, 0), ("2024-02-03", 1, 0)]
+    assert finding_counts(store) == {("right", "Skin thickening"): 0, ("left", "Skin thickening"): 1}
+    assert indicator_counts(store) == {"New finding": 0}
+    # Emptied groups are dropped from the listings
+    assert facilities(store) == ["Agaro"]
+    assert screenings_by_facility(store) == [("Agaro", 2, 0)]
+
+
+def test_date_ranges(store, make_summary):
+    insert_summaries(store, [
+        make_summary("P1", study_date="2024-01-31 09:00", facility="Jimma", ai_label="Suspicious"),
+        make_summary("P2", study_date="2024-02-01 09:00", facility="Jimma"),
+        make_summary("P3", study_date="2024-02-29 09:00", facility="Agaro"),
+        make_summary("P4", facility="Agaro"),
+    ])
+    assert totals(store) == (4, 1)
+    # Undated visits only count when no range is asked for
+    assert totals(store, since="2024-01-01") == (3, 1)
+    # Whole months read the monthly tables, other ranges the daily ones; both agree
+    assert totals(store, "2024-02-01", "2024-02-29") == (2, 0)
+    assert totals(store, "2024-01-31", "2024-02-01") == (2, 1)
+    assert totals(store, until="2024-01-31", facility="Jimma") == (1, 1)
+    assert screenings_by_period(store, "2024-01-01", "2024-02-29", by_month=True) == [
+        ("2024-01", 1, 1), ("2024-02", 2, 0)]
+    assert screenings_by_period(store, "2024-01-15", "2024-02-15", by_month=True) == [
+        ("2024-01", 1, 1), ("2024-02", 1, 0)]
+
+
+@pytest.mark.parametrize("since, until, expected", [
+    (None, None, True),
+    ("2024-01-01", None, True),
+    ("2024-01-02", None, False),
+    (None, "2024-02-29", True),
+    (None, "2023-02-28", True),
+    (None, "2024-02-28", False),
+    ("2024-01-01", "2024-12-31", True),
+])
+def test_whole_months(since, until, expected):
+    assert whole_months(since, until) is expected
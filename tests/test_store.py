@@ -0,0 +1,112 @@
+import pytest
+
+import records.store as store_module
+from records.store import SCHEMA_VERSION, RecordWriter, connect, init_db, insert_summaries, load_summary
+
+
+def user_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def object_names(conn):
+    return {row[0] for row in conn.execute("SELECT name FROM sqlite_master")}
+
+
+def test_init_db_creates_the_current_schema(store):
+    assert user_version(store) == SCHEMA_VERSION
+    assert {"patients", "visits", "findings", "indicators", "images", "import_checkpoints",
+            "stats_screenings", "stats_screenings_monthly", "idx_visits_worklist_modality"} <= object_names(store)
+    # A second call finds nothing to do
+    init_db(store)
+    assert user_version(store) == SCHEMA_VERSION
+    assert not store.in_transaction
+
+
+def test_upgrade_from_an_older_version_keeps_the_data(store, make_summary):
+    insert_summaries(store, [make_summary("P1", study_date="2024-05-01", facility="Jimma")])
+    # Roll the store back to before the worklist indexes and statistics existed
+    tables = store.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE 'stats_%'").fetchall()
+    for (name,) in tables:
+        store.execute(f"DROP TABLE {name}")
+    store.execute("DROP INDEX idx_visits_worklist_modality")
+    store.execute("PRAGMA user_version=6")
+
+    init_db(store)
+    assert user_version(store) == SCHEMA_VERSION
+    assert "idx_visits_worklist_modality" in object_names(store)
+    # The statistics are filled from the visits already stored
+    rows = store.execute("SELECT period, facility, screenings FROM stats_screenings").fetchall()
+    assert [tuple(row) for row in rows] == [("2024-05-01", "Jimma", 1)]
+    assert load_summary(store, 1)["patient_info"]["Patient ID"] == "P1"
+
+
+def test_failed_upgrade_rolls_back_completely(store, monkeypatch):
+    store.execute("DROP INDEX idx_visits_worklist_modality")
+    store.execute("PRAGMA user_version=6")
+
+    def broken(conn):
+        raise RuntimeError("interrupted")
+
+    monkeypatch.setattr(store_module, "create_stats_tables", broken)
+    with pytest.raises(RuntimeError):
+        init_db(store)
+    # Nothing of the upgrade is left behind, so the next start redoes it
+    assert user_version(store) == 6
+    assert "idx_visits_worklist_modality" not in object_names(store)
+    assert not store.in_transaction
+
+    monkeypatch.undo()
+    init_db(store)
+    assert "idx_visits_worklist_modality" in object_names(store)
+
+
+def test_summary_round_trip(store, make_summary):
+    summary = make_summary("P1", name="Abebe", study_id="S1", study_date="2024-05-01", modality="Ultrasound",
+                           facility="Jimma", ai_label="Suspicious", right=["Skin thickening"],
+                           indicators=["Stability over time"])
+    visit_id, = insert_summaries(store, [summary])
+    loaded = load_summary(store, visit_id)
+    assert loaded["visit_id"] == visit_id
+    assert loaded["patient_info"]["Name/Code"] == "Abebe"
+    assert loaded["visit_info"]["Study ID"] == "S1"
+    assert loaded["findings"] == {"Right Breast Findings": "Skin thickening", "Left Breast Findings": "None"}
+    assert loaded["indicators"] == ["Stability over time"]
+    assert loaded["ai_analysis"]["label"] == "Suspicious"
+    assert load_summary(store, visit_id + 1) is None
+
+
+def test_summary_with_visit_id_updates_in_place(store, make_summary):
+    visit_id, = insert_summaries(store, [make_summary("P1", study_id="S1", right=["Skin thickening"])])
+    insert_summaries(store, [make_summary("P1", study_id="S2", left=["Nipple retraction"], visit_id=visit_id)])
+    assert store.execute("SELECT COUNT(*) FROM visits").fetchone()[0] == 1
+    loaded = load_summary(store, visit_id)
+    assert loaded["visit_info"]["Study ID"] == "S2"
+    assert loaded["findings"] == {"Right Breast Findings": "None", "Left Breast Findings": "Nipple retraction"}
+
+    with pytest.raises(KeyError):
+        insert_summaries(store, [make_summary("P1", visit_id=visit_id + 1)])
+
+
+def test_record_writer_commits_submissions(tmp_path, make_summary):
+    db_path = str(tmp_path / "store.db")
+    writer = RecordWriter(db_path, batch_size=5, max_delay=0.01)
+    futures = [writer.submit(make_summary(f"P{i}")) for i in range(12)]
+    writer.close()
+    assert sorted(future.result(5) for future in futures) == list(range(1, 13))
+    with pytest.raises(RuntimeError):
+        writer.submit(make_summary("P99"))
+    conn = connect(db_path)
+    assert conn.execute("SELECT COUNT(*) FROM visits").fetchone()[0] == 12
+    conn.close()
+
+
+def test_record_writer_fails_submissions_when_the_store_cannot_open(tmp_path, make_summary):
+    path = tmp_path / "not-a-database"
+    path.write_bytes(b"garbage" * 1000)
+    writer = RecordWriter(str(path))
+    first = writer.submit(make_summary("P1"))
+    assert first.exception(5) is not None
+    writer._thread.join(5)
+    # Submissions after the failure fail straight away instead of hanging
+    assert writer.submit(make_summary("P2")).exception(0) is not None
+    writer.close()
@@ -0,0 +1,68 @@
+import io
+import os
+
+import numpy as np
+import pytest
+
+Image = pytest.importorskip("PIL.Image")
+
+from imaging.thumbnails import ThumbnailCache, make_thumbnail  # noqa: E402
+
+
+def save_noise(path, size, seed=0):
+    pixels = np.random.default_rng(seed).integers(0, 255, (size[1], size[0], 3), dtype=np.uint8)
+    Image.fromarray(pixels).save(path, quality=95)
+    return str(path)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ThumbnailCache(cache_dir=str(tmp_path / "cache"), max_disk_bytes=100_000, max_memory_bytes=1_000_000)
+
+
+def test_colour_jpegs_stay_in_colour(tmp_path):
+    rgb = Image.new("RGB", (1600, 1200), (200, 30, 30))
+    rgb.save(tmp_path / "rgb.jpg")
+    rgb.convert("CMYK").save(tmp_path / "cmyk.jpg")
+    for name in ("rgb.jpg", "cmyk.jpg"):
+        thumb = Image.open(io.BytesIO(make_thumbnail(str(tmp_path / name), (160, 160))))
+        assert thumb.mode == "RGB"
+        assert max(thumb.size) == 160
+        red, green, _ = thumb.getpixel((80, 60))
+        assert red > 150 and green < 80
+
+
+def test_hits_from_memory_and_disk(tmp_path, cache):
+    source = save_noise(tmp_path / "a.png", (400, 300))
+    data = cache.get_bytes(source, (64, 64))
+    assert cache.get_bytes(source, (64, 64)) == data
+    assert (cache.misses, cache.memory_hits) == (1, 1)
+    # A second process sharing the directory finds it on disk
+    other = ThumbnailCache(cache_dir=cache.cache_dir, max_disk_bytes=100_000, max_memory_bytes=1_000_000)
+    assert other.get_bytes(source, (64, 64)) == data
+    assert (other.misses, other.disk_hits) == (0, 1)
+
+
+def test_least_recently_used_files_are_evicted(tmp_path, cache):
+    sources = [save_noise(tmp_path / f"{i}.png", (600, 600), seed=i) for i in range(8)]
+    first = cache.get_path(sources[0], (128, 128))
+    # Room for about four thumbnails
+    cache.max_disk_bytes = os.path.getsize(first) * 4.5
+    paths = [first]
+    for i, source in enumerate(sources[1:], 1):
+        paths.append(cache.get_path(source, (128, 128)))
+        # Distinct mtimes without sleeping, oldest first
+        os.utime(paths[-1], (1000 + i, 1000 + i))
+        # Using the first thumbnail again refreshes it
+        cache.get_path(sources[0], (128, 128))
+    assert sum(os.path.getsize(path) for path in paths if os.path.exists(path)) <= cache.max_disk_bytes
+    assert os.path.exists(paths[0])
+    assert not os.path.exists(paths[1])
+    assert os.path.exists(paths[-1])
+
+
+def test_a_thumbnail_bigger_than_the_cap_is_kept(tmp_path):
+    cache = ThumbnailCache(cache_dir=str(tmp_path / "cache"), max_disk_bytes=1_000, max_memory_bytes=1_000_000)
+    path = cache.get_path(save_noise(tmp_path / "big.png", (600, 600)), (256, 256), fmt="PNG")
+    assert os.path.getsize(path) > cache.max_disk_bytes
+    assert os.path.exists(path)
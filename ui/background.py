@@ -0,0 +1,75 @@
+import os
+
+from PyQt5.QtCore import Qt, QSize
+from PyQt5.QtGui import QImage, QImageReader
+
+from core.core import core
+from helper.file_hash import file_digest
+
+
+# Renders are made at window sizes rounded up to this step and scaled to the
+# exact size, so resizing a window reuses a handful of files
+SIZE_STEP = 256
+# Renders kept on disk, least recently used deleted first
+KEEP_RENDERS = 8
+
+
+def render_size(width, height):
+    return QSize(-(-max(1, width) // SIZE_STEP) * SIZE_STEP, -(-max(1, height) // SIZE_STEP) * SIZE_STEP)
+
+
+def background_cache_path(image_path, size, cache_dir=None):
+    cache_dir = cache_dir or os.path.join(core()["cache_dir"], "backgrounds")
+    return os.path.join(cache_dir, f"{file_digest(image_path)}_{size.width()}x{size.height()}.png")
+
+
+def prune_backgrounds(cache_dir, keep=KEEP_RENDERS):
+    """Delete all but the keep most recently used renders"""
+    renders = sorted(
+        (entry.stat().st_mtime, entry.path) for entry in os.scandir(cache_dir)
+        if entry.is_file() and not entry.name.endswith(".tmp.png")
+    )
+    for _, path in renders[:-keep]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def load_background(progress, is_cancelled, image_path, width, height):
+    """Return the background as a QImage of exactly width x height.
+
+    Reads the render for the size's SIZE_STEP bucket from the disk cache
+    when there is one. Otherwise it asks the decoder for the bucket size
+    directly (JPEG decodes at reduced scale), so the full-resolution image
+    is never held in memory. Safe to call off the GUI thread: it only uses
+    QImage/QImageReader.
+    """
+    size = QSize(max(1, width), max(1, height))
+    bucket = render_size(width, height)
+    cached = background_cache_path(image_path, bucket)
+    image = QImage()
+    if os.path.exists(cached):
+        image = QImage(cached)
+        if not image.isNull():
+            try:
+                os.utime(cached)
+            except OSError:
+                pass
+
+    if image.isNull():
+        reader = QImageReader(image_path)
+        reader.setScaledSize(bucket)
+        reader.setQuality(100)
+        image = reader.read()
+        if image.isNull():
+            raise IOError(f"Cannot read background image {image_path}: {reader.errorString()}")
+        if is_cancelled():
+            return None
+
+        os.makedirs(os.path.dirname(cached), exist_ok=True)
+        tmp = f"{cached}.{os.getpid()}.tmp.png"
+        if image.save(tmp, "PNG"):
+            os.replace(tmp, cached)
+            prune_backgrounds(os.path.dirname(cached))
+    return image.scaled(size, Qt.IgnoreAspectRatio, Qt.SmoothTransformation)
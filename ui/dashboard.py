@@ -0,0 +1,156 @@
+from PyQt5.QtCore import QDate, QTimer
+from PyQt5.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QComboBox, QLabel, QPushButton, QTabWidget, QTableWidget,
+    QTableWidgetItem, QAbstractItemView, QHeaderView
+)
+
+from records.fields import RIGHT_FINDINGS, LEFT_FINDINGS, INDICATORS
+from records.stats import (
+    facilities, totals, screenings_by_period, screenings_by_facility, finding_counts, indicator_counts
+)
+from records.store import connect, init_db
+
+PERIODS = ["Last 30 days", "Last 12 months", "This year", "All time"]
+
+
+def period_range(name, today=None):
+    """(since, until) days for one of PERIODS; None is unbounded"""
+    today = today or QDate.currentDate()
+    if name == "Last 30 days":
+        return today.addDays(-29).toString("yyyy-MM-dd"), today.toString("yyyy-MM-dd")
+    if name == "Last 12 months":
+        # Whole months, so the monthly statistics tables answer it
+        start = today.addMonths(-11)
+        return QDate(start.year(), start.month(), 1).toString("yyyy-MM-dd"), None
+    if name == "This year":
+        return QDate(today.year(), 1, 1).toString("yyyy-MM-dd"), None
+    return None, None
+
+
+def percent(count, total):
+    return f"{100.0 * count / total:.1f}%" if total else "-"
+
+
+class DashboardDialog(QDialog):
+    """Screening statistics for program managers.
+
+    Reads only the aggregate tables of records.stats, which every submission
+    keeps current, so opening and refreshing stay instant with years of
+    data. The dialog is modeless; refresh() is called after each submission
+    and a timer picks up records written by other copies of the app.
+    """
+
+    def __init__(self, db_path=None, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Screening Dashboard")
+        self.resize(900, 600)
+        self.conn = connect(db_path)
+        init_db(self.conn)
+
+        layout = QVBoxLayout(self)
+        filters = QHBoxLayout()
+        filters.addWidget(QLabel("Period:"))
+        self.period = QComboBox()
+        self.period.addItems(PERIODS)
+        filters.addWidget(self.period)
+        filters.addWidget(QLabel("Facility:"))
+        self.facility = QComboBox()
+        filters.addWidget(self.facility)
+        filters.addStretch()
+        self.refresh_btn = QPushButton("Refresh")
+        self.refresh_btn.clicked.connect(self.refresh)
+        filters.addWidget(self.refresh_btn)
+        layout.addLayout(filters)
+
+        self.summary_label = QLabel()
+        self.summary_label.setStyleSheet("font-size: 15px; font-weight: bold;")
+        layout.addWidget(self.summary_label)
+
+        self.tabs = QTabWidget()
+        self.facility_table = self.add_table("By Facility", ["Facility", "Screenings", "AI Positive", "AI Positive %"])
+        self.period_table = self.add_table("Over Time", ["Period", "Screenings", "AI Positive", "AI Positive %"])
+        self.findings_table = self.add_table("Findings", ["Finding", "Right", "Right %", "Left", "Left %"])
+        self.indicators_table = self.add_table("Indicators", ["Indicator", "Visits", "% of Screenings"])
+        layout.addWidget(self.tabs)
+
+        self.reload_facilities()
+        self.period.currentIndexChanged.connect(lambda _: self.refresh())
+        self.facility.currentIndexChanged.connect(lambda _: self.refresh())
+
+        self.timer = QTimer(self)
+        self.timer.setInterval(30000)
+        self.timer.timeout.connect(self.refresh)
+        self.timer.start()
+        self.refresh()
+
+    def add_table(self, title, headers):
+        table = QTableWidget(0, len(headers))
+        table.setHorizontalHeaderLabels(headers)
+        table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        table.verticalHeader().setVisible(False)
+        table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.tabs.addTab(table, title)
+        return table
+
+    def reload_facilities(self):
+        current = self.facility.currentData()
+        self.facility.blockSignals(True)
+        self.facility.clear()
+        self.facility.addItem("All facilities", None)
+        for name in facilities(self.conn):
+            self.facility.addItem(name or "(not recorded)", name)
+        index = self.facility.findData(current) if current is not None else 0
+        self.facility.setCurrentIndex(max(index, 0))
+        self.facility.blockSignals(False)
+
+    def fill(self, table, rows):
+        table.setRowCount(len(rows))
+        for r, row in enumerate(rows):
+            for c, value in enumerate(row):
+                table.setItem(r, c, QTableWidgetItem(str(value)))
+
+    def refresh(self):
+        self.reload_facilities()
+        period_name = self.period.currentText()
+        since, until = period_range(period_name)
+        facility = self.facility.currentData()
+
+        screenings, positives = totals(self.conn, since, until, facility)
+        self.summary_label.setText(
+            f"{screenings} screenings, {positives} flagged suspicious by AI ({percent(positives, screenings)})"
+        )
+
+        self.fill(self.facility_table, [
+            (name or "(not recorded)", count, ai, percent(ai, count))
+            for name, count, ai in screenings_by_facility(self.conn, since, until)
+        ])
+        self.fill(self.period_table, [
+            (period or "(no date)", count, ai, percent(ai, count))
+            for period, count, ai in reversed(screenings_by_period(
+                self.conn, since, until, facility, by_month=period_name != "Last 30 days"))
+        ])
+
+        counts = finding_counts(self.conn, since, until, facility)
+        rows = []
+        for finding in dict.fromkeys(RIGHT_FINDINGS + LEFT_FINDINGS):
+            row = [finding]
+            for side, offered in (("right", RIGHT_FINDINGS), ("left", LEFT_FINDINGS)):
+                if finding in offered:
+                    count = counts.get((side, finding), 0)
+                    row += [count, percent(count, screenings)]
+                else:
+                    row += ["-", "-"]
+            rows.append(row)
+        self.fill(self.findings_table, rows)
+
+        counts = indicator_counts(self.conn, since, until, facility)
+        self.fill(self.indicators_table, [
+            (indicator, counts.get(indicator, 0), percent(counts.get(indicator, 0), screenings))
+            for indicator in INDICATORS
+        ])
+
+    def done(self, result):
+        self.timer.stop()
+        self.conn.close()
+        super().done(result)
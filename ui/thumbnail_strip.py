@@ -0,0 +1,100 @@
+from PyQt5.QtCore import Qt, QSize, QThreadPool, QTimer, pyqtSignal
+from PyQt5.QtGui import QIcon, QPixmap
+from PyQt5.QtWidgets import QListView, QListWidget, QListWidgetItem
+
+from ui.workers import Worker, start_worker
+
+PATH_ROLE = Qt.UserRole
+LOADED_ROLE = Qt.UserRole + 1
+
+
+class ThumbnailStrip(QListWidget):
+    """Horizontal strip of image thumbnails that are loaded lazily.
+
+    Items are added as placeholders; thumbnails are only requested for the
+    items scrolled into view, on a small dedicated thread pool so a study
+    with hundreds of images never floods the global pool used by the rest
+    of the UI. Emits image_selected(path) when an item is clicked.
+    """
+
+    image_selected = pyqtSignal(str)
+
+    def __init__(self, parent=None, thumb_size=96, max_threads=2):
+        super().__init__(parent)
+        self.thumb_size = thumb_size
+        self.setViewMode(QListView.IconMode)
+        self.setFlow(QListView.LeftToRight)
+        self.setWrapping(False)
+        self.setMovement(QListView.Static)
+        self.setResizeMode(QListView.Adjust)
+        self.setIconSize(QSize(thumb_size, thumb_size))
+        self.setFixedHeight(thumb_size + 50)
+        self.setHorizontalScrollMode(QListView.ScrollPerPixel)
+
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max_threads)
+        self.workers = set()
+        # Bumped on every set_paths so results for a previous study are dropped
+        self.generation = 0
+
+        # Coalesce the many valueChanged signals of a drag into one pass
+        self.load_timer = QTimer(self)
+        self.load_timer.setSingleShot(True)
+        self.load_timer.setInterval(50)
+        self.load_timer.timeout.connect(self.load_visible)
+        self.horizontalScrollBar().valueChanged.connect(lambda _: self.load_timer.start())
+        self.currentItemChanged.connect(self.on_current_changed)
+
+    def set_paths(self, paths):
+        self.generation += 1
+        for worker in self.workers:
+            worker.cancel()
+        self.workers.clear()
+        self.clear()
+        for path in paths:
+            item = QListWidgetItem(path.replace("\\", "/").rsplit("/", 1)[-1])
+            item.setData(PATH_ROLE, path)
+            item.setData(LOADED_ROLE, False)
+            item.setSizeHint(QSize(self.thumb_size + 16, self.thumb_size + 36))
+            item.setToolTip(path)
+            self.addItem(item)
+        self.load_timer.start()
+
+    def paths(self):
+        return [self.item(row).data(PATH_ROLE) for row in range(self.count())]
+
+    def load_visible(self):
+        """Request thumbnails for the items currently inside the viewport"""
+        from imaging.thumbnails import load_thumbnail
+        viewport = self.viewport().rect()
+        size = (self.thumb_size, self.thumb_size)
+        for row in range(self.count()):
+            item = self.item(row)
+            if item.data(LOADED_ROLE) or not self.visualItemRect(item).intersects(viewport):
+                continue
+            item.setData(LOADED_ROLE, True)
+            worker = Worker(load_thumbnail, item.data(PATH_ROLE), size)
+            generation = self.generation
+            worker.signals.result.connect(lambda data, row=row, generation=generation: self.on_thumbnail(row, data, generation))
+            worker.signals.finished.connect(lambda worker=worker: self.workers.discard(worker))
+            self.workers.add(worker)
+            start_worker(worker, self.pool)
+
+    def on_thumbnail(self, row, data, generation):
+        if generation != self.generation or row >= self.count():
+            return
+        pixmap = QPixmap()
+        if pixmap.loadFromData(data):
+            self.item(row).setIcon(QIcon(pixmap))
+
+    def on_current_changed(self, current, previous):
+        if current is not None:
+            self.image_selected.emit(current.data(PATH_ROLE))
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.load_timer.start()
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.load_timer.start()
@@ -0,0 +1,128 @@
+from collections import OrderedDict
+
+import numpy as np
+from PyQt5.QtCore import Qt, QPointF, QRectF
+from PyQt5.QtGui import QImage, QPainter, QColor
+from PyQt5.QtWidgets import QWidget
+
+
+class TiledImageView(QWidget):
+    """Zoomable, pannable view over an imaging.pyramid.TilePyramid.
+
+    Only the tiles intersecting the viewport at the level matching the
+    current zoom are read from the pyramid's memory map. Decoded QImages are
+    kept in a small LRU, so memory stays bounded by max_cached_tiles no
+    matter how large the source image is.
+
+    Mouse wheel zooms around the cursor, dragging pans, double-click fits.
+    """
+
+    def __init__(self, pyramid=None, parent=None, max_cached_tiles=256):
+        super().__init__(parent)
+        self.setMinimumSize(400, 300)
+        self.setMouseTracking(False)
+        self.max_cached_tiles = max_cached_tiles
+        self._tile_cache = OrderedDict()
+        self._drag_origin = None
+        self.pyramid = None
+        self.scale = 1.0
+        # Image coordinates (level 0 pixels) shown at the top-left corner
+        self.origin = QPointF(0, 0)
+        if pyramid is not None:
+            self.set_pyramid(pyramid)
+
+    def set_pyramid(self, pyramid):
+        self.pyramid = pyramid
+        self._tile_cache.clear()
+        self.fit_to_window()
+
+    def fit_to_window(self):
+        if self.pyramid is None:
+            return
+        self.scale = min(self.width() / self.pyramid.width, self.height() / self.pyramid.height)
+        self.origin = QPointF(
+            (self.pyramid.width - self.width() / self.scale) / 2,
+            (self.pyramid.height - self.height() / self.scale) / 2,
+        )
+        self.update()
+
+    def zoom_at(self, factor, pos):
+        """Zoom by factor keeping the image point under pos fixed"""
+        anchor = self.origin + QPointF(pos) / self.scale
+        fit = min(self.width() / self.pyramid.width, self.height() / self.pyramid.height)
+        self.scale = min(max(self.scale * factor, fit / 2), 8.0)
+        self.origin = anchor - QPointF(pos) / self.scale
+        self.update()
+
+    def _tile_image(self, level, row, col):
+        key = (level, row, col)
+        image = self._tile_cache.get(key)
+        if image is not None:
+            self._tile_cache.move_to_end(key)
+            return image
+
+        tile = np.ascontiguousarray(self.pyramid.tile(level, row, col))
+        h, w, channels = tile.shape
+        fmt = QImage.Format_Grayscale8 if channels == 1 else QImage.Format_RGB888
+        # copy() detaches the QImage from the NumPy buffer
+        image = QImage(tile.data, w, h, w * channels, fmt).copy()
+        self._tile_cache[key] = image
+        while len(self._tile_cache) > self.max_cached_tiles:
+            self._tile_cache.popitem(last=False)
+        return image
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), QColor("#000"))
+        if self.pyramid is None:
+            painter.setPen(QColor("#fff"))
+            painter.drawText(self.rect(), Qt.AlignCenter, "Loading image...")
+            return
+
+        painter.setRenderHint(QPainter.SmoothPixmapTransform)
+        level = self.pyramid.level_for_scale(self.scale)
+        info = self.pyramid.levels[level]
+        level_scale = info["width"] / self.pyramid.width
+        tile_size = self.pyramid.tile_size
+        # Size of one level pixel on screen
+        pixel = self.scale / level_scale
+
+        left = max(0, int(self.origin.x() * level_scale // tile_size))
+        top = max(0, int(self.origin.y() * level_scale // tile_size))
+        right = min(info["cols"] - 1, int((self.origin.x() + self.width() / self.scale) * level_scale // tile_size))
+        bottom = min(info["rows"] - 1, int((self.origin.y() + self.height() / self.scale) * level_scale // tile_size))
+
+        for row in range(top, bottom + 1):
+            for col in range(left, right + 1):
+                image = self._tile_image(level, row, col)
+                x = (col * tile_size / level_scale - self.origin.x()) * self.scale
+                y = (row * tile_size / level_scale - self.origin.y()) * self.scale
+                painter.drawImage(QRectF(x, y, image.width() * pixel, image.height() * pixel), image)
+
+    def wheelEvent(self, event):
+        if self.pyramid is not None:
+            factor = 1.25 if event.angleDelta().y() > 0 else 0.8
+            self.zoom_at(factor, event.pos())
+
+    def mousePressEvent(self, event):
+        if event.button() == Qt.LeftButton:
+            self._drag_origin = (event.pos(), QPointF(self.origin))
+            self.setCursor(Qt.ClosedHandCursor)
+
+    def mouseMoveEvent(self, event):
+        if self._drag_origin is not None and self.pyramid is not None:
+            start_pos, start_origin = self._drag_origin
+            self.origin = start_origin - QPointF(event.pos() - start_pos) / self.scale
+            self.update()
+
+    def mouseReleaseEvent(self, event):
+        self._drag_origin = None
+        self.unsetCursor()
+
+    def mouseDoubleClickEvent(self, event):
+        self.fit_to_window()
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        if self.pyramid is not None and event.oldSize().width() <= 0:
+            self.fit_to_window()
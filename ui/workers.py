@@ -0,0 +1,62 @@
+import threading
+import traceback
+
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+
+class WorkerSignals(QObject):
+    """Signals emitted by a Worker; delivered on the GUI thread"""
+    progress = pyqtSignal(int, str)
+    result = pyqtSignal(object)
+    error = pyqtSignal(str)
+    cancelled = pyqtSignal()
+    finished = pyqtSignal()
+
+
+class Worker(QRunnable):
+    """Runs fn(progress, is_cancelled, *args, **kwargs) on a QThreadPool.
+
+    fn reports progress through progress(percent, message) and should check
+    is_cancelled() between stages and return early when it is set.
+    """
+
+    def __init__(self, fn, *args, **kwargs):
+        super().__init__()
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.signals = WorkerSignals()
+        self._cancel_event = threading.Event()
+
+    def cancel(self):
+        self._cancel_event.set()
+
+    def is_cancelled(self):
+        return self._cancel_event.is_set()
+
+    def report_progress(self, percent, message=""):
+        if not self.is_cancelled():
+            self.signals.progress.emit(int(percent), message)
+
+    def run(self):
+        try:
+            result = self.fn(self.report_progress, self.is_cancelled, *self.args, **self.kwargs)
+        except Exception as e:
+            traceback.print_exc()
+            if self.is_cancelled():
+                self.signals.cancelled.emit()
+            else:
+                self.signals.error.emit(str(e))
+        else:
+            if self.is_cancelled():
+                self.signals.cancelled.emit()
+            else:
+                self.signals.result.emit(result)
+        finally:
+            self.signals.finished.emit()
+
+
+def start_worker(worker, pool=None):
+    """Queue a worker on the given pool (the global pool by default)"""
+    (pool or QThreadPool.globalInstance()).start(worker)
+    return worker
@@ -0,0 +1,154 @@
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, QTimer, pyqtSignal
+from PyQt5.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLineEdit, QTableView, QPushButton, QLabel,
+    QAbstractItemView, QHeaderView
+)
+
+from records.store import WORKLIST_COLUMNS, connect, init_db, count_visits, query_visits
+
+
+class WorklistModel(QAbstractTableModel):
+    """Table model over the stored visits that pages rows in on demand.
+
+    Only the rows fetched so far are held in memory; the view asks for more
+    through canFetchMore()/fetchMore() as it scrolls. Sorting and filtering
+    are pushed down to SQL (see records.store.query_visits), so the model
+    stays cheap with hundreds of thousands of visits.
+    """
+
+    def __init__(self, conn, page_size=200, parent=None):
+        super().__init__(parent)
+        self.conn = conn
+        self.page_size = page_size
+        self.rows = []
+        self.filter_text = ""
+        self.sort_column = len(WORKLIST_COLUMNS) - 1
+        self.descending = True
+        self.exhausted = False
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(WORKLIST_COLUMNS)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and index.isValid():
+            value = self.rows[index.row()][index.column() + 1]
+            return "" if value is None else str(value)
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return WORKLIST_COLUMNS[section][0]
+        return None
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self.exhausted
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self.exhausted:
+            return
+        page = query_visits(self.conn, self.filter_text, self.sort_column, self.descending,
+                            after=self.rows[-1] if self.rows else None, limit=self.page_size)
+        self.exhausted = len(page) < self.page_size
+        if page:
+            self.beginInsertRows(QModelIndex(), len(self.rows), len(self.rows) + len(page) - 1)
+            self.rows.extend(page)
+            self.endInsertRows()
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        if column < 0:
+            return
+        self.sort_column = column
+        self.descending = order == Qt.DescendingOrder
+        self.reload()
+
+    def set_filter(self, text):
+        self.filter_text = text.strip()
+        self.reload()
+
+    def reload(self):
+        self.beginResetModel()
+        self.rows = []
+        self.exhausted = False
+        self.endResetModel()
+        self.fetchMore()
+
+    def visit_id(self, row):
+        return self.rows[row][0]
+
+
+class WorklistDialog(QDialog):
+    """Browse submitted screenings; emits record_opened(visit_id) to load one into the wizard"""
+
+    record_opened = pyqtSignal(int)
+
+    def __init__(self, db_path=None, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Worklist")
+        self.resize(1000, 600)
+        # Reads run on their own connection; WAL keeps them clear of the writer
+        self.conn = connect(db_path)
+        init_db(self.conn)
+        self.model = WorklistModel(self.conn, parent=self)
+
+        layout = QVBoxLayout(self)
+        self.filter_edit = QLineEdit()
+        self.filter_edit.setPlaceholderText("Filter by Patient ID, name/code, contact or Study ID")
+        layout.addWidget(self.filter_edit)
+
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.verticalHeader().setVisible(False)
+        # Fixed row heights: the view never has to measure rows it hasn't shown
+        self.table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.table.horizontalHeader().setStretchLastSection(True)
+        # Indicator first: enabling sorting sorts by whatever it shows
+        self.table.horizontalHeader().setSortIndicator(self.model.sort_column, Qt.DescendingOrder)
+        self.table.setSortingEnabled(True)
+        self.table.doubleClicked.connect(lambda index: self.open_row(index.row()))
+        layout.addWidget(self.table)
+
+        bottom = QHBoxLayout()
+        self.count_label = QLabel()
+        bottom.addWidget(self.count_label)
+        bottom.addStretch()
+        self.open_btn = QPushButton("Open Record")
+        self.open_btn.clicked.connect(self.open_selected)
+        bottom.addWidget(self.open_btn)
+        layout.addLayout(bottom)
+
+        # Re-query once typing pauses rather than on every keystroke
+        self.filter_timer = QTimer(self)
+        self.filter_timer.setSingleShot(True)
+        self.filter_timer.setInterval(200)
+        self.filter_timer.timeout.connect(self.apply_filter)
+        self.filter_edit.textChanged.connect(lambda _: self.filter_timer.start())
+
+        if not self.model.rows:
+            self.model.reload()
+        self.count_label.setText(f"{count_visits(self.conn)} records")
+
+    def apply_filter(self):
+        text = self.filter_edit.text()
+        self.model.set_filter(text)
+        # A broad filter can match most of the store; counting it all isn't worth the wait
+        count = count_visits(self.conn, text.strip(), cap=1000)
+        self.count_label.setText(f"{count} records" if count <= 1000 else "More than 1000 records")
+
+    def open_selected(self):
+        rows = self.table.selectionModel().selectedRows()
+        if rows:
+            self.open_row(rows[0].row())
+
+    def open_row(self, row):
+        self.record_opened.emit(self.model.visit_id(row))
+        self.accept()
+
+    def done(self, result):
+        self.conn.close()
+        super().done(result)